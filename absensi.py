@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Indeks tanggal absensi per karyawan untuk halaman "Riwayat Absensi".
+
+Tanggal disimpan terurut (juga per status), jadi query rentang tanggal +
+filter status + halaman cukup dua bisect dan satu slice:
+O(log n + ukuran halaman), tanpa membangun/mengurutkan DataFrame penuh.
+"""
+from bisect import bisect_left, bisect_right, insort
+
+
+class IndeksAbsensi:
+    def __init__(self, absen):  # absen = { 'YYYY-MM-DD': rekaman.HariAbsen}
+        self.absen = absen
+        self.tanggal = sorted(absen)
+        self.per_status = {}  # status -> daftar tanggal terurut
+        for dstr in self.tanggal:
+            self.per_status.setdefault(absen[dstr].status, []).append(dstr)
+
+    def __len__(self):
+        return len(self.tanggal)
+
+    def catat(self, dstr, info):
+        """tambah/timpa satu hari absen, indeks tetap terurut"""
+        lama = self.absen.get(dstr)
+        if lama is not None:
+            daftar = self.per_status[lama.status]
+            del daftar[bisect_left(daftar, dstr)]
+        else:
+            insort(self.tanggal, dstr)
+        self.absen[dstr] = info
+        insort(self.per_status.setdefault(info.status, []), dstr)
+
+    def _rentang(self, dari, sampai, status):
+        daftar = self.tanggal if status is None else self.per_status.get(status, [])
+        lo = 0 if dari is None else bisect_left(daftar, dari)
+        hi = len(daftar) if sampai is None else bisect_right(daftar, sampai)
+        return daftar, lo, max(hi, lo)
+
+    def jumlah(self, dari=None, sampai=None, status=None):
+        """banyak hari tercatat dalam rentang (inklusif), O(log n)"""
+        _, lo, hi = self._rentang(dari, sampai, status)
+        return hi - lo
+
+    def dalam(self, dari=None, sampai=None, status=None):
+        """tanggal tercatat dalam rentang (terurut), O(log n + hasil)"""
+        daftar, lo, hi = self._rentang(dari, sampai, status)
+        return daftar[lo:hi]
+
+    def total_lembur(self, dari=None, sampai=None):
+        """jumlah jam lembur dalam rentang, O(log n + hari dalam rentang)"""
+        return sum(self.absen[d].overtime for d in self.dalam(dari, sampai))
+
+    def cari(self, dari=None, sampai=None, status=None, halaman=0, ukuran=25, terbaru_dulu=False):
+        """
+        dari/sampai = 'YYYY-MM-DD' (inklusif, None = tanpa batas), status = None untuk semua.
+        halaman mulai dari 0.
+        return rows (list of dict date/status/overtime), jumlah total hasil
+        """
+        daftar, lo, hi = self._rentang(dari, sampai, status)
+        total = hi - lo
+        if terbaru_dulu:
+            akhir = hi - halaman * ukuran
+            potong = reversed(daftar[max(akhir - ukuran, lo):max(akhir, lo)])
+        else:
+            awal = lo + halaman * ukuran
+            potong = daftar[min(awal, hi):min(awal + ukuran, hi)]
+        rows = []
+        for dstr in potong:
+            info = self.absen[dstr]
+            rows.append({"date": dstr, "status": info.status, "overtime": info.overtime})
+        return rows, total
+
+
+def kinerja_bulan(store, ym):  # ym = 'YYYY-MM'
+    """
+    % hadir (hadir + hadir+lembur) atas hari tercatat per karyawan untuk bulan ym,
+    dihitung dari indeks (beberapa bisect per karyawan, tanpa scan semua absen)
+    """
+    dari, sampai = ym + "-01", ym + "-31"
+    rows = []
+    for name in store.db["karyawan"].keys():
+        idx = store.indeks_absen(name)
+        total_days = idx.jumlah(dari, sampai)
+        hadir_days = idx.jumlah(dari, sampai, "hadir") + idx.jumlah(dari, sampai, "hadir+lembur")
+        rows.append({"nama": name.title(), "hadir": hadir_days, "recorded_days": total_days,
+                     "attendance_rate": (hadir_days/total_days*100) if total_days>0 else None})
+    return rows
+
+
+class PapanHarian:
+    """
+    absen semua karyawan untuk satu tanggal (papan absen langsung), diperbarui
+    bertahap dari feed perubahan store: absen satu karyawan hanya membaca ulang
+    karyawan itu, bukan seluruh perusahaan
+    """
+
+    def __init__(self, dstr):
+        self.dstr = dstr
+        self.versi = None
+        self.status = {}   # nama -> HariAbsen (hanya yang sudah absen)
+        self.terbaru = []  # nama yang absen sejak papan dibuat, terbaru di belakang
+
+    def segarkan(self, store):
+        entri = None if self.versi is None else store.perubahan(self.versi)
+        if entri is None or any(e["nama"] is None for e in entri):
+            self.status = {}
+            for nama, info in store.db["karyawan"].items():
+                hari = info.absen.get(self.dstr)
+                if hari is not None:
+                    self.status[nama] = hari
+        else:
+            for nama in dict.fromkeys(e["nama"] for e in entri if e["ym"] in (None, self.dstr[:7])):
+                info = store.db["karyawan"].get(nama)
+                hari = info.absen.get(self.dstr) if info is not None else None
+                if hari is None:
+                    self.status.pop(nama, None)
+                else:
+                    self.status[nama] = hari
+                    if nama in self.terbaru:
+                        self.terbaru.remove(nama)
+                    self.terbaru.append(nama)
+        self.versi = store.versi
+        return self
+
+    def rekap(self, jumlah_karyawan):
+        """jumlah per status + yang belum absen"""
+        hasil = {}
+        for hari in self.status.values():
+            hasil[hari.status] = hasil.get(hari.status, 0) + 1
+        hasil["belum absen"] = jumlah_karyawan - len(self.status)
+        return hasil
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""Mesin aturan gaji bersama untuk keempat varian aplikasi.
+
+Satu set aturan dikompilasi sekali menjadi tabel datar (jam per status,
+status yang boleh lembur, pengali & batas lembur per posisi), lalu semua
+baris (hari absen atau minggu kerja) dihitung sekaligus oleh satu evaluator:
+
+    amount = jumlah * jam[status] * tarif_normal
+           + min(lembur, batas) * tarif_lembur * pengali     (hanya status lembur)
+
+Front-end cukup memilih set aturannya:
+    sistemgaji3.py -> "harian-8jam"     sistemgaji4.py -> "harian-7jam"
+    sistemgaji.py / sistemgaji2.py -> "mingguan-8jam" (jumlah = hari masuk per minggu)
+"""
+import numpy as np
+
+import rekaman
+
+ATURAN = {
+    "harian-8jam": {
+        "jam": {"hadir": 8, "hadir+lembur": 8},  # izin/sakit/cuti = 0 jam
+        "lembur": ["hadir+lembur"],
+    },
+    "harian-7jam": {
+        "jam": {"hadir": 7, "hadir+lembur": 7},
+        "lembur": ["hadir+lembur"],
+    },
+    "mingguan-8jam": {
+        "jam": {"masuk": 8},
+        "lembur": ["masuk"],
+    },
+}
+# opsional per set aturan:
+#   "kali_lembur": {posisi: float}  pengali tarif lembur (default 1)
+#   "batas_lembur": {posisi: int}   batas jam lembur per baris (default tanpa batas)
+
+TANPA_BATAS = np.iinfo(np.int64).max
+BARIS_MASSAL = 128  # di bawah jumlah baris ini loop Python lebih cepat dari evaluator numpy (overhead membangun array)
+
+
+class AturanGaji:
+    """set aturan terkompilasi; status di-intern jadi kode int (0 = status lain, 0 jam)"""
+
+    def __init__(self, nama, definisi):
+        self.nama = nama
+        self.status = [""] + [s for s in definisi["jam"]] + [s for s in definisi["lembur"] if s not in definisi["jam"]]
+        self.kode_status = {s: i for i, s in enumerate(self.status) if s}
+        self.jam = np.array([definisi["jam"].get(s, 0) for s in self.status], dtype=np.int64)
+        self.pakai_lembur = np.array([s in definisi["lembur"] for s in self.status])
+        self._jam = self.jam.tolist()  # versi list untuk hitung_satu
+        self._pakai_lembur = self.pakai_lembur.tolist()
+        self.kali_lembur = dict(definisi.get("kali_lembur", {}))
+        self.batas_lembur = dict(definisi.get("batas_lembur", {}))
+        # tanpa pengali/batas lembur gaji mingguan cukup dari jumlah hari & jam lembur (gaji_mingguan)
+        self.linier = not self.kali_lembur and not self.batas_lembur
+
+    def jam_per(self, status):
+        return int(self.jam[self.kode_status.get(status, 0)])
+
+    def kode(self, status):
+        return self.kode_status.get(status, 0)
+
+    def per_posisi(self, posisi):
+        """return (pengali lembur, batas jam lembur) untuk posisi"""
+        return self.kali_lembur.get(posisi, 1), self.batas_lembur.get(posisi, TANPA_BATAS)
+
+    def hitung(self, kode_status, jumlah, lembur, tarif_normal, tarif_lembur, kali=1, batas=TANPA_BATAS):
+        """
+        evaluator massal; semua argumen array per baris (atau skalar yang di-broadcast).
+        return (jam lembur yang dibayar, amount) sebagai array int64
+        """
+        kode_status = np.asarray(kode_status, dtype=np.int64)
+        lembur = np.asarray(lembur, dtype=np.int64)
+        lembur_dibayar = np.where(self.pakai_lembur[kode_status], np.minimum(lembur, batas), 0)
+        amount = np.asarray(jumlah, dtype=np.int64) * self.jam[kode_status] * np.asarray(tarif_normal, dtype=np.int64)
+        bayar_lembur = lembur_dibayar * np.asarray(tarif_lembur, dtype=np.int64)
+        if np.any(np.asarray(kali) != 1):
+            bayar_lembur = np.rint(bayar_lembur * np.asarray(kali, dtype=np.float64)).astype(np.int64)
+        return lembur_dibayar, amount + bayar_lembur
+
+    def hitung_satu(self, kode_status, jumlah, lembur, tarif_normal, tarif_lembur, kali=1, batas=TANPA_BATAS):
+        """evaluator satu baris tanpa numpy (untuk sedikit baris); hasil sama dengan hitung()"""
+        lembur_dibayar = min(lembur, batas) if self._pakai_lembur[kode_status] else 0
+        bayar_lembur = lembur_dibayar * tarif_lembur
+        if kali != 1:
+            bayar_lembur = round(bayar_lembur * kali)  # round() = np.rint: half-to-even
+        return lembur_dibayar, jumlah * self._jam[kode_status] * tarif_normal + bayar_lembur
+
+
+def argumen_cli(parser):
+    """
+    --aturan wajib untuk CLI yang membaca DB harian: DB sistemgaji3 (8 jam) dan
+    sistemgaji4 (7 jam) berformat sama, jadi set aturan tidak bisa ditebak dari isinya
+    """
+    parser.add_argument("--aturan", choices=sorted(ATURAN), required=True,
+                        help="harian-8jam (DB sistemgaji3.py) atau harian-7jam (DB sistemgaji4.py)")
+
+
+_kompilasi = {}
+
+
+def kompilasi(nama):
+    """AturanGaji untuk set aturan nama (dikompilasi sekali per proses)"""
+    if nama not in _kompilasi:
+        _kompilasi[nama] = AturanGaji(nama, ATURAN[nama])
+    return _kompilasi[nama]
+
+
+def total_per_grup(grup, amount, n_grup):
+    """jumlahkan amount per grup (mis. per karyawan), hasil list of int"""
+    total = np.zeros(n_grup, dtype=np.int64)
+    np.add.at(total, np.asarray(grup, dtype=np.int64), amount)
+    return total.tolist()
+
+
+# ---------------------
+# Penerapan: DB harian (sistemgaji3.py / sistemgaji4.py)
+# ---------------------
+def hitung_bulan(store, aturan, names, ym):  # ym = 'YYYY-MM'
+    """
+    gaji bulan ym untuk banyak karyawan dengan SATU panggilan evaluator.
+    hari diambil dari indeks absensi (terurut tanggal), tarif as-of tanggal absen.
+    return {nama: (total, rekaman.RincianGaji)}
+    """
+    dari, sampai = ym + "-01", ym + "-31"
+    hasil = {}
+    tanggal, status, kode, lembur, rn, ro = [], [], [], [], [], []
+    ada, batas_grup, kali_grup, maks_grup = [], [0], [], []
+    for name in names:
+        if name not in store.db["karyawan"]:
+            hasil[name] = (0, rekaman.RincianGaji())
+            continue
+        pos = store.db["karyawan"][name].posisi
+        idx = store.indeks_absen(name)
+        ada.append(name)
+        tetap = store.tarif.tetap(dari, sampai)  # tarif tidak berubah sebulan: tanpa lookup per hari
+        if tetap:
+            n, o = tetap["normal"].get(pos, 0), tetap["overtime"].get(pos, 0)
+        for dstr in idx.dalam(dari, sampai):
+            info = idx.absen[dstr]
+            if not tetap:
+                n, o = store.tarif.tarif(dstr, pos)
+            tanggal.append(dstr); status.append(info.status); kode.append(aturan.kode_status.get(info.status, 0))
+            lembur.append(info.overtime); rn.append(n); ro.append(o)
+        batas_grup.append(len(tanggal))  # baris karyawan ke-g = [batas_grup[g], batas_grup[g+1])
+        k_lembur, b_lembur = aturan.per_posisi(pos)
+        kali_grup.append(k_lembur); maks_grup.append(b_lembur)
+    if len(tanggal) < BARIS_MASSAL:  # mis. satu karyawan (calc_month_salary): loop Python
+        lembur_dibayar, amount, totals = [], [], []
+        for g in range(len(ada)):
+            for i in range(batas_grup[g], batas_grup[g + 1]):
+                o, a = aturan.hitung_satu(kode[i], 1, lembur[i], rn[i], ro[i], kali_grup[g], maks_grup[g])
+                lembur_dibayar.append(o); amount.append(a)
+            totals.append(sum(amount[batas_grup[g]:]))
+    else:
+        grup = np.repeat(np.arange(len(ada)), np.diff(batas_grup))
+        lembur_dibayar, amount = aturan.hitung(kode, 1, lembur, rn, ro,
+                                               np.asarray(kali_grup, dtype=np.float64)[grup],
+                                               np.asarray(maks_grup, dtype=np.int64)[grup])
+        totals = total_per_grup(grup, amount, len(ada))
+        lembur_dibayar, amount = lembur_dibayar.tolist(), amount.tolist()
+    for g, name in enumerate(ada):
+        a, b = batas_grup[g], batas_grup[g + 1]
+        hasil[name] = (totals[g], rekaman.RincianGaji(tanggal[a:b], status[a:b], lembur_dibayar[a:b], amount[a:b]))
+    return hasil
+
+
+# ---------------------
+# Penerapan: data mingguan (sistemgaji.py / sistemgaji2.py)
+# ---------------------
+def hitung_mingguan(aturan, tabel, posisi_list, weeks_list):
+    """
+    banyak karyawan sekaligus; weeks_list = per karyawan list of {"days", "overtime"}
+    (format weeks sistemgaji2.py, nilai boleh string). tabel = tarif.TabelTarif.
+    return list total gaji per karyawan
+    """
+    if aturan.linier or sum(map(len, weeks_list)) < BARIS_MASSAL:
+        return [gaji_mingguan(aturan, tabel, posisi, weeks) for posisi, weeks in zip(posisi_list, weeks_list)]
+    kp = [tabel.kode_posisi(posisi) for posisi in posisi_list]
+    grup = np.repeat(np.arange(len(kp)), [len(weeks) for weeks in weeks_list])  # baris = minggu, grup = karyawan
+    kali, batas = zip(*[aturan.per_posisi(tabel.posisi[k]) for k in kp])
+    kode_pos = np.asarray(kp, dtype=np.int64)[grup]
+    hari = [int(w.get("days", 0)) for weeks in weeks_list for w in weeks]
+    lembur = [int(w.get("overtime", 0)) for weeks in weeks_list for w in weeks]
+    _, amount = aturan.hitung(aturan.kode("masuk"), hari, lembur,
+                              tabel.tarif_normal[kode_pos], tabel.tarif_lembur[kode_pos],
+                              np.asarray(kali, dtype=np.float64)[grup], np.asarray(batas, dtype=np.int64)[grup])
+    return total_per_grup(grup, amount, len(posisi_list))
+
+
+def gaji_mingguan(aturan, tabel, posisi, weeks):
+    """satu karyawan tanpa numpy: lookup tabel + loop per minggu (hasil sama dengan hitung_mingguan)"""
+    kp = tabel.kode_posisi(posisi)
+    masuk = aturan.kode_status.get("masuk", 0)
+    if not aturan.linier or not aturan._pakai_lembur[masuk]:
+        kali, batas = aturan.per_posisi(tabel.posisi[kp])
+        return sum(aturan.hitung_satu(masuk, int(w.get("days", 0)), int(w.get("overtime", 0)),
+                                      tabel.normal[kp], tabel.lembur[kp], kali, batas)[1] for w in weeks)
+    hari = lembur = 0
+    for w in weeks:
+        hari += int(w.get("days", 0))
+        lembur += int(w.get("overtime", 0))
+    return hari * aturan._jam[masuk] * tabel.normal[kp] + lembur * tabel.lembur[kp]
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""Log audit perubahan yang memengaruhi payroll (append-only).
+
+Satu baris JSON ringkas per perubahan di <db>_audit.log:
+
+    {"t": "2026-09-30T08:01:02", "oleh": "bendahara@email.com", "aksi": "ubah_posisi",
+     "kunci": "karyawan/budi/posisi", "nama": "budi", "lama": "staff", "baru": "spv"}
+    # opsional: "bulan": "YYYY-MM" (perubahan satu bulan), "sejak": "YYYY-MM-DD" (tarif)
+
+Yang dicatat: tambah/ubah/hapus karyawan, pemasukan bulanan, perubahan tarif,
+dan absen yang ditimpa (check-in pertama bukan perubahan, tidak dicatat).
+Penulisan satu write() per panggilan catat() dengan O_APPEND, jadi murah
+saat jam sibuk check-in dan aman dari beberapa proses.
+
+Indeks sekunder (offset byte per karyawan, bulan, pelaku, aksi) dibangun
+sekali per proses lalu hanya diperpanjang dengan baris baru, sehingga query
+seperti "semua perubahan yang memengaruhi payroll 2026-09" cukup membaca
+baris yang cocok. Perubahan tanpa bulan (posisi, hapus karyawan) dan tarif
+dengan tanggal berlaku <= bulan itu ikut terhitung memengaruhi bulan tersebut.
+
+    python audit.py databaseghe1.json [--nama budi] [--bulan 2026-09] [--oleh bendahara@email.com]
+"""
+import argparse
+import json, os
+import threading
+from bisect import bisect_left
+from datetime import datetime
+
+BATAS = 500  # baris per query (terbaru dulu)
+
+
+def path_log(path):
+    return os.path.splitext(path)[0] + "_audit.log"
+
+
+def entri(aksi, kunci, lama=None, baru=None, nama=None, bulan=None, sejak=None):
+    """satu perubahan; field kosong tidak ditulis"""
+    e = {"aksi": aksi, "kunci": kunci, "nama": nama, "bulan": bulan, "sejak": sejak, "lama": lama, "baru": baru}
+    return {k: v for k, v in e.items() if v is not None}
+
+
+def catat(path, oleh, daftar):
+    """
+    tambahkan daftar entri (sekali tulis); entri boleh membawa "oleh" sendiri
+    (menimpa oleh); tidak melakukan apa-apa bila daftar kosong
+    """
+    if not daftar:
+        return
+    t = datetime.now().isoformat(timespec="seconds")
+    data = "".join(json.dumps({"t": t, "oleh": oleh, **e}, separators=(",", ":"), default=_json) + "\n"
+                   for e in daftar).encode()
+    fd = os.open(path_log(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _json(obj):
+    if hasattr(obj, "ke_dict"):  # rekaman.HariAbsen / Karyawan
+        return obj.ke_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# ---------------------
+# Indeks sekunder per file log (per proses, diperpanjang secara bertahap)
+# ---------------------
+class Indeks:
+    def __init__(self, log):
+        self.log = log
+        self.lock = threading.Lock()
+        self.inode = None
+        self._kosongkan()
+
+    def _kosongkan(self):
+        self.posisi = 0     # byte yang sudah diindeks
+        self.semua = []     # offset semua baris, urut tulis
+        self.cakupan = []   # sejajar semua: 'YYYY-MM', '>YYYY-MM' (tarif), '*' (tanpa bulan) atau ''
+        self.nama = {}      # nama -> [offset]
+        self.oleh = {}
+        self.aksi = {}
+        self.bulan = {}     # 'YYYY-MM' -> [offset]
+        self.sejak = []     # (tanggal berlaku, offset): memengaruhi bulan >= tanggal itu
+        self.tanpa_bulan = []  # perubahan karyawan tanpa bulan: memengaruhi semua bulannya
+
+    def segarkan(self):
+        try:
+            st = os.stat(self.log)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self.inode or st.st_size < self.posisi:  # file diganti: bangun ulang
+            self._kosongkan()
+            self.inode = st.st_ino
+        if st.st_size == self.posisi:
+            return
+        with open(self.log, "rb") as f:
+            f.seek(self.posisi)
+            data = f.read(st.st_size - self.posisi)
+        off = self.posisi
+        for baris in data.splitlines(keepends=True):
+            if not baris.endswith(b"\n"):
+                break  # baris yang belum selesai ditulis diindeks lain kali
+            if baris.strip():
+                self._tambah(json.loads(baris), off)
+            off += len(baris)
+        self.posisi = off
+
+    def _tambah(self, e, off):
+        self.semua.append(off)
+        for kunci, tabel in (("nama", self.nama), ("oleh", self.oleh), ("aksi", self.aksi), ("bulan", self.bulan)):
+            if kunci in e:
+                tabel.setdefault(e[kunci], []).append(off)
+        if "sejak" in e:
+            self.sejak.append((e["sejak"], off))
+            self.cakupan.append(">" + e["sejak"][:7])
+        elif "bulan" in e:
+            self.cakupan.append(e["bulan"])
+        elif "nama" in e:
+            self.tanpa_bulan.append(off)
+            self.cakupan.append("*")
+        else:
+            self.cakupan.append("")
+
+    def _kena(self, off, bulan):
+        c = self.cakupan[bisect_left(self.semua, off)]
+        return c == bulan or c == "*" or (c[:1] == ">" and c[1:] <= bulan)
+
+    def cocok(self, nama=None, bulan=None, oleh=None, aksi=None):
+        """offset baris yang cocok dengan semua filter, terbaru dulu"""
+        syarat = [tabel.get(v, []) for v, tabel in ((nama, self.nama), (oleh, self.oleh), (aksi, self.aksi))
+                  if v is not None]
+        if not syarat:
+            if bulan is None:
+                return self.semua[::-1]
+            return sorted(set(self.bulan.get(bulan, ())).union(
+                self.tanpa_bulan, (off for s, off in self.sejak if s[:7] <= bulan)), reverse=True)
+        syarat.sort(key=len)
+        hasil = syarat[0] if len(syarat) == 1 else sorted(set(syarat[0]).intersection(*syarat[1:]))
+        if bulan is not None:
+            # filter bulan dicek per kandidat (lebih murah daripada membangun himpunan bulan)
+            hasil = [off for off in hasil if self._kena(off, bulan)]
+        return hasil[::-1]
+
+
+_indeks = {}  # path log -> Indeks
+_indeks_lock = threading.Lock()
+
+
+def indeks(path):
+    log = path_log(path)
+    with _indeks_lock:
+        idx = _indeks.get(log)
+        if idx is None:
+            idx = _indeks[log] = Indeks(log)
+    with idx.lock:
+        idx.segarkan()
+    return idx
+
+
+def cari(path, nama=None, bulan=None, oleh=None, aksi=None, batas=BATAS):
+    """return (entri terbaru dulu, maksimal batas; jumlah total yang cocok)"""
+    idx = indeks(path)
+    with idx.lock:
+        offset = idx.cocok(nama, bulan, oleh, aksi)
+    hasil = []
+    if offset:
+        with open(idx.log, "rb") as f:
+            for off in offset[:batas]:
+                f.seek(off)
+                hasil.append(json.loads(f.readline()))
+    return hasil, len(offset)
+
+
+def pilihan(path):
+    """nilai yang ada di indeks (untuk filter UI): {"nama", "oleh", "aksi", "bulan"}"""
+    idx = indeks(path)
+    with idx.lock:
+        return {"nama": sorted(idx.nama), "oleh": sorted(idx.oleh), "aksi": sorted(idx.aksi),
+                "bulan": sorted(idx.bulan, reverse=True)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cari log audit perubahan payroll")
+    parser.add_argument("db", help="file database JSON (format sistemgaji3/sistemgaji4)")
+    parser.add_argument("--nama")
+    parser.add_argument("--bulan", help="YYYY-MM: semua perubahan yang memengaruhi payroll bulan itu")
+    parser.add_argument("--oleh")
+    parser.add_argument("--aksi")
+    parser.add_argument("--batas", type=int, default=BATAS)
+    args = parser.parse_args()
+
+    hasil, total = cari(args.db, args.nama, args.bulan, args.oleh, args.aksi, args.batas)
+    for e in hasil:
+        print(json.dumps(e, ensure_ascii=False))
+    print(f"{len(hasil)} dari {total} entri")
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Data grafik siap pakai untuk Dashboard Evaluasi Bulanan.
+
+Grafik tidak lagi dikirim satu baris per karyawan: yang dikirim ke browser
+hanya top-k/bottom-k, histogram % kehadiran dan seri payroll per bulan,
+sehingga jumlah titik dibatasi MAKS_TITIK berapapun jumlah karyawannya.
+Hasilnya di-cache lewat store.memo (kunci = bulan, berlaku per versi data).
+"""
+import altair as alt
+import pandas as pd
+
+import peringkat
+
+MAKS_TITIK = 100  # batas jumlah titik per grafik yang dikirim ke client
+N_BIN = 10        # histogram % kehadiran: 0-10, 10-20, ..., 90-100
+
+
+# ---------------------
+# Agregat kehadiran
+# ---------------------
+def ringkas_kehadiran(perf_rows, k=10):
+    """
+    perf_rows: baris absensi.kinerja_bulan
+    return dict {teratas, terbawah, histogram} (masing-masing list of dict kecil)
+    """
+    k = max(1, min(k, MAKS_TITIK // 2))
+    ada = [r for r in perf_rows if r["attendance_rate"] is not None]
+    teratas = peringkat.teratas(ada, "attendance_rate", k)
+    terbawah = peringkat.teratas(ada, "attendance_rate", k, terbawah=True)
+    hitung = [0] * N_BIN
+    for r in ada:
+        hitung[min(int(r["attendance_rate"] // (100 / N_BIN)), N_BIN - 1)] += 1
+    lebar = 100 // N_BIN
+    histogram = [{"rentang": f"{i*lebar}-{(i+1)*lebar}%", "mulai": i*lebar, "jumlah": n}
+                 for i, n in enumerate(hitung)]
+    pilih = lambda rows: [{"nama": r["nama"], "attendance_rate": r["attendance_rate"]} for r in rows]
+    return {"teratas": pilih(teratas), "terbawah": pilih(terbawah), "histogram": histogram}
+
+
+# ---------------------
+# Seri payroll vs pemasukan
+# ---------------------
+def seri_payroll(bulan, total_payroll, pemasukan):
+    """
+    bulan: list 'YYYY-MM' (dipotong ke MAKS_TITIK bulan terakhir)
+    total_payroll: fungsi ym -> total gaji semua karyawan
+    pemasukan: dict 'YYYY-MM' -> int
+    """
+    return [{"bulan": ym, "payroll": int(total_payroll(ym)), "pemasukan": int(pemasukan.get(ym, 0))}
+            for ym in bulan[-MAKS_TITIK:]]
+
+
+# ---------------------
+# Spesifikasi Altair (dibangun sekali per data)
+# ---------------------
+def grafik_kehadiran(ringkas):
+    df = pd.DataFrame(
+        [dict(r, kelompok="Teratas") for r in ringkas["teratas"]]
+        + [dict(r, kelompok="Terbawah") for r in ringkas["terbawah"]]
+    ).drop_duplicates(subset=["nama"])
+    peringkat = alt.Chart(df).mark_bar().encode(
+        x=alt.X("attendance_rate:Q", title="% Kehadiran"),
+        y=alt.Y("nama:N", sort='-x', title="Karyawan"),
+        color=alt.Color("kelompok:N", title="")
+    )
+    sebaran = alt.Chart(pd.DataFrame(ringkas["histogram"])).mark_bar().encode(
+        x=alt.X("rentang:N", sort=alt.SortField("mulai"), title="% Kehadiran"),
+        y=alt.Y("jumlah:Q", title="Jumlah karyawan")
+    )
+    return peringkat, sebaran
+
+
+def grafik_payroll(seri):
+    df = pd.DataFrame(seri).melt("bulan", var_name="jenis", value_name="jumlah")
+    return alt.Chart(df).mark_line(point=True).encode(
+        x=alt.X("bulan:N", title="Bulan"),
+        y=alt.Y("jumlah:Q", title="Rp"),
+        color=alt.Color("jenis:N", title="")
+    )
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""Metrik jendela bergulir: N hari terakhir per karyawan dan per posisi.
+
+Per karyawan disimpan array hari absen yang tercatat (ordinal, terurut)
+beserta prefix sum hari hadir, jam lembur dan gaji (aturan_gaji, tarif as-of
+tanggal); hari tercatat = selisih posisi. Query jendela apa pun cukup dua
+searchsorted dan P[:, b] - P[:, a] per karyawan, tanpa scan absen. Memori
+sebanding jumlah hari absen yang ada (bukan karyawan x seluruh rentang hari).
+
+Struktur dibangun sekali per store lalu diperbarui dari feed perubahan store:
+check-in / edit karyawan hanya menghitung ulang array karyawan itu; perubahan
+tarif, muat ulang atau feed yang terpotong menghitung ulang semuanya.
+Dipakai panel Bendahara dan tanpa UI:
+
+    python jendela.py databaseghe1.json --aturan harian-8jam --hari 30 [--sampai YYYY-MM-DD] [--per posisi]
+"""
+import argparse
+import json, sys
+import threading
+from datetime import date
+
+import numpy as np
+
+import aturan_gaji, penyimpanan, rekaman
+
+METRIK = ("tercatat", "hadir", "lembur", "gaji")
+HADIR = (rekaman.HADIR, rekaman.HADIR_LEMBUR)
+
+
+def _hitung_semua(entri):
+    # perubahan tanpa nama selain satu bulan (tarif 'sejak', muat ulang, kalender) bisa menyentuh semua karyawan
+    return entri["nama"] is None and (entri["sejak"] is not None or entri["ym"] is None)
+
+
+class MetrikBergulir:
+    def __init__(self, store, aturan):
+        self.aturan = aturan
+        self.asal = store.asal  # store yang dimuat ulang (LRU) punya asal & feed baru
+        self.versi = None
+        self.isi = ([], [], {})  # (names, posisi, {nama: (posisi, hari int32, prefix int64 (3, k+1))})
+        self.lock = threading.Lock()
+        self.segarkan(store)
+
+    @property
+    def names(self):
+        return self.isi[0]
+
+    @property
+    def posisi(self):
+        return self.isi[1]
+
+    def segarkan(self, store):
+        """terapkan perubahan store sejak versi terakhir; hanya karyawan yang berubah yang dihitung ulang"""
+        with self.lock:
+            v = store.versi  # sebelum membaca data: perubahan sesudahnya diterapkan pada segarkan berikutnya
+            entri = None if self.versi is None else store.perubahan(self.versi)
+            if entri is None or any(_hitung_semua(e) for e in entri):
+                per, ubah = {}, list(store.db["karyawan"])
+            else:
+                per, ubah = dict(self.isi[2]), sorted({e["nama"] for e in entri if e["nama"] is not None})
+            if ubah:
+                self._hitung(store, ubah, per)
+                names = [n for n in store.db["karyawan"] if n in per]
+                self.isi = (names, [per[n][0] for n in names], per)  # diganti utuh: query yang berjalan tetap konsisten
+            self.versi = v
+        return self
+
+    def _hitung(self, store, names, per):
+        # semua hari absen names sebagai array datar (seperti aturan_gaji.hitung_bulan), satu panggilan evaluator
+        grup, tanggal, kode, hadir, lembur, rn, ro, kali, batas = [], [], [], [], [], [], [], [], []
+        ada = []
+        for name in names:
+            info_k = store.db["karyawan"].get(name)
+            if info_k is None:  # dihapus
+                per.pop(name, None)
+                continue
+            g, pos = len(ada), info_k.posisi
+            ada.append((name, pos))
+            idx = store.indeks_absen(name)
+            k_lembur, b_lembur = self.aturan.per_posisi(pos)
+            for dstr in idx.tanggal:
+                info = idx.absen[dstr]
+                s = info.status
+                n, o = store.tarif.tarif(dstr, pos)
+                grup.append(g); tanggal.append(date.fromisoformat(dstr).toordinal())
+                kode.append(self.aturan.kode(s)); hadir.append(s in HADIR)
+                lembur.append(info.overtime); rn.append(n); ro.append(o)
+                kali.append(k_lembur); batas.append(b_lembur)
+
+        _, amount = self.aturan.hitung(kode, 1, lembur, rn, ro, kali, batas)
+        nilai = np.vstack([np.array(hadir, dtype=np.int64), np.array(lembur, dtype=np.int64), amount])
+        hari = np.array(tanggal, dtype=np.int32)
+        batas_grup = np.searchsorted(np.array(grup, dtype=np.int64), np.arange(len(ada) + 1))
+        for g, (name, pos) in enumerate(ada):
+            a, b = batas_grup[g], batas_grup[g + 1]
+            prefix = np.zeros((3, b - a + 1), dtype=np.int64)
+            np.cumsum(nilai[:, a:b], axis=1, out=prefix[:, 1:])
+            per[name] = (pos, hari[a:b].copy(), prefix)
+
+    def _jendela(self, hari, sampai):
+        names, posisi, per = self.isi
+        hi = date.fromisoformat(sampai or date.today().isoformat()).toordinal()
+        hasil = np.zeros((len(METRIK), len(names)), dtype=np.int64)
+        for g, name in enumerate(names):
+            _, t, P = per[name]
+            a, b = np.searchsorted(t, (hi - hari, hi), side="right")
+            hasil[0, g] = b - a
+            hasil[1:, g] = P[:, b] - P[:, a]
+        return names, posisi, dict(zip(METRIK, hasil))
+
+    def jendela(self, hari, sampai=None):
+        """jumlah tiap metrik per karyawan (urutan names) untuk hari (sampai-hari, sampai]; return {metrik: array}"""
+        return self._jendela(hari, sampai)[2]
+
+    def per_karyawan(self, hari, sampai=None):
+        names, posisi, jendela = self._jendela(hari, sampai)
+        return [_baris({"nama": name.title(), "posisi": pos}, *(jendela[m][g] for m in METRIK))
+                for g, (name, pos) in enumerate(zip(names, posisi))]
+
+    def per_posisi(self, hari, sampai=None):
+        _, posisi, jendela = self._jendela(hari, sampai)
+        kode = {}
+        grup = np.array([kode.setdefault(p, len(kode)) for p in posisi], dtype=np.int64)
+        total = {m: np.bincount(grup, weights=jendela[m], minlength=len(kode)) for m in METRIK}
+        jumlah = np.bincount(grup, minlength=len(kode))
+        return [_baris({"posisi": pos, "karyawan": int(jumlah[k])}, *(total[m][k] for m in METRIK))
+                for pos, k in kode.items()]
+
+
+def _baris(kunci, tercatat, hadir, lembur, gaji):
+    tercatat, hadir = int(tercatat), int(hadir)
+    return dict(kunci, recorded_days=tercatat, hadir=hadir,
+                attendance_rate=(hadir / tercatat * 100) if tercatat > 0 else None,
+                overtime=int(lembur), payroll=int(gaji))
+
+
+_metrik = {}  # (path DB, nama aturan) -> MetrikBergulir
+_metrik_lock = threading.Lock()
+
+
+def metrik(store, aturan):
+    """MetrikBergulir untuk store, diperbarui secara bertahap dari feed perubahan"""
+    kunci = (store.path, aturan.nama)
+    with _metrik_lock:
+        m = _metrik.get(kunci)
+    if m is not None and m.asal == store.asal:
+        return m.segarkan(store)
+    m = MetrikBergulir(store, aturan)  # dibangun di luar lock supaya DB lain tidak ikut menunggu
+    with _metrik_lock:
+        _metrik[kunci] = m
+    return m
+
+
+# ---------------------
+# Headless: JSON ke stdout
+# ---------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Metrik N hari terakhir per karyawan / posisi (JSON)")
+    parser.add_argument("db", help="file database JSON (format sistemgaji3/sistemgaji4)")
+    parser.add_argument("--hari", type=int, default=30, help="panjang jendela dalam hari")
+    parser.add_argument("--sampai", default=None, help="tanggal akhir jendela YYYY-MM-DD (default hari ini)")
+    parser.add_argument("--per", choices=("karyawan", "posisi"), default="karyawan")
+    aturan_gaji.argumen_cli(parser)
+    args = parser.parse_args()
+
+    m = metrik(penyimpanan.buka(args.db), aturan_gaji.kompilasi(args.aturan))
+    rows = m.per_posisi(args.hari, args.sampai) if args.per == "posisi" else m.per_karyawan(args.hari, args.sampai)
+    json.dump({"hari": args.hari, "sampai": args.sampai or date.today().isoformat(), "per": args.per, "rows": rows},
+              sys.stdout, indent=4)
+    print()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Kalender hari kerja dengan tabel per bulan dalam bentuk bitmap.
+
+Bit ke-(d-1) sebuah int = tanggal d dalam bulan. Per bulan dihitung sekali:
+hari kerja (bukan akhir pekan, bukan libur). Absensi tiap karyawan juga
+dijadikan bitmap (tercatat, hadir), lalu digabung dengan AND/popcount:
+
+    tidak tercatat = hari kerja & ~tercatat
+    % kehadiran    = popcount(hadir & hari kerja) / popcount(hari kerja)
+
+Pengaturan disimpan di db["kalender"] = {"akhir_pekan": [5, 6], "libur": {'YYYY-MM-DD': keterangan}}
+(akhir_pekan memakai date.weekday(): Senin = 0 ... Minggu = 6).
+"""
+from calendar import monthrange
+from functools import lru_cache
+
+import rekaman
+
+AKHIR_PEKAN = (5, 6)  # Sabtu, Minggu
+NAMA_HARI = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"]
+
+
+def pengaturan(db):
+    kal = db.get("kalender", {})
+    return tuple(sorted(kal.get("akhir_pekan", AKHIR_PEKAN))), kal.get("libur", {})
+
+
+@lru_cache(maxsize=512)
+def _tabel_bulan(ym, akhir_pekan, libur_bulan):
+    """return (bitmap hari kerja, jumlah hari dalam bulan)"""
+    hari_pertama, n_hari = monthrange(int(ym[:4]), int(ym[5:7]))
+    mask = 0
+    for d in range(n_hari):
+        if (hari_pertama + d) % 7 not in akhir_pekan and d + 1 not in libur_bulan:
+            mask |= 1 << d
+    return mask, n_hari
+
+
+def hari_kerja(db, ym, sampai=None):
+    """
+    bitmap hari kerja bulan ym ('YYYY-MM'); sampai='YYYY-MM-DD' memotong
+    hari sesudah tanggal itu (untuk bulan berjalan)
+    """
+    akhir_pekan, libur = pengaturan(db)
+    libur_bulan = tuple(sorted(int(d[8:10]) for d in libur if d.startswith(ym)))
+    mask, _ = _tabel_bulan(ym, akhir_pekan, libur_bulan)
+    if sampai is not None and sampai.startswith(ym):
+        mask &= (1 << int(sampai[8:10])) - 1
+    return mask
+
+
+def bitmap_absen(idx, ym):
+    """return (bitmap tercatat, bitmap hadir) dari absensi.IndeksAbsensi untuk bulan ym"""
+    tercatat = hadir = 0
+    for dstr in idx.dalam(ym + "-01", ym + "-31"):
+        bit = 1 << (int(dstr[8:10]) - 1)
+        tercatat |= bit
+        if idx.absen[dstr].status in (rekaman.HADIR, rekaman.HADIR_LEMBUR):
+            hadir |= bit
+    return tercatat, hadir
+
+
+def _tanggal(ym, mask):
+    return [f"{ym}-{d + 1:02d}" for d in range(mask.bit_length()) if mask >> d & 1]
+
+
+def rekap_bulan(store, ym, jam_normal, sampai=None):
+    """
+    gabungkan kalender dengan absensi semua karyawan untuk bulan ym.
+    gaji_harapan = gaji bila hadir di semua hari kerja (tarif as-of tiap hari).
+    return dict {hari_kerja, total_tidak_tercatat, total_harapan, rows}
+    """
+    kerja = hari_kerja(store.db, ym, sampai)
+    n_kerja = kerja.bit_count()
+    tanggal_kerja = _tanggal(ym, kerja)
+    harapan_posisi = {}  # posisi -> gaji hadir penuh, dihitung sekali per posisi
+    rows = []
+    for name, info in store.db["karyawan"].items():
+        pos = info.posisi
+        if pos not in harapan_posisi:
+            harapan_posisi[pos] = sum(jam_normal * store.tarif.tarif(d, pos)[0] for d in tanggal_kerja)
+        tercatat, hadir = bitmap_absen(store.indeks_absen(name), ym)
+        hadir_kerja = (hadir & kerja).bit_count()
+        rows.append({
+            "nama": name.title(),
+            "posisi": pos,
+            "hari_kerja": n_kerja,
+            "hadir": hadir_kerja,
+            "tidak_tercatat": (kerja & ~tercatat).bit_count(),
+            "attendance_rate": (hadir_kerja / n_kerja * 100) if n_kerja > 0 else None,
+            "gaji_harapan": harapan_posisi[pos],
+        })
+    return {
+        "hari_kerja": n_kerja,
+        "total_tidak_tercatat": sum(r["tidak_tercatat"] for r in rows),
+        "total_harapan": sum(r["gaji_harapan"] for r in rows),
+        "rows": rows,
+    }
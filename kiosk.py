@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""API HTTP JSON lokal untuk kiosk absensi (tanpa widget Streamlit).
+
+Memakai penyimpanan, aturan gaji dan agregat dashboard yang sama dengan
+sistemgaji3.py, jadi absen dari kiosk langsung terlihat di app (lewat log
+sinkron, lihat sinkron.py) dan sebaliknya.
+
+    POST /absen                            satu record atau list record:
+         {"nama", "status", "overtime"?, "tanggal"?}; tanggal = tanggal server hari ini,
+         selain itu ditolak (--tanggal-lampau: koreksi admin untuk tanggal lampau)
+    GET  /gaji/<nama>/<YYYY-MM>            total + rincian (seperti calc_month_salary)
+    GET  /dashboard/<bagian>/<YYYY-MM>     gaji | kinerja | lembur | kalender
+    GET  /dashboard/seri_payroll/<YYYY>
+    GET  /status
+    ?perusahaan=<kode> memilih DB perusahaan (mode banyak perusahaan, lihat perusahaan.py)
+    header X-Kiosk: <id> dipakai sebagai pelaku di log audit (lihat audit.py)
+
+Server asyncio satu thread dengan keep-alive HTTP/1.1; perhitungan dan
+penulisan berjalan di pool thread terbatas. Absen tidak ditulis per request:
+semua record yang menunggu untuk satu file DB digabung (group commit, maks
+MAKS_BATCH) menjadi satu store.ubah(..., names=...) per bulan, sehingga ratusan check-in
+per detik cukup beberapa kali tulis file. Respons POST dikirim setelah
+record benar-benar tersimpan.
+
+    python kiosk.py databaseghe1.json --aturan harian-8jam [--host 127.0.0.1] [--port 8765] [--token RAHASIA] [--tanggal-lampau]
+"""
+import argparse
+import asyncio
+import json, os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import audit, aturan_gaji, pemanasan, penyimpanan, perusahaan, rekaman, tutup_buku
+
+PORT = 8765
+PEKERJA_SIMPAN = 2   # thread penulis (satu komit berjalan per file DB)
+PEKERJA_BACA = 4     # thread hitung gaji / agregat
+ANTRIAN = 10000      # record absen yang boleh menunggu per file DB (lebih dari itu: request ditahan)
+MAKS_BATCH = 5000    # record per komit (juga batas record per request)
+MAKS_BODY = 4 * 2**20
+IDLE_DETIK = 30      # koneksi keep-alive ditutup setelah sekian detik tanpa request
+MAKS_LEMBUR = 12     # sama dengan batas input "Absen Hari Ini"
+
+ALASAN = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+          405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class Galat(Exception):
+    def __init__(self, kode, pesan):
+        super().__init__(pesan)
+        self.kode = kode
+
+
+# ---------------------
+# Absen: validasi + group commit
+# ---------------------
+def periksa_absen(r, tanggal_lampau=False):
+    """
+    record request -> (nama, tanggal, HariAbsen); ValueError bila tidak valid (cek yang tidak butuh DB).
+    tanggal selalu hari ini (tanggal server); tanggal_lampau (opsi admin) mengizinkan tanggal sebelumnya
+    """
+    if not isinstance(r, dict):
+        raise ValueError("record harus objek JSON")
+    nama = str(r.get("nama", "")).strip().lower()
+    if not nama:
+        raise ValueError("nama kosong")
+    hari_ini = date.today()
+    dstr = str(r.get("tanggal") or hari_ini.strftime("%Y-%m-%d"))
+    try:
+        tanggal = date.fromisoformat(dstr)
+    except ValueError:
+        raise ValueError(f"tanggal tidak valid: {dstr!r}")
+    if tanggal > hari_ini:
+        raise ValueError(f"tanggal {dstr} belum terjadi (hari ini {hari_ini.isoformat()})")
+    if tanggal < hari_ini and not tanggal_lampau:
+        raise ValueError(f"kiosk hanya mencatat absen hari ini ({hari_ini.isoformat()}), bukan {dstr}")
+    status = r.get("status")
+    if status not in rekaman.STATUS:
+        raise ValueError(f"status harus salah satu dari {', '.join(rekaman.STATUS)}")
+    try:
+        overtime = int(r.get("overtime") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("overtime harus bilangan bulat")
+    if status == rekaman.HADIR_LEMBUR and not 1 <= overtime <= MAKS_LEMBUR:
+        raise ValueError(f"overtime hadir+lembur harus 1–{MAKS_LEMBUR} jam")
+    if status != rekaman.HADIR_LEMBUR and overtime:
+        raise ValueError("overtime hanya untuk status hadir+lembur")
+    return nama, dstr, rekaman.HariAbsen(status, overtime)
+
+
+def komit(path, daftar):
+    """
+    tulis semua record absen (list (pelaku, records) per request) dengan satu
+    store.ubah per bulan dan satu tulis log audit untuk absen yang ditimpa;
+    return (versi, list error per request: {indeks: pesan})
+    """
+    store = penyimpanan.buka(path)
+    error = [{} for _ in daftar]
+    per_bulan, diubah = {}, []
+    for e, (oleh, records) in zip(error, daftar):
+        for i, (nama, dstr, hari) in records:
+            per_bulan.setdefault(dstr[:7], []).append((e, i, oleh, nama, dstr, hari))
+
+    def terapkan(db, ym, isi):
+        ada = False
+        for e, i, oleh, nama, dstr, hari in isi:
+            if nama not in db["karyawan"]:
+                e[i] = f"karyawan {nama!r} tidak terdaftar"
+            elif tutup_buku.tertutup(db, ym):
+                e[i] = f"bulan {ym} sudah ditutup"
+            else:
+                lama = db["karyawan"][nama].absen.get(dstr)
+                if lama is not None and lama != hari:
+                    diubah.append(dict(audit.entri("ubah_absen", f"karyawan/{nama}/absen/{dstr}", lama, hari,
+                                                   nama=nama, bulan=ym), oleh=oleh))
+                store.catat_absen(nama, dstr, hari)
+                ada = True
+        return ada
+
+    for ym, isi in sorted(per_bulan.items()):
+        # pengecekan terdaftar / tertutup di dalam ubah(): terhadap data terbaru semua worker
+        store.ubah(lambda db, ym=ym, isi=isi: terapkan(db, ym, isi),
+                   names=sorted({r[3] for r in isi}), ym=ym)
+    audit.catat(path, "kiosk", diubah)
+    return store.versi, error
+
+
+class Antrian:
+    """record absen yang menunggu komit untuk satu file DB, dengan satu task penulis"""
+
+    def __init__(self, path, pool):
+        self.path = path
+        self.pool = pool
+        self.tunggu = deque()  # (pelaku, records, future)
+        self.menunggu = 0      # record di antrian + yang sedang ditulis
+        self.komit = 0
+        self.ruang = asyncio.Condition()
+        self.ada = asyncio.Event()
+        self.task = asyncio.get_running_loop().create_task(self._penulis())
+
+    async def kirim(self, oleh, records):
+        """return (versi, {indeks: error}) setelah records tersimpan"""
+        async with self.ruang:  # seluruh request masuk sekaligus (tidak ada reservasi sebagian)
+            await self.ruang.wait_for(lambda: self.menunggu + len(records) <= ANTRIAN)
+            self.menunggu += len(records)
+        fut = asyncio.get_running_loop().create_future()
+        self.tunggu.append((oleh, records, fut))
+        self.ada.set()
+        return await fut
+
+    async def _penulis(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.ada.wait()
+            batch, n = [], 0
+            while self.tunggu and (not batch or n + len(self.tunggu[0][1]) <= MAKS_BATCH):
+                batch.append(self.tunggu.popleft())
+                n += len(batch[-1][1])
+            if not self.tunggu:
+                self.ada.clear()
+            try:
+                versi, error = await loop.run_in_executor(self.pool, komit, self.path, [(o, r) for o, r, _ in batch])
+                self.komit += 1
+                for (_, _, fut), e in zip(batch, error):
+                    fut.set_result((versi, e))
+            except Exception as e:
+                for _, _, fut in batch:
+                    fut.set_exception(e)
+            async with self.ruang:
+                self.menunggu -= n
+                self.ruang.notify_all()
+
+
+# ---------------------
+# Aplikasi (routing)
+# ---------------------
+class Kiosk:
+    def __init__(self, db_file, aturan, token=None, tanggal_lampau=False):
+        self.db_file = db_file
+        self.aturan = aturan
+        self.token = token
+        self.tanggal_lampau = tanggal_lampau
+        self.pool_simpan = ThreadPoolExecutor(PEKERJA_SIMPAN, thread_name_prefix="kiosk-simpan")
+        self.pool_baca = ThreadPoolExecutor(PEKERJA_BACA, thread_name_prefix="kiosk-baca")
+        self.antrian = {}  # path DB -> Antrian
+        self.jumlah = {"request": 0, "absen": 0}
+
+    def _path(self, query):
+        kode = query.get("perusahaan", [None])[0]
+        if kode is None:
+            return self.db_file
+        try:
+            path = perusahaan.path_db(kode, os.path.basename(self.db_file))
+        except ValueError as e:
+            raise Galat(400, str(e))
+        if not os.path.exists(path):
+            raise Galat(404, f"perusahaan {kode!r} tidak ditemukan")
+        return path
+
+    async def _baca(self, fungsi, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool_baca, fungsi, *args)
+
+    async def tangani(self, metode, target, header, body):
+        self.jumlah["request"] += 1
+        if self.token and header.get("authorization") != f"Bearer {self.token}":
+            raise Galat(401, "token tidak valid")
+        url = urlsplit(target)
+        bagian = [unquote(b) for b in url.path.strip("/").split("/") if b]
+        path = self._path(parse_qs(url.query))
+
+        if bagian == ["absen"]:
+            if metode != "POST":
+                raise Galat(405, "pakai POST")
+            return await self.absen(path, body, "kiosk:" + header.get("x-kiosk", "-"))
+        if metode != "GET":
+            raise Galat(405, "pakai GET")
+        if len(bagian) == 3 and bagian[0] == "gaji":
+            return await self._baca(self.gaji, path, bagian[1].strip().lower(), _bulan(bagian[2]))
+        if len(bagian) == 3 and bagian[0] == "dashboard":
+            return await self._baca(self.dashboard, path, bagian[1], bagian[2])
+        if bagian == ["status"]:
+            return await self._baca(self.status, path)
+        raise Galat(404, f"tidak ada endpoint {url.path}")
+
+    async def absen(self, path, body, oleh):
+        try:
+            data = json.loads(body or b"null")
+        except ValueError:
+            raise Galat(400, "body bukan JSON")
+        tunggal = isinstance(data, dict)
+        if isinstance(data, list) and len(data) > MAKS_BATCH:
+            raise Galat(413, f"maksimal {MAKS_BATCH} record per request")
+        records, ditolak = [], {}
+        for i, r in enumerate([data] if tunggal else data if isinstance(data, list) else []):
+            try:
+                records.append((i, periksa_absen(r, self.tanggal_lampau)))
+            except ValueError as e:
+                ditolak[i] = str(e)
+        if not records and not ditolak:
+            raise Galat(400, "kirim satu record absen atau list record")
+        versi, error = None, {}
+        if records:
+            if path not in self.antrian:
+                self.antrian[path] = Antrian(path, self.pool_simpan)
+            versi, error = await self.antrian[path].kirim(oleh, records)
+        ditolak.update(error)
+        diterima = len(records) - len(error)
+        self.jumlah["absen"] += diterima
+        ditolak = [{"indeks": i, "error": e} for i, e in sorted(ditolak.items())]
+        if tunggal and ditolak:
+            raise Galat(400, ditolak[0]["error"])
+        return {"diterima": diterima, "ditolak": ditolak, "versi": versi}
+
+    def gaji(self, path, nama, ym):
+        store = penyimpanan.buka(path)
+        if nama not in store.db["karyawan"]:
+            raise Galat(404, f"karyawan {nama!r} tidak terdaftar")
+        total, rows = pemanasan.gaji_banyak(store, self.aturan, [nama], ym)[nama]
+        return {"nama": nama, "bulan": ym, "posisi": store.db["karyawan"][nama].posisi, "total": total,
+                "rincian": rows.ke_dicts()}
+
+    def dashboard(self, path, bagian, periode):
+        store = penyimpanan.buka(path)
+        if bagian == "seri_payroll":
+            if not (len(periode) == 4 and periode.isdigit()):
+                raise Galat(400, "periode seri_payroll = YYYY")
+            return {"bagian": bagian, "tahun": periode, "data": pemanasan.seri_payroll(store, self.aturan, periode)}
+        hitung = {"gaji": pemanasan.gaji, "kinerja": pemanasan.kinerja, "lembur": pemanasan.lembur,
+                  "kalender": pemanasan.rekap_kalender}.get(bagian)
+        if hitung is None:
+            raise Galat(404, f"bagian dashboard tidak dikenal: {bagian!r}")
+        ym = _bulan(periode)
+        return {"bagian": bagian, "bulan": ym, "data": hitung(store, self.aturan, ym)}
+
+    def status(self, path):
+        store = penyimpanan.buka(path)
+        antrian = self.antrian.get(path)
+        return dict(self.jumlah, versi=store.versi, karyawan=len(store.db["karyawan"]),
+                    menunggu=antrian.menunggu if antrian else 0, komit=antrian.komit if antrian else 0)
+
+
+def _bulan(s):
+    if not (len(s) == 7 and s[4] == "-" and s[:4].isdigit() and s[5:].isdigit() and 1 <= int(s[5:]) <= 12):
+        raise Galat(400, f"bulan harus YYYY-MM: {s!r}")
+    return s
+
+
+# ---------------------
+# HTTP/1.1 minimal (keep-alive, body dengan Content-Length)
+# ---------------------
+async def layani(app, reader, writer):
+    try:
+        while True:
+            try:
+                baris = await asyncio.wait_for(reader.readline(), IDLE_DETIK)
+            except asyncio.TimeoutError:
+                break
+            if not baris.strip():
+                break
+            metode, target, versi = baris.decode("latin-1").split()
+            header = {}
+            while (h := await reader.readline()).strip():
+                k, _, v = h.decode("latin-1").partition(":")
+                header[k.strip().lower()] = v.strip()
+            sambung = header.get("connection", "").lower()
+            tetap = sambung != "close" if versi == "HTTP/1.1" else sambung == "keep-alive"
+            body = None
+            try:
+                try:
+                    panjang = int(header.get("content-length", 0))
+                except ValueError:
+                    panjang = -1
+                if panjang < 0:
+                    raise Galat(400, "Content-Length tidak valid")
+                if panjang > MAKS_BODY:
+                    raise Galat(413, f"body lebih dari {MAKS_BODY} byte")
+                body = await reader.readexactly(panjang) if panjang else b""
+                kode, data = 200, await app.tangani(metode, target, header, body)
+            except Galat as e:
+                kode, data = e.kode, {"error": str(e)}
+            except Exception as e:
+                kode, data = 500, {"error": str(e)}
+            if body is None:
+                tetap = False  # body tidak dibaca; sisa koneksi tidak bisa dipakai
+            isi = json.dumps(data, default=rekaman.ke_json).encode()
+            writer.write(f"HTTP/1.1 {kode} {ALASAN[kode]}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(isi)}\r\nConnection: {'keep-alive' if tetap else 'close'}\r\n\r\n"
+                         .encode() + isi)
+            await writer.drain()
+            if not tetap:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass  # klien putus / request rusak: tutup koneksi
+    finally:
+        writer.close()
+
+
+async def jalankan(app, host="127.0.0.1", port=PORT):
+    server = await asyncio.start_server(lambda r, w: layani(app, r, w), host, port)
+    print(f"Kiosk API di http://{host}:{port} untuk {app.db_file}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API HTTP JSON lokal untuk kiosk absensi")
+    parser.add_argument("db", nargs="?", default="databaseghe1.json",
+                        help="file DB (format sistemgaji3; dengan ?perusahaan= dipakai sebagai nama file per perusahaan)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--token", default=os.environ.get("KIOSK_TOKEN"), help="wajibkan header Authorization: Bearer <token>")
+    parser.add_argument("--tanggal-lampau", action="store_true",
+                        help="izinkan record bertanggal lampau (koreksi admin; bulan tertutup tetap ditolak)")
+    aturan_gaji.argumen_cli(parser)
+    args = parser.parse_args()
+
+    penyimpanan.buka(args.db)  # muat sebelum menerima request
+    asyncio.run(jalankan(Kiosk(args.db, aturan_gaji.kompilasi(args.aturan), args.token, args.tanggal_lampau), args.host, args.port))
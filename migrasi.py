@@ -0,0 +1,497 @@
+# -*- coding: utf-8 -*-
+"""Migrasi bertahap (streaming) dari layout DB lama ke DB harian.
+
+Dua layout yang ada di repo:
+
+    datar  (databaseghe1.json, sistemgaji.py / sistemgaji2.py)
+        {nama: {"posisi", "gaji", "weeks": [{"days", "overtime"}, ...]}}   # weeks hanya sistemgaji2
+    harian (databaseghe3.json, sistemgaji3.py / sistemgaji4.py)
+        {"karyawan": {nama: {"password", "posisi", "absen": {tanggal: {...}}}}, "pemasukan", "rates", ...}
+
+File sumber tidak pernah dimuat utuh: anggota objek dibaca satu per satu dari
+buffer byte (_Pembaca), karyawan diproses per POTONGAN, gaji dihitung ulang
+sekaligus per potongan dengan evaluator aturan_gaji, dan hasilnya langsung
+ditulis ke file tujuan. Memori sebanding dengan satu potongan, bukan ukuran file.
+
+- datar -> harian: minggu ke-w (0..3) menjadi hari "hadir" mulai tanggal 7w+1
+  pada --bulan; lembur minggu itu dicatat di hari masuk terakhirnya
+  ("hadir+lembur"). Tarif diambil dari --tarif (format db["rates"]) dan
+  ditulis sebagai rates DB tujuan, sehingga gaji harian hasil migrasi sama
+  dengan gaji mingguan yang dihitung ulang. Karyawan datar tidak punya
+  password: password awal acak ditulis ke <tujuan>_password_awal.csv.
+- harian -> harian: salin per karyawan (normalisasi record + hitung ulang
+  total gaji untuk verifikasi), misalnya untuk memadatkan file atau
+  memindahkan ke backend lain (TUJUAN).
+
+Melanjutkan: setelah setiap potongan, posisi byte sumber dan tujuan serta
+total berjalan dicatat di <tujuan>.progres.json; run berikutnya dengan
+sumber dan opsi yang sama memotong file sementara ke posisi itu dan lanjut.
+Verifikasi: file tujuan dibaca ulang secara streaming dan jumlah karyawan,
+hari absen, jam lembur serta total gaji dibandingkan dengan total saat menulis.
+
+    python migrasi.py databaseghe1.json databaseghe3_migrasi.json [--bulan 2025-10] [--tarif tarif_sistemgaji2.json]
+    python migrasi.py databaseghe1.json --deteksi
+"""
+import argparse
+import csv
+import json, os, re
+import secrets
+import textwrap
+from calendar import monthrange
+from datetime import date, datetime
+
+import numpy as np
+
+import aturan_gaji, penyimpanan, rekaman, tarif
+
+POTONGAN = 1000  # karyawan per potongan (hitung gaji + checkpoint)
+CONTOH = 20      # nama contoh yang dicatat untuk karyawan yang tidak setara
+KUNCI_HARIAN = {"karyawan", "pemasukan", "rates", "rates_history", "kalender", "libur",
+                "bulan_tutup", "bulan_dibuka", "riwayat_tutup_buku"}
+
+
+# ---------------------
+# Pembaca JSON bertahap (posisi byte bisa disimpan untuk melanjutkan)
+# ---------------------
+_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"', re.S)
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]]|"', re.S)  # string utuh, kurung, atau '"' tanpa penutup
+_SPASI = re.compile(rb"\s*")
+_SKALAR = re.compile(rb"[^,}\]\s]+")
+
+
+class _Pembaca:
+    BLOK = 1 << 20
+
+    def __init__(self, f, posisi=0):
+        f.seek(posisi)
+        self.f = f
+        self.buf = b""
+        self.i = 0
+        self.awal = posisi  # offset byte buf[0] di file
+        self.habis = False
+
+    @property
+    def posisi(self):
+        return self.awal + self.i
+
+    def _isi(self):
+        # buang bagian yang sudah dibaca; ukuran baca ikut membesar untuk nilai panjang
+        data = self.f.read(max(self.BLOK, len(self.buf) - self.i))
+        if not data:
+            self.habis = True
+            return False
+        self.awal += self.i
+        self.buf = self.buf[self.i:] + data
+        self.i = 0
+        return True
+
+    def lihat(self):
+        """karakter berikut selain spasi (tanpa maju); b"" di akhir file"""
+        while True:
+            self.i = _SPASI.match(self.buf, self.i).end()
+            if self.i < len(self.buf):
+                return self.buf[self.i:self.i + 1]
+            if not self._isi():
+                return b""
+
+    def ambil(self, c):
+        if self.lihat() != c:
+            raise ValueError(f"JSON tidak valid di byte {self.posisi}: diharapkan {c.decode()!r}")
+        self.i += 1
+
+    def _akhir_nilai(self, j):
+        """indeks akhir nilai yang mulai di buf[j]; None bila buffer belum memuat nilai utuh"""
+        c = self.buf[j:j + 1]
+        if c == b'"':
+            m = _STRING.match(self.buf, j)
+            return m.end() if m else None
+        if c in (b"{", b"["):
+            dalam = 0
+            for m in _TOKEN.finditer(self.buf, j):
+                b = self.buf[m.start()]
+                if b == 0x22:  # '"'
+                    if m.end() - m.start() == 1:
+                        return None  # string terpotong di akhir buffer
+                    continue
+                dalam += 1 if b in (0x7B, 0x5B) else -1
+                if dalam == 0:
+                    return m.end()
+            return None
+        m = _SKALAR.match(self.buf, j)
+        return m.end() if m and (m.end() < len(self.buf) or self.habis) else None
+
+    def nilai(self, muat=True):
+        """baca satu nilai JSON utuh (nilai kecil: satu karyawan, rates, ...); muat=False hanya melompatinya"""
+        self.lihat()
+        while True:
+            j = self._akhir_nilai(self.i)
+            if j is not None:
+                hasil = json.loads(self.buf[self.i:j]) if muat else None
+                self.i = j
+                return hasil
+            if not self._isi():
+                raise ValueError(f"JSON terpotong di byte {self.posisi}")
+
+    def anggota(self, lanjut=False):
+        """
+        kunci anggota objek satu per satu. Mulai di '{' (lanjut=False) atau tepat
+        sesudah nilai anggota sebelumnya (lanjut=True, melanjutkan dari posisi
+        tersimpan). Pemanggil wajib membaca nilai tiap kunci sebelum kunci berikutnya.
+        """
+        if not lanjut:
+            self.ambil(b"{")
+            if self.lihat() == b"}":
+                self.i += 1
+                return
+        while True:
+            if lanjut:
+                c = self.lihat()
+                self.i += 1
+                if c == b"}":
+                    return
+                if c != b",":
+                    raise ValueError(f"JSON tidak valid di byte {self.posisi - 1}: diharapkan ',' atau '}}'")
+            lanjut = True
+            kunci = self.nilai()
+            self.ambil(b":")
+            yield kunci
+
+    def lewati(self):
+        """lewati satu nilai tanpa memuatnya utuh (objek dilewati per anggota)"""
+        if self.lihat() == b"{":
+            for _ in self.anggota():
+                self.nilai(muat=False)
+        else:
+            self.nilai(muat=False)
+
+
+def deteksi(path):
+    """'datar', 'harian' atau 'kosong' dari kunci pertama objek teratas"""
+    with open(path, "rb") as f:
+        for kunci in _Pembaca(f).anggota():
+            return "harian" if kunci in KUNCI_HARIAN else "datar"
+    return "kosong"
+
+
+def _ringkas(path):
+    """
+    lintasan pertama DB harian: bagian kecil (semua selain karyawan) dan posisi
+    byte awal objek karyawan; karyawan dilewati tanpa dimuat
+    """
+    kecil, awal = {}, None
+    with open(path, "rb") as f:
+        baca = _Pembaca(f)
+        for kunci in baca.anggota():
+            if kunci == "karyawan":
+                baca.lihat()
+                awal = baca.posisi
+                baca.lewati()
+            else:
+                kecil[kunci] = baca.nilai()
+    return kecil, awal
+
+
+# ---------------------
+# Konversi + hitung gaji per potongan
+# ---------------------
+def _hari_dari_minggu(weeks, ym):
+    """absen harian dari data mingguan; return (absen, setara) - setara False bila ada yang tidak terwakili"""
+    n_hari = monthrange(int(ym[:4]), int(ym[5:7]))[1]
+    absen, setara = {}, True
+    for w, minggu in enumerate(weeks):
+        days, overtime = int(minggu.get("days", 0)), int(minggu.get("overtime", 0))
+        awal = 7 * w + 1
+        if days > 7 or awal + days - 1 > n_hari or (overtime and not days):
+            setara = False
+        days = max(0, min(days, 7, n_hari - awal + 1))
+        for d in range(awal, awal + days):
+            absen[f"{ym}-{d:02d}"] = {"status": rekaman.HADIR, "overtime": 0}
+        if days and overtime:
+            absen[f"{ym}-{awal + days - 1:02d}"] = {"status": rekaman.HADIR_LEMBUR, "overtime": overtime}
+    return absen, setara
+
+
+def _gaji_harian(aturan, riwayat, potongan):
+    """total gaji (semua hari absen) per karyawan, satu panggilan evaluator untuk seluruh potongan"""
+    grup, kode, lembur, rn, ro, kali, batas = [], [], [], [], [], [], []
+    tetap = riwayat.tetap(tarif.AWAL, "9999-12-31")  # satu tabel tarif untuk semua tanggal: tanpa lookup per hari
+    for g, (_, info) in enumerate(potongan):
+        pos = info.get("posisi", "")
+        k_lembur, b_lembur = aturan.per_posisi(pos)
+        if tetap:
+            n, o = tetap["normal"].get(pos, 0), tetap["overtime"].get(pos, 0)
+        for dstr, hari in info.get("absen", {}).items():
+            if not tetap:
+                n, o = riwayat.tarif(dstr, pos)
+            grup.append(g); kode.append(aturan.kode_status.get(hari.get("status", ""), 0))
+            lembur.append(int(hari.get("overtime", 0)))
+            rn.append(n); ro.append(o); kali.append(k_lembur); batas.append(b_lembur)
+    if not grup:
+        return [0] * len(potongan)
+    _, amount = aturan.hitung(kode, 1, lembur, rn, ro, np.asarray(kali, dtype=np.float64), np.asarray(batas, dtype=np.int64))
+    return aturan_gaji.total_per_grup(grup, amount, len(potongan))
+
+
+def _ubah_datar(potongan, opsi, tabel, aturan, riwayat, jumlah, password_csv):
+    """potongan [(nama, record datar)] -> [(nama, record harian)]; total berjalan di jumlah"""
+    mingguan = aturan_gaji.kompilasi("mingguan-8jam")
+    ada_minggu = [(n, r) for n, r in potongan if r.get("weeks")]
+    gaji_minggu = dict(zip([n for n, _ in ada_minggu], aturan_gaji.hitung_mingguan(
+        mingguan, tabel, [r.get("posisi", "") for _, r in ada_minggu],
+        [r["weeks"] for _, r in ada_minggu])))
+    hasil, setara = [], []
+    for nama, r in potongan:
+        absen, ok = _hari_dari_minggu(r.get("weeks", []), opsi["bulan"])
+        password = secrets.token_urlsafe(6)
+        password_csv.writerow([nama.strip().lower(), password])
+        hasil.append((nama.strip().lower(), {"password": password, "posisi": str(r.get("posisi", "")).strip().lower(),
+                                             "absen": absen}))
+        setara.append(ok)
+        if nama in gaji_minggu:
+            jumlah["gaji_mingguan"] += gaji_minggu[nama]
+            if gaji_minggu[nama] != r.get("gaji"):
+                jumlah["gaji_lama_berbeda"] += 1
+        else:
+            jumlah["tanpa_minggu"] += 1
+            jumlah["gaji_lama_tanpa_rincian"] += int(r.get("gaji", 0) or 0)
+    for (nama, _), ok, g in zip(potongan, setara, _gaji_harian(aturan, riwayat, hasil)):
+        if not ok or g != gaji_minggu.get(nama, 0):
+            jumlah["tidak_setara"] += 1
+            if len(jumlah["contoh_tidak_setara"]) < CONTOH:
+                jumlah["contoh_tidak_setara"].append(nama)
+    return hasil
+
+
+def _ubah_harian(potongan):
+    hasil = []
+    for nama, r in potongan:
+        k = rekaman.Karyawan.dari_dict(r, nama)  # normalisasi: status di-intern, overtime int, field hilang diisi
+        hasil.append((nama, {"password": k.password, "posisi": k.posisi,
+                             "absen": {d: h.ke_dict() for d, h in k.absen.items()}}))
+    return hasil
+
+
+def _tambah_total(jumlah, potongan, gaji):
+    jumlah["karyawan"] += len(potongan)
+    for (_, r), g in zip(potongan, gaji):
+        jumlah["hari"] += len(r["absen"])
+        jumlah["lembur"] += sum(h["overtime"] for h in r["absen"].values())
+        jumlah["gaji"] += g
+
+
+# ---------------------
+# Tujuan (backend penyimpanan hasil migrasi)
+# ---------------------
+class TujuanJSON:
+    """
+    file JSON format sistemgaji3/sistemgaji4 (indent 4, seperti penyimpanan.simpan).
+    bagian kecil ditulis lebih dulu, karyawan terakhir, agar pembacaan ulang
+    streaming sudah tahu tarif sebelum karyawan pertama.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.f = None
+        self.ada_karyawan = False
+
+    def buka(self, kecil, lanjut=None):
+        """mulai baru (lanjut=None) atau lanjutkan dari posisi() tersimpan"""
+        if lanjut is None:
+            self.f = open(self.tmp, "w", encoding="utf-8")
+            self.f.write("{\n")
+            for kunci, nilai in kecil.items():
+                self.f.write(f"    {json.dumps(kunci)}: {textwrap.indent(json.dumps(nilai, indent=4), '    ')[4:]},\n")
+            self.f.write('    "karyawan": {')
+        else:
+            self.f = open(self.tmp, "r+", encoding="utf-8")
+            self.f.truncate(lanjut["byte"])
+            self.f.seek(lanjut["byte"])
+            self.ada_karyawan = lanjut["ada_karyawan"]
+
+    def tulis(self, potongan):
+        for nama, r in potongan:
+            teks = textwrap.indent(json.dumps(r, indent=4), " " * 8)[8:]
+            self.f.write(f"{',' if self.ada_karyawan else ''}\n        {json.dumps(nama)}: {teks}")
+            self.ada_karyawan = True
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def posisi(self):
+        return {"byte": self.f.tell(), "ada_karyawan": self.ada_karyawan}
+
+    def tutup(self):
+        self.f.write("\n    }\n}\n" if self.ada_karyawan else "}\n}\n")
+        self.f.close()
+        os.replace(self.tmp, self.path)
+
+    @staticmethod
+    def baca(path):
+        """(bagian kecil, iterator (nama, record harian)) dari file tujuan, streaming"""
+        kecil, awal = _ringkas(path)
+
+        def karyawan():
+            if awal is None:
+                return
+            with open(path, "rb") as f:
+                baca = _Pembaca(f, awal)
+                for nama in baca.anggota():
+                    yield nama, baca.nilai()
+        return kecil, karyawan()
+
+
+TUJUAN = {"json": TujuanJSON}
+
+
+# ---------------------
+# Migrasi
+# ---------------------
+def _riwayat(kecil):
+    db = {"rates": kecil["rates"], "rates_history": kecil.get("rates_history")}
+    return tarif.RiwayatTarif(tarif.pastikan_riwayat(db))
+
+
+def _potong(iterator, ukuran):
+    potongan = []
+    for item in iterator:
+        potongan.append(item)
+        if len(potongan) == ukuran:
+            yield potongan
+            potongan = []
+    if potongan:
+        yield potongan
+
+
+def _jumlah_awal():
+    return {"karyawan": 0, "hari": 0, "lembur": 0, "gaji": 0, "gaji_mingguan": 0, "gaji_lama_berbeda": 0,
+            "tanpa_minggu": 0, "gaji_lama_tanpa_rincian": 0, "tidak_setara": 0, "contoh_tidak_setara": []}
+
+
+def _simpan_json(path, data):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+def migrasi(sumber, tujuan, bulan=None, path_tarif=None, aturan="harian-8jam", backend="json",
+            ukuran=POTONGAN, progres=None):
+    """
+    migrasikan sumber ke tujuan (layout harian); lanjutkan run sebelumnya bila ada.
+    progres(karyawan diproses, posisi byte sumber, ukuran sumber) dipanggil per potongan.
+    return laporan {layout, jumlah, verifikasi, dilanjutkan, detik}
+    """
+    t0 = datetime.now()
+    if os.path.abspath(sumber) == os.path.abspath(tujuan):
+        raise ValueError("file tujuan harus berbeda dari sumber")
+    layout = deteksi(sumber)
+    st = os.stat(sumber)
+    opsi = {"sumber": os.path.abspath(sumber), "stempel": [st.st_mtime_ns, st.st_size], "layout": layout,
+            "bulan": bulan or date.today().strftime("%Y-%m"), "tarif": path_tarif, "aturan": aturan, "backend": backend}
+    aturan_ = aturan_gaji.kompilasi(aturan)
+
+    if layout == "harian":
+        kecil, awal = _ringkas(sumber)
+        kecil.setdefault("rates", penyimpanan.db_kosong()["rates"])
+        kecil.pop("karyawan", None)
+        tabel = None
+    else:
+        rates = penyimpanan.db_kosong()["rates"]
+        if path_tarif:
+            with open(path_tarif, "r") as f:
+                rates = json.load(f)
+        kecil, awal, tabel = {"pemasukan": {}, "rates": rates}, 0, tarif.TabelTarif(rates)
+    riwayat = _riwayat(kecil)
+
+    path_progres = tujuan + ".progres.json"
+    progres_lama = None
+    if os.path.exists(path_progres):
+        with open(path_progres, "r") as f:
+            progres_lama = json.load(f)
+        if progres_lama.get("opsi") != opsi or not os.path.exists(tujuan + ".tmp"):
+            progres_lama = None  # sumber/opsi berubah: mulai dari awal
+
+    keluar = TUJUAN[backend](tujuan)
+    path_csv = None if layout == "harian" else os.path.splitext(tujuan)[0] + "_password_awal.csv"
+    if progres_lama:
+        jumlah, posisi_sumber, lanjut = progres_lama["jumlah"], progres_lama["posisi_sumber"], True
+        keluar.buka(kecil, progres_lama["tujuan"])
+        if path_csv:
+            f_csv = open(path_csv, "r+", newline="")
+            f_csv.truncate(progres_lama["csv"])
+            f_csv.seek(progres_lama["csv"])
+    else:
+        jumlah, posisi_sumber, lanjut = _jumlah_awal(), awal, False
+        keluar.buka(kecil)
+        if path_csv:
+            f_csv = open(path_csv, "w", newline="")
+            csv.writer(f_csv).writerow(["nama", "password"])
+    penulis_csv = csv.writer(f_csv) if path_csv else None
+
+    try:
+        if posisi_sumber is not None:
+            with open(sumber, "rb") as f:
+                baca = _Pembaca(f, posisi_sumber)
+
+                def record():
+                    for nama in baca.anggota(lanjut):
+                        yield nama, baca.nilai()
+
+                for potongan in _potong(record(), ukuran):
+                    if layout == "harian":
+                        hasil = _ubah_harian(potongan)
+                    else:
+                        hasil = _ubah_datar(potongan, opsi, tabel, aturan_, riwayat, jumlah, penulis_csv)
+                    _tambah_total(jumlah, hasil, _gaji_harian(aturan_, riwayat, hasil))
+                    keluar.tulis(hasil)
+                    if path_csv:
+                        f_csv.flush()
+                    _simpan_json(path_progres, {"opsi": opsi, "jumlah": jumlah, "posisi_sumber": baca.posisi,
+                                                "tujuan": keluar.posisi(), "csv": f_csv.tell() if path_csv else None})
+                    if progres:
+                        progres(jumlah["karyawan"], baca.posisi, st.st_size)
+        keluar.tutup()
+    finally:
+        if path_csv:
+            f_csv.close()
+
+    verifikasi = verifikasi_tujuan(tujuan, jumlah, aturan, backend)
+    if os.path.exists(path_progres):
+        os.remove(path_progres)
+    return {"layout": layout, "tujuan": tujuan, "jumlah": jumlah, "verifikasi": verifikasi,
+            "password_awal": path_csv,
+            "dilanjutkan": progres_lama is not None, "detik": round((datetime.now() - t0).total_seconds(), 2)}
+
+
+def verifikasi_tujuan(tujuan, jumlah, aturan="harian-8jam", backend="json", ukuran=POTONGAN):
+    """baca ulang tujuan secara streaming; bandingkan total dengan jumlah saat menulis"""
+    kecil, karyawan = TUJUAN[backend].baca(tujuan)
+    aturan_, riwayat = aturan_gaji.kompilasi(aturan), _riwayat(kecil)
+    dibaca = _jumlah_awal()
+    for potongan in _potong(karyawan, ukuran):
+        _tambah_total(dibaca, potongan, _gaji_harian(aturan_, riwayat, potongan))
+    hasil = {k: {"ditulis": jumlah[k], "dibaca": dibaca[k]} for k in ("karyawan", "hari", "lembur", "gaji")}
+    hasil["cocok"] = all(v["ditulis"] == v["dibaca"] for v in hasil.values())
+    if jumlah["gaji_mingguan"] or jumlah["tidak_setara"]:
+        # datar dengan weeks: gaji harian hasil migrasi harus sama dengan gaji mingguan dihitung ulang
+        hasil["setara_mingguan"] = jumlah["tidak_setara"] == 0 and jumlah["gaji_mingguan"] == dibaca["gaji"]
+    return hasil
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrasi DB lama (datar/mingguan) ke DB harian secara streaming")
+    parser.add_argument("sumber", help="file DB sumber (databaseghe1.json / databaseghe3.json)")
+    parser.add_argument("tujuan", nargs="?", help="file DB tujuan (format sistemgaji3/sistemgaji4)")
+    parser.add_argument("--deteksi", action="store_true", help="hanya tampilkan layout sumber")
+    parser.add_argument("--bulan", help="YYYY-MM untuk data mingguan (default bulan berjalan)")
+    parser.add_argument("--tarif", help="file tarif {normal, overtime} untuk sumber datar (mis. tarif_sistemgaji2.json)")
+    parser.add_argument("--aturan", choices=sorted(aturan_gaji.ATURAN), default="harian-8jam")
+    parser.add_argument("--backend", choices=sorted(TUJUAN), default="json")
+    parser.add_argument("--potongan", type=int, default=POTONGAN, help="karyawan per potongan/checkpoint")
+    args = parser.parse_args()
+
+    if args.deteksi or not args.tujuan:
+        print(deteksi(args.sumber))
+    else:
+        laporan = migrasi(args.sumber, args.tujuan, args.bulan, args.tarif, args.aturan, args.backend, args.potongan,
+                          lambda n, pos, total: print(f"{n} karyawan, {pos * 100 // max(total, 1)}% sumber", flush=True))
+        print(json.dumps(laporan, indent=4))
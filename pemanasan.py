@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Pemanasan cache saat proses mulai (sesudah deploy / restart).
+
+Tanpa pemanasan, request pertama membayar muat JSON, membangun indeks absensi
+dan menghitung payroll semua karyawan. Thread latar per file DB melakukannya
+lebih dulu: muat store (penyimpanan.buka), bangun indeks, lalu hitung agregat
+bulan ini dan bulan lalu. Agregat dashboard didefinisikan di sini dan dipakai
+juga oleh sistemgaji3.py, jadi kunci store.memo-nya sama dan request pertama
+tinggal membaca cache.
+
+Set yang dipanaskan diatur di app (PEMANASAN, PEMANASAN_BULAN) atau lewat CLI:
+
+    python pemanasan.py databaseghe1.json --aturan harian-8jam [--bulan 2] [--bagian gaji kinerja]
+"""
+import argparse
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import absensi, aturan_gaji, grafik, kalender, penyimpanan, peringkat, tutup_buku
+
+BAGIAN = ("indeks", "gaji", "kinerja", "lembur", "kalender", "seri_payroll")
+
+
+# ---------------------
+# Agregat dashboard (dipakai bersama app; kunci memo harus sama)
+# ---------------------
+def gaji_banyak(store, aturan, names, ym):
+    """{nama: (total, rows)}; bulan tertutup dari snapshot, selain itu cache gaji store"""
+    if tutup_buku.tertutup(store.db, ym):
+        return tutup_buku.gaji(store, ym, names)
+    return store.gaji_bulan_banyak(names, ym, lambda ns: aturan_gaji.hitung_bulan(store, aturan, ns, ym))
+
+
+def gaji(store, aturan, ym):
+    return store.memo(("gaji", ym), lambda: tutup_buku.dari_snapshot(
+        store, ym, "gaji", lambda: peringkat.gaji_bulan(store.db, ym, lambda ns, b: gaji_banyak(store, aturan, ns, b))),
+        bulan=ym)
+
+
+def kinerja(store, aturan, ym):
+    return store.memo(("kinerja", ym), lambda: tutup_buku.dari_snapshot(
+        store, ym, "kinerja", lambda: absensi.kinerja_bulan(store, ym)), bulan=ym)
+
+
+def lembur(store, aturan, ym):
+    return store.memo(("lembur", ym), lambda: tutup_buku.dari_snapshot(
+        store, ym, "lembur", lambda: peringkat.lembur_bulan(store, ym)), bulan=ym)
+
+
+def rekap_kalender(store, aturan, ym):
+    # kehadiran terhadap hari kerja kalender; bulan berjalan dihitung sampai hari ini
+    hari_ini = date.today().strftime("%Y-%m-%d")
+    batas = hari_ini if hari_ini.startswith(ym) else None
+    return store.memo(("kalender", ym, batas), lambda: tutup_buku.dari_snapshot(
+        store, ym, "kalender", lambda: kalender.rekap_bulan(store, ym, aturan.jam_per("hadir"), batas)), bulan=ym)
+
+
+def seri_payroll(store, aturan, year):
+    bulan_tahun = [f"{year}-{m:02d}" for m in range(1, 13)]
+    return store.memo(("seri_payroll", year), lambda: grafik.seri_payroll(
+        bulan_tahun,
+        lambda ym: tutup_buku.dari_snapshot(store, ym, "total_payroll", lambda: sum(
+            total for total, _ in gaji_banyak(store, aturan, list(store.db["karyawan"]), ym).values())),
+        store.db.get("pemasukan", {})), bulan=bulan_tahun)
+
+
+def _indeks(store, aturan, ym):
+    for nama in list(store.db["karyawan"]):
+        store.indeks_absen(nama)
+
+
+_HITUNG = {"indeks": _indeks, "gaji": gaji, "kinerja": kinerja, "lembur": lembur,
+           "kalender": rekap_kalender, "seri_payroll": lambda store, aturan, ym: seri_payroll(store, aturan, ym[:4])}
+
+
+def bulan_terakhir(n, hari_ini=None):
+    """n bulan terakhir termasuk bulan berjalan, terbaru dulu ('YYYY-MM')"""
+    awal = (hari_ini or date.today()).replace(day=1)
+    hasil = []
+    for _ in range(n):
+        hasil.append(awal.strftime("%Y-%m"))
+        awal = (awal - timedelta(days=1)).replace(day=1)
+    return hasil
+
+
+def langkah(bagian=BAGIAN, bulan=2):
+    """(bagian, bulan) yang dihitung; indeks sekali, seri_payroll sekali per tahun"""
+    daftar, tahun = [], set()
+    for b in bagian:
+        if b == "indeks":
+            daftar.append((b, None))
+            continue
+        for ym in bulan_terakhir(bulan):
+            if b == "seri_payroll":
+                if ym[:4] in tahun:
+                    continue
+                tahun.add(ym[:4])
+            daftar.append((b, ym))
+    return daftar
+
+
+# ---------------------
+# Thread pemanasan per file DB
+# ---------------------
+_status = {}  # path -> {"thread", "mulai", "dimuat", "siap", "langkah", "total", "detik", "error"}
+_status_lock = threading.Lock()
+
+
+def status(path):
+    info = _status.get(path, {})
+    return {k: v for k, v in info.items() if k not in ("thread", "event_dimuat")}
+
+
+def _panaskan(path, aturan, bagian, bulan, info):
+    t0 = time.perf_counter()
+    try:
+        store = penyimpanan.buka(path)
+        info["dimuat"] = True
+        info["event_dimuat"].set()
+        daftar = langkah(bagian, bulan)
+        info["total"] = len(daftar)
+        for b, ym in daftar:
+            _HITUNG[b](store, aturan, ym)
+            info["langkah"] += 1
+        info["siap"] = True
+    except Exception as e:
+        info["error"] = str(e)
+        info["event_dimuat"].set()
+    info["detik"] = round(time.perf_counter() - t0, 2)
+
+
+def mulai(path, aturan, bagian=BAGIAN, bulan=2):
+    """
+    mulai pemanasan di thread latar bila store path belum dimuat (proses baru,
+    atau store sudah dilepas dari LRU); return status
+    """
+    with _status_lock:
+        info = _status.get(path)
+        berjalan = info is not None and info["thread"].is_alive()
+        if not berjalan and (info is None or not penyimpanan.dimuat(path)):
+            info = _status[path] = {"mulai": datetime.now().isoformat(timespec="seconds"), "dimuat": False,
+                                    "siap": False, "langkah": 0, "total": None, "event_dimuat": threading.Event()}
+            info["thread"] = threading.Thread(target=_panaskan, args=(path, aturan, tuple(bagian), bulan, info),
+                                              name="pemanasan", daemon=True)
+            info["thread"].start()
+    return status(path)
+
+
+def tunggu_dimuat(path, timeout=None):
+    """tunggu sampai store path dimuat (atau pemanasan gagal); False bila timeout"""
+    info = _status.get(path)
+    return info is None or info["event_dimuat"].wait(timeout)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ukur pemanasan cache untuk satu file DB")
+    parser.add_argument("db", help="file database JSON (format sistemgaji3/sistemgaji4)")
+    aturan_gaji.argumen_cli(parser)
+    parser.add_argument("--bulan", type=int, default=2, help="jumlah bulan terakhir yang dipanaskan")
+    parser.add_argument("--bagian", nargs="+", choices=BAGIAN, default=list(BAGIAN))
+    args = parser.parse_args()
+
+    mulai(args.db, aturan_gaji.kompilasi(args.aturan), args.bagian, args.bulan)
+    _status[args.db]["thread"].join()
+    print(status(args.db))
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""Pemindaian massal absensi: hari kerja tanpa absen dan anomali.
+
+Untuk rentang tanggal [dari, sampai] setiap karyawan dijadikan bitset (int
+Python, bit i = hari ke-i sejak dari), lalu dicek dengan operasi bit:
+
+- tanpa_absen   : hari kerja (kalender.py) yang tidak punya catatan absen
+- lembur_ekstrem: >= OPSI["streak_hari"] hari berturut-turut dengan lembur
+                  >= OPSI["jam_lembur"] jam (run dicari dengan x & (x >> 1) & ...)
+- klaster_sakit : >= OPSI["sakit_min"] hari "sakit" dalam jendela OPSI["sakit_jendela"] hari
+
+Job berjalan di thread latar (opsional memakai process pool) dan menulis
+laporan JSON yang ditampilkan di panel Bendahara.
+"""
+import json, os
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import kalender, rekaman
+
+OPSI = {
+    "jam_lembur": 12,    # jam lembur per hari yang dianggap ekstrem
+    "streak_hari": 5,    # panjang minimal streak lembur ekstrem
+    "sakit_min": 3,      # jumlah hari sakit ...
+    "sakit_jendela": 7,  # ... dalam jendela sekian hari
+}
+POTONGAN = 1000  # karyawan per tugas process pool
+
+
+# ---------------------
+# Bitset hari kerja untuk seluruh rentang
+# ---------------------
+def bitset_kerja(db, dari, sampai):
+    """bit i = dari + i hari adalah hari kerja; dirakit dari tabel bulanan kalender"""
+    d0, d1 = date.fromisoformat(dari), date.fromisoformat(sampai)
+    mask, bulan = 0, date(d0.year, d0.month, 1)
+    while bulan <= d1:
+        ym = bulan.strftime("%Y-%m")
+        geser = (bulan - d0).days  # posisi tanggal 1 bulan ini relatif ke dari
+        m = kalender.hari_kerja(db, ym)
+        mask |= (m << geser) if geser >= 0 else (m >> -geser)
+        bulan = date(bulan.year + bulan.month // 12, bulan.month % 12 + 1, 1)
+    return mask & ((1 << ((d1 - d0).days + 1)) - 1)
+
+
+def _run(x, n):
+    """bit i tetap 1 hanya jika bit i..i+n-1 semuanya 1"""
+    for k in range(1, n):
+        x &= x >> 1
+    return x
+
+
+def _tanggal(dari, i):
+    return (date.fromisoformat(dari) + timedelta(days=i)).isoformat()
+
+
+def _bit_pertama(x, maks):
+    hasil = []
+    while x and len(hasil) < maks:
+        bit = x & -x  # bit 1 terendah
+        hasil.append(bit.bit_length() - 1)
+        x ^= bit
+    return hasil
+
+
+# ---------------------
+# Pemeriksaan satu potongan karyawan (bisa di proses lain)
+# ---------------------
+def pindai_potongan(args):
+    karyawan, dari, sampai, kerja, opsi = args  # karyawan = [(nama, {tanggal: rekaman.HariAbsen})]
+    d0, d1 = date.fromisoformat(dari), date.fromisoformat(sampai)
+    posisi = {(d0 + timedelta(days=i)).isoformat(): i for i in range((d1 - d0).days + 1)}
+    temuan = []
+    for nama, absen in karyawan:
+        tercatat = lembur = 0
+        sakit = []
+        for dstr, info in absen.items():
+            i = posisi[dstr]
+            tercatat |= 1 << i
+            if info.overtime >= opsi["jam_lembur"]:
+                lembur |= 1 << i
+            if info.status == rekaman.SAKIT:
+                sakit.append(i)
+
+        kosong = kerja & ~tercatat
+        if kosong:
+            contoh = [_tanggal(dari, i) for i in _bit_pertama(kosong, 5)]
+            temuan.append({"nama": nama, "jenis": "tanpa_absen", "mulai": contoh[0], "jumlah": kosong.bit_count(),
+                           "detail": f"{kosong.bit_count()} hari kerja tanpa absen, mis. {', '.join(contoh)}"})
+
+        awal_streak = _run(lembur, opsi["streak_hari"])
+        if awal_streak:
+            i = _bit_pertama(awal_streak, 1)[0]
+            temuan.append({"nama": nama, "jenis": "lembur_ekstrem", "mulai": _tanggal(dari, i), "jumlah": awal_streak.bit_count(),
+                           "detail": f">= {opsi['streak_hari']} hari berturut-turut lembur >= {opsi['jam_lembur']} jam"})
+
+        sakit.sort()
+        j = 0
+        for i in range(len(sakit)):  # dua penunjuk atas hari sakit terurut
+            while sakit[i] - sakit[j] >= opsi["sakit_jendela"]:
+                j += 1
+            if i - j + 1 >= opsi["sakit_min"]:
+                temuan.append({"nama": nama, "jenis": "klaster_sakit", "mulai": _tanggal(dari, sakit[j]), "jumlah": i - j + 1,
+                               "detail": f"{i - j + 1} hari sakit dalam {opsi['sakit_jendela']} hari"})
+                break
+    return temuan
+
+
+def pindai(store, dari, sampai, opsi=None, proses=1):
+    """pindai semua karyawan untuk rentang [dari, sampai] ('YYYY-MM-DD'); return list temuan"""
+    opsi = dict(OPSI, **(opsi or {}))
+    kerja = bitset_kerja(store.db, dari, sampai)
+    karyawan = []
+    for nama in list(store.db["karyawan"]):
+        idx = store.indeks_absen(nama)
+        karyawan.append((nama, {d: idx.absen[d] for d in idx.dalam(dari, sampai)}))
+    if proses > 1 and len(karyawan) > POTONGAN and "fork" in multiprocessing.get_all_start_methods():
+        # data diwariskan lewat fork; tugas hanya membawa rentang indeks, bukan dict absensi
+        global _data
+        with _pool_lock:
+            _data = karyawan
+            try:
+                with ProcessPoolExecutor(proses, mp_context=multiprocessing.get_context("fork")) as pool:
+                    hasil = list(pool.map(_pindai_rentang, [(i, i + POTONGAN, dari, sampai, kerja, opsi)
+                                                            for i in range(0, len(karyawan), POTONGAN)]))
+            finally:
+                _data = None
+    else:
+        hasil = [pindai_potongan((karyawan, dari, sampai, kerja, opsi))]
+    return [t for bagian in hasil for t in bagian]
+
+
+_data = None
+_pool_lock = threading.Lock()
+
+
+def _pindai_rentang(args):
+    i0, i1, dari, sampai, kerja, opsi = args
+    return pindai_potongan((_data[i0:i1], dari, sampai, kerja, opsi))
+
+
+# ---------------------
+# Job latar + laporan
+# ---------------------
+_job = {}  # path laporan -> {"status", "mulai", ...}
+_job_lock = threading.Lock()
+
+
+def path_laporan(db_file):
+    return os.path.splitext(db_file)[0] + "_pemindaian.json"
+
+
+def status_job(path):
+    return dict(_job.get(path, {}))
+
+
+def mulai_job(store, path, dari, sampai, opsi=None, proses=1):
+    """jalankan pindai() di thread latar, tulis laporan ke path; False bila job masih berjalan"""
+    with _job_lock:
+        if _job.get(path, {}).get("status") == "berjalan":
+            return False
+        _job[path] = {"status": "berjalan", "mulai": datetime.now().isoformat(timespec="seconds"), "dari": dari, "sampai": sampai}
+
+    def kerja():
+        t0 = time.perf_counter()
+        try:
+            temuan = pindai(store, dari, sampai, opsi, proses)
+            laporan = {
+                "dibuat": datetime.now().isoformat(timespec="seconds"),
+                "dari": dari, "sampai": sampai,
+                "jumlah_karyawan": len(store.db["karyawan"]),
+                "durasi_detik": round(time.perf_counter() - t0, 3),
+                "temuan": temuan,
+            }
+            with open(path, "w") as f:
+                json.dump(laporan, f, indent=4)
+            _job[path].update(status="selesai", durasi_detik=laporan["durasi_detik"])
+        except Exception as e:
+            _job[path].update(status="gagal", error=str(e))
+
+    threading.Thread(target=kerja, name="pemindai", daemon=True).start()
+    return True
+
+
+def baca_laporan(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""Lapisan penyimpanan untuk DB harian (sistemgaji3.py / sistemgaji4.py).
+
+Streamlit menjalankan ulang script di setiap interaksi, jadi objek Penyimpanan
+disimpan per file di level modul: JSON hanya dibaca ulang bila file berubah,
+dan hasil gaji per (nama, bulan) di-cache sampai ada perubahan yang
+mempengaruhinya.
+
+Satu proses bisa melayani banyak file DB (perusahaan.py). Store yang dimuat
+disimpan dalam LRU: bila perkiraan memori semua store melewati ANGGARAN_BYTE,
+atau sebuah store tidak diakses selama IDLE_DETIK, store itu dilepas dan
+dimuat ulang dari file saat dibutuhkan lagi (semua perubahan sudah ditulis
+oleh ubah(), jadi melepas store tidak menghilangkan data).
+
+Setiap kali versi naik (simpan / muat ulang) satu entri ditambahkan ke feed
+perubahan {versi, nama, ym, sejak}: dashboard yang terbuka cukup menanyakan
+perubahan(versi_terakhir) atau berubah(versi, bulan) untuk tahu bagian mana
+yang perlu dihitung ulang; memo(..., bulan=...) memakainya otomatis.
+
+Beberapa worker (proses) di satu host berbagi file DB lewat log peristiwa
+sinkron.py: ubah() memegang kunci file DB, menerapkan dulu semua perubahan
+worker lain, baru menjalankan perubahannya sendiri dan menulis; segarkan()
+menerapkan peristiwa baru tanpa membaca ulang seluruh JSON.
+Peristiwa yang sama juga ditulis ke riwayat permanen (riwayat.py) untuk
+kueri keadaan DB pada waktu lampau.
+"""
+import json, os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import absensi, rekaman, riwayat, sinkron, tarif
+
+
+def db_kosong():
+    return {
+        "karyawan": {},  # name -> rekaman.Karyawan(password, posisi, absen={'YYYY-MM-DD': HariAbsen})
+        "pemasukan": {},  # 'YYYY-MM' -> int
+        "rates": {        # default rates (tarif saat ini = entri terakhir rates_history)
+            "normal": {"intern":35000,"staff":50000,"spv":100000,"manager":200000},
+            "overtime": {"intern":20000,"staff":40000,"spv":55000,"manager":65000}
+        }
+    }
+
+
+PANJANG_FEED = 1000  # entri feed perubahan yang disimpan per store
+
+
+def _stempel(path):
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+class Penyimpanan:
+    def __init__(self, path, db=None):
+        self.path = path
+        self.lock = threading.RLock()
+        self.stempel = None
+        self.db = None
+        self.tarif = None
+        self.cache = {}  # 'YYYY-MM' -> {nama: (total, rows)}
+        self.indeks = {}  # nama -> absensi.IndeksAbsensi
+        self.versi = 0    # naik setiap DB dimuat/disimpan
+        self._memo = {}   # kunci -> (versi, hasil)
+        self.feed = deque(maxlen=PANJANG_FEED)  # {"versi", "nama", "ym", "sejak", "waktu"} per kenaikan versi
+        self.papan = None  # absensi.PapanHarian terakhir (papan absen langsung)
+        self.asal = f"{os.getpid()}-{id(self)}"  # penanda peristiwa sinkron dari store ini
+        self._log = None  # posisi terakhir di log sinkron (inode, offset)
+        self.baca_saja = db is not None  # keadaan lampau dari riwayat.py: tidak pernah disimpan / disegarkan
+        if self.baca_saja:
+            self._pasang(db)
+        else:
+            with sinkron.kunci(path, bersama=True):
+                self.muat()
+
+    # ---------------------
+    # load / save
+    # ---------------------
+    def muat(self):
+        with self.lock:
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    db = rekaman.dari_json(json.load(f))
+            else:
+                db = db_kosong()
+            self.stempel = _stempel(self.path)
+            self._log = sinkron.posisi(self.path)
+            self._pasang(db)
+
+    def _pasang(self, db):
+        with self.lock:
+            self.db = db
+            tarif.pastikan_riwayat(self.db)
+            self.tarif = tarif.RiwayatTarif(self.db["rates_history"])
+            self.cache.clear()
+            self.indeks.clear()
+            self.versi += 1
+            self._catat_feed()  # dimuat (ulang): semua bisa berubah
+
+    def segarkan(self):
+        """
+        ikuti perubahan dari worker/store lain lewat log sinkron (hanya bagian yang
+        berubah); baca ulang utuh bila log tidak bisa diikuti atau file diubah tanpa log
+        """
+        if self.baca_saja or (_stempel(self.path) == self.stempel and sinkron.posisi(self.path) == self._log):
+            return
+        with self.lock, sinkron.kunci(self.path, bersama=True):
+            if not self._ikuti() or _stempel(self.path) != self.stempel:
+                self.muat()
+
+    def ubah(self, fungsi, nama=None, ym=None, sejak=None, names=None):
+        """
+        satu-satunya jalan mengubah DB. Di bawah kunci store dan kunci file DB
+        (eksklusif antar worker): terapkan dulu SEMUA peristiwa worker lain, lalu
+        fungsi(db) mengubah db, lalu tulis. fungsi selalu melihat data terbaru, dan
+        yang ditulis = data terbaru + perubahan fungsi, jadi perubahan worker lain
+        (juga pada karyawan / bagian DB yang sama) tidak tertimpa. return hasil fungsi;
+        fungsi mengembalikan False = batal, tidak ada yang disimpan (cek dulu sebelum mengubah).
+
+        cakupan (cache gaji yang dibuang & peristiwa yang dikirim):
+        nama + ym -> satu (nama, bulan); nama saja -> semua bulan nama itu;
+        ym saja -> seluruh bulan itu (tutup/buka buku);
+        sejak='YYYY-MM-DD' -> semua bulan mulai tanggal itu (perubahan tarif);
+        names (+ ym) -> beberapa karyawan sekaligus dengan sekali tulis (kiosk)
+        """
+        if self.baca_saja:
+            raise RuntimeError("store riwayat hanya bisa dibaca")
+        with self.lock, sinkron.kunci(self.path):
+            if not self._ikuti() or _stempel(self.path) != self.stempel:
+                self.muat()  # log tidak bisa diikuti / file diubah tanpa log: file (di bawah kunci) yang berlaku
+            hasil = fungsi(self.db)
+            if hasil is not False:
+                self._tulis([nama] if names is None else list(names), ym, sejak)
+            return hasil
+
+    def _tulis(self, daftar, ym, sejak):
+        """tulis DB + peristiwa lalu buang cache gaji yang terdampak (di dalam ubah())"""
+        riwayat.awal(self.path)  # checkpoint dasar sebelum perubahan pertama yang dicatat
+        # tulis ke file sementara lalu ganti: dump yang gagal tidak meninggalkan DB terpotong
+        sementara = os.path.join(os.path.dirname(self.path), "." + os.path.basename(self.path) + ".tmp")
+        with open(sementara, "w") as f:
+            json.dump(self.db, f, indent=4, default=rekaman.ke_json)
+        os.replace(sementara, self.path)
+        self.stempel = _stempel(self.path)
+        peristiwa = [self._peristiwa(n, ym, sejak) for n in daftar]
+        self._log = sinkron.kirim(self.path, peristiwa, default=rekaman.ke_json)
+        riwayat.catat(self.path, peristiwa)
+        if sejak is not None:
+            self.tarif = tarif.RiwayatTarif(self.db["rates_history"])
+        for n in daftar:
+            self.versi += 1
+            self._catat_feed(n, ym, sejak)
+            self.invalidasi(nama=n, ym=ym, sejak=sejak)
+
+    # ---------------------
+    # sinkron antar worker (lihat sinkron.py)
+    # ---------------------
+    def _peristiwa(self, nama, ym, sejak):
+        p = {"asal": self.asal, "nama": nama, "ym": ym, "sejak": sejak, "stempel": self.stempel}
+        if nama is None:
+            p["lain"] = {k: v for k, v in self.db.items() if k != "karyawan"}
+            return p
+        info = self.db["karyawan"].get(nama)
+        if info is None or ym is None:
+            p["karyawan"] = info  # dihapus / seluruh data karyawan
+        else:  # absen satu bulan saja
+            p["karyawan"] = {"password": info.password, "posisi": info.posisi,
+                             "absen": {d: info.absen[d] for d in self.indeks_absen(nama).dalam(ym + "-01", ym + "-31")}}
+        return p
+
+    def _ikuti(self):
+        """terapkan peristiwa baru dari log; False bila log tidak bisa diikuti (perlu muat ulang)"""
+        hasil = sinkron.baca(self.path, self._log)
+        if hasil is None:
+            return False
+        peristiwa, self._log = hasil
+        for p in peristiwa:
+            if p["asal"] != self.asal:
+                self._terapkan(p)
+            self.stempel = tuple(p["stempel"]) if p["stempel"] else None
+        return True
+
+    def _terapkan(self, p):
+        nama, ym, sejak = p["nama"], p["ym"], p["sejak"]
+        terapkan_peristiwa(self.db, p)
+        if nama is not None:
+            self.indeks.pop(nama, None)
+        else:
+            self.tarif = tarif.RiwayatTarif(self.db["rates_history"])
+        self.versi += 1
+        self._catat_feed(nama, ym, sejak)
+        self.invalidasi(nama=nama, ym=ym, sejak=sejak)
+
+    # ---------------------
+    # feed perubahan (satu entri per versi)
+    # ---------------------
+    def _catat_feed(self, nama=None, ym=None, sejak=None):
+        self.feed.append({"versi": self.versi, "nama": nama, "ym": ym, "sejak": sejak, "waktu": time.time()})
+
+    def perubahan(self, versi):
+        """entri feed sesudah versi; None bila feed sudah terpotong (anggap semua berubah)"""
+        with self.lock:
+            entri = [e for e in self.feed if e["versi"] > versi]
+            return entri if len(entri) == self.versi - versi else None
+
+    def berubah(self, versi, bulan=None):
+        """ada perubahan sesudah versi yang menyentuh salah satu bulan ('YYYY-MM'; None = apa pun)?"""
+        if versi == self.versi:
+            return False
+        entri = self.perubahan(versi)
+        if entri is None or bulan is None:
+            return True
+        bulan = (bulan,) if isinstance(bulan, str) else bulan
+        return any(_menyentuh(e, ym) for e in entri for ym in bulan)
+
+    # ---------------------
+    # cache gaji per (nama, bulan)
+    # ---------------------
+    def gaji_bulan(self, nama, ym, hitung):
+        return self.gaji_bulan_banyak([nama], ym, lambda ns: {nama: hitung(nama, ym)})[nama]
+
+    def gaji_bulan_banyak(self, names, ym, hitung_banyak):
+        """hitung_banyak(names_belum_ada) -> {nama: (total, rows)}; return untuk semua names"""
+        with self.lock:
+            v = self.versi  # diambil sebelum menghitung: ubah() selama hitung membuat hasilnya basi
+            bulan = self.cache.get(ym, {})
+            hasil = {n: bulan[n] for n in names if n in bulan}
+        belum = [n for n in names if n not in hasil]
+        if belum:
+            baru = hitung_banyak(belum)
+            hasil.update(baru)
+            with self.lock:
+                if not self.berubah(v, ym):  # hasil basi dipakai sekali saja, tidak di-cache
+                    self.cache.setdefault(ym, {}).update(baru)
+        return {n: hasil[n] for n in names}
+
+    def memo(self, kunci, hitung, bulan=None):
+        """
+        hasil hitung() di-cache per kunci sampai versi data berubah;
+        dengan bulan (satu/lebih 'YYYY-MM') hanya perubahan yang menyentuh bulan itu yang dihitung ulang
+        """
+        v = self.versi  # sebelum hitung(): ubah() di tengah hitung tidak boleh menandai hasil ini terbaru
+        versi, hasil = self._memo.get(kunci, (None, None))
+        if versi is None or self.berubah(versi, bulan):
+            hasil = hitung()
+        self._memo[kunci] = (v, hasil)
+        return hasil
+
+    # ---------------------
+    # indeks absensi per karyawan
+    # ---------------------
+    def indeks_absen(self, nama):
+        idx = self.indeks.get(nama)
+        if idx is None:
+            idx = self.indeks[nama] = absensi.IndeksAbsensi(self.db["karyawan"][nama].absen)
+        return idx
+
+    def catat_absen(self, nama, dstr, info):
+        """ubah db["karyawan"][nama].absen[dstr] sekaligus indeksnya (belum disimpan)"""
+        if isinstance(info, dict):  # data baru: overtime tidak valid ditolak, tidak dianggap 0
+            info = rekaman.HariAbsen(info.get("status", ""), info.get("overtime", 0))
+        with self.lock:
+            idx = self.indeks.get(nama)
+            if idx is not None:
+                idx.catat(dstr, info)
+            else:
+                self.db["karyawan"][nama].absen[dstr] = info
+
+    def papan_harian(self, dstr):
+        """absensi.PapanHarian tanggal dstr, dipakai bersama semua sesi dan diperbarui dari feed"""
+        with self.lock:
+            if self.papan is None or self.papan.dstr != dstr:
+                self.papan = absensi.PapanHarian(dstr)
+            return self.papan.segarkan(self)
+
+    def invalidasi(self, nama=None, ym=None, sejak=None):
+        with self.lock:
+            if sejak is not None:
+                for key in [k for k in self.cache if k >= sejak[:7]]:
+                    del self.cache[key]
+            if nama is None and ym is not None:
+                self.cache.pop(ym, None)
+            if nama is not None:
+                for key, bulan in self.cache.items():
+                    if ym is None or key == ym:
+                        bulan.pop(nama, None)
+                if nama not in self.db["karyawan"]:
+                    self.indeks.pop(nama, None)
+
+
+def terapkan_peristiwa(db, p):
+    """ubah data db sesuai satu peristiwa simpan (log sinkron / riwayat), tanpa cache"""
+    nama, ym = p["nama"], p["ym"]
+    karyawan = db["karyawan"]
+    if nama is not None:
+        data = p["karyawan"]
+        if data is None:
+            karyawan.pop(nama, None)
+        elif ym is None or nama not in karyawan:
+            karyawan[nama] = rekaman.Karyawan.dari_dict(data, nama)
+        else:
+            info = karyawan[nama]
+            info.password, info.posisi = data["password"], data["posisi"]
+            for d in [d for d in info.absen if d.startswith(ym)]:
+                del info.absen[d]
+            info.absen.update((d, rekaman.HariAbsen.dari_dict(v, f"{nama}/{d}")) for d, v in data["absen"].items())
+    else:
+        for k in [k for k in db if k != "karyawan" and k not in p["lain"]]:
+            del db[k]
+        db.update(p["lain"])
+        tarif.pastikan_riwayat(db)
+
+
+def _menyentuh(entri, ym):
+    if entri["sejak"] is not None:
+        return ym >= entri["sejak"][:7]
+    if entri["ym"] is not None:
+        return entri["ym"] == ym
+    return True  # tanpa bulan (seluruh DB / semua bulan seorang karyawan)
+
+
+# ---------------------
+# LRU store per file DB
+# ---------------------
+ANGGARAN_BYTE = 1024 * 2**20  # perkiraan memori maksimum semua store yang dimuat
+IDLE_DETIK = 30 * 60          # store yang tidak diakses selama ini dilepas
+FAKTOR_MEMORI = 2.5           # memori store ~ ukuran file JSON x faktor (record + indeks + cache gaji)
+
+_toko = OrderedDict()  # path -> Penyimpanan, paling lama tidak dipakai di depan
+_toko_lock = threading.Lock()
+_statistik = {}        # path -> metrik per file DB (tetap ada setelah store dilepas)
+
+
+def perkiraan_byte(store):
+    return int((store.stempel[1] if store.stempel else 0) * FAKTOR_MEMORI)
+
+
+def _rapikan(kecuali):
+    """lepas store idle, lalu store paling lama tidak dipakai sampai muat di anggaran"""
+    sekarang = time.time()
+    for path in list(_toko):
+        if path != kecuali and sekarang - _statistik[path]["akses_terakhir"] > IDLE_DETIK:
+            _lepas(path, "idle")
+    total = sum(perkiraan_byte(s) for s in _toko.values())
+    for path in list(_toko):
+        if total <= ANGGARAN_BYTE:
+            break
+        if path != kecuali:
+            total -= perkiraan_byte(_toko[path])
+            _lepas(path, "anggaran")
+
+
+def _lepas(path, alasan):
+    del _toko[path]
+    _statistik[path]["dilepas"] += 1
+    _statistik[path]["dilepas_" + alasan] += 1
+
+
+def buka(path):
+    """Penyimpanan untuk file path, dipakai ulang antar rerun & antar sesi"""
+    with _toko_lock:
+        stat = _statistik.setdefault(path, {"dimuat": 0, "hit": 0, "dilepas": 0, "dilepas_idle": 0,
+                                            "dilepas_anggaran": 0, "detik_muat": 0.0, "akses_terakhir": 0.0})
+        store = _toko.get(path)
+        if store is not None:
+            _toko.move_to_end(path)
+            stat["hit"] += 1
+    if store is None:
+        # dimuat di luar lock supaya perusahaan lain tidak ikut menunggu
+        t0 = time.perf_counter()
+        baru = Penyimpanan(path)
+        with _toko_lock:
+            store = _toko.setdefault(path, baru)
+            if store is baru:
+                stat["dimuat"] += 1
+                stat["detik_muat"] = round(time.perf_counter() - t0, 3)
+    with _toko_lock:
+        stat["akses_terakhir"] = time.time()
+        _rapikan(kecuali=path)
+    store.segarkan()
+    return store
+
+
+def dimuat(path):
+    """apakah store untuk path sedang ada di memori (tanpa memuatnya)"""
+    with _toko_lock:
+        return path in _toko
+
+
+def statistik():
+    """metrik per file DB: akses, muat ulang, pelepasan, perkiraan memori"""
+    with _toko_lock:
+        rows = []
+        for path, stat in _statistik.items():
+            store = _toko.get(path)
+            rows.append(dict(stat, path=path, dimuat_sekarang=store is not None,
+                             perkiraan_mb=round(perkiraan_byte(store) / 2**20, 2) if store else 0.0,
+                             karyawan=len(store.db.get("karyawan", {})) if store else None,
+                             versi=store.versi if store else None))
+        return rows
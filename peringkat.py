@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""Papan peringkat top/bottom-k untuk Dashboard Evaluasi Bulanan.
+
+Agregat per karyawan disimpan sebagai list of dict (di-memo per bulan &
+versi data), lalu k teratas/terbawah dipilih dengan heap: O(n log k),
+tanpa DataFrame berisi semua karyawan dan tanpa sort penuh.
+"""
+import heapq
+from operator import itemgetter
+
+
+def teratas(rows, kolom, k, terbawah=False):
+    """k baris dengan nilai kolom terbesar (atau terkecil); nilai None dilewati"""
+    ada = (r for r in rows if r[kolom] is not None)
+    pilih = heapq.nsmallest if terbawah else heapq.nlargest
+    return pilih(int(k), ada, key=itemgetter(kolom))
+
+
+# ---------------------
+# Agregat per karyawan untuk satu bulan
+# ---------------------
+def gaji_bulan(db, ym, calc_month_salaries):
+    gaji = calc_month_salaries(list(db["karyawan"]), ym)
+    return [{"nama": name.title(), "posisi": info.posisi, "gaji": gaji[name][0]}
+            for name, info in db["karyawan"].items()]
+
+
+def lembur_bulan(store, ym):
+    """total jam lembur per karyawan (hanya yang > 0), lewat indeks absensi"""
+    rows = []
+    for name in store.db["karyawan"].keys():
+        total_ot = store.indeks_absen(name).total_lembur(ym + "-01", ym + "-31")
+        if total_ot > 0:
+            rows.append({"nama": name.title(), "total_overtime": total_ot})
+    return rows
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Banyak perusahaan (tenant) dalam satu proses Streamlit.
+
+Setiap perusahaan punya folder sendiri di FOLDER/<kode>/ berisi file DB app
+dan semua file turunannya (laporan pemindaian, snapshot tutup buku):
+
+    perusahaan/
+        pt_maju/databaseghe1.json
+        cv_jaya/database.json
+
+Perusahaan dipilih di sidebar sebelum login dan terkunci selama sesi login.
+Bila FOLDER tidak ada (atau kosong) app berjalan seperti biasa dengan satu
+file DB di folder kerja. Store yang dimuat diatur penyimpanan.buka (LRU).
+"""
+import os
+import re
+
+FOLDER = "perusahaan"
+_KODE = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+
+def daftar(folder=FOLDER):
+    """kode perusahaan yang terdaftar (nama subfolder), terurut"""
+    if not os.path.isdir(folder):
+        return []
+    return sorted(k for k in os.listdir(folder) if _KODE.match(k) and os.path.isdir(os.path.join(folder, k)))
+
+
+def path_db(kode, nama_file, folder=FOLDER):
+    if not _KODE.match(kode or ""):
+        raise ValueError(f"kode perusahaan tidak valid: {kode!r}")
+    return os.path.join(folder, kode, nama_file)
+
+
+def kode_dari_path(path, folder=FOLDER):
+    """kebalikan path_db; None untuk DB mode satu perusahaan"""
+    bagian = os.path.normpath(path).split(os.sep)
+    return bagian[-2] if len(bagian) >= 3 and bagian[-3] == os.path.basename(os.path.normpath(folder)) else None
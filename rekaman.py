@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""Record ringan untuk data karyawan, absensi harian dan rincian gaji.
+
+JSON dibaca sebagai dict bersarang: satu dict {"status", "overtime"} per hari
+absen dengan string status baru di setiap entri. Penyimpanan mengubahnya sekali
+saat dimuat menjadi objek __slots__ (tanpa __dict__ per objek) dengan status
+yang di-intern (satu objek string per status di seluruh proses), lalu kembali
+ke dict hanya saat ditulis (json.dump(..., default=ke_json)) atau ditampilkan.
+
+    db["karyawan"][nama] = Karyawan(password, posisi, absen={'YYYY-MM-DD': HariAbsen})
+
+Rincian gaji per karyawan-bulan disimpan per kolom (RincianGaji), bukan satu
+dict per baris; DataFrame dibuat di UI lewat ke_kolom().
+
+overtime yang bukan bilangan bulat >= 0 ditolak saat record dibuat
+(HariAbsen(...), dari UI / kiosk), tetapi saat DB dimuat (dari_dict) dianggap 0
+dengan peringatan: satu nilai rusak di file tidak boleh menggagalkan seluruh DB.
+"""
+import sys
+import warnings
+
+STATUS = ("hadir", "hadir+lembur", "izin", "sakit", "cuti")
+_status = {s: sys.intern(s) for s in STATUS}
+HADIR, HADIR_LEMBUR, IZIN, SAKIT, CUTI = (_status[s] for s in STATUS)
+
+
+def status(s):
+    """string status yang di-intern; status di luar STATUS (data lama) tetap disimpan apa adanya"""
+    s = s or ""
+    hasil = _status.get(s)
+    if hasil is None:
+        hasil = _status[s] = sys.intern(str(s))
+    return hasil
+
+
+def lembur(v):
+    """jam lembur sebagai int; ValueError bila bukan bilangan bulat >= 0"""
+    try:
+        jam = int(v or 0)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"overtime harus bilangan bulat, bukan {v!r}")
+    if jam < 0 or jam != float(v or 0):
+        raise ValueError(f"overtime harus bilangan bulat >= 0, bukan {v!r}")
+    return jam
+
+
+class HariAbsen:
+    __slots__ = ("status", "overtime")
+
+    def __init__(self, status_, overtime=0):
+        self.status = status(status_)
+        self.overtime = lembur(overtime)
+
+    @classmethod
+    def dari_dict(cls, d, letak=None):
+        """dari JSON / peristiwa: overtime tidak valid dianggap 0 (dengan peringatan), bukan error"""
+        try:
+            return cls(d.get("status", ""), d.get("overtime", 0))
+        except ValueError as e:
+            warnings.warn(f"{letak or 'absen'}: {e}; dianggap 0", stacklevel=2)
+            return cls(d.get("status", ""), 0)
+
+    def ke_dict(self):
+        return {"status": self.status, "overtime": self.overtime}
+
+    def __eq__(self, lain):
+        return isinstance(lain, HariAbsen) and (self.status, self.overtime) == (lain.status, lain.overtime)
+
+    def __repr__(self):
+        return f"HariAbsen({self.status!r}, {self.overtime})"
+
+
+class Karyawan:
+    __slots__ = ("password", "posisi", "absen")
+
+    def __init__(self, password, posisi, absen=None):
+        self.password = password
+        self.posisi = posisi
+        self.absen = {} if absen is None else absen  # 'YYYY-MM-DD' -> HariAbsen
+
+    @classmethod
+    def dari_dict(cls, d, nama=None):
+        return cls(d.get("password", ""), d.get("posisi", ""),
+                   {dstr: HariAbsen.dari_dict(v, f"{nama}/{dstr}" if nama else dstr)
+                    for dstr, v in d.get("absen", {}).items()})
+
+    def ke_dict(self):
+        return {"password": self.password, "posisi": self.posisi, "absen": self.absen}
+
+    def __repr__(self):
+        return f"Karyawan(posisi={self.posisi!r}, absen={len(self.absen)} hari)"
+
+
+class RincianGaji:
+    """rincian gaji satu karyawan-bulan sebagai kolom paralel, terurut tanggal"""
+    __slots__ = ("date", "status", "overtime", "amount")
+
+    def __init__(self, date=(), status=(), overtime=(), amount=()):
+        self.date, self.status, self.overtime, self.amount = list(date), list(status), list(overtime), list(amount)
+
+    @classmethod
+    def dari_kolom(cls, kolom):
+        if isinstance(kolom, list):  # baris dict (snapshot lama)
+            return cls(*zip(*[(r["date"], r["status"], r["overtime"], r["amount"]) for r in kolom])) if kolom else cls()
+        return cls(kolom["date"], kolom["status"], kolom["overtime"], kolom["amount"])
+
+    def ke_kolom(self):
+        """dict kolom -> list, siap untuk pd.DataFrame"""
+        return {"date": self.date, "status": self.status, "overtime": self.overtime, "amount": self.amount}
+
+    def ke_dicts(self):
+        return [{"date": d, "status": s, "overtime": o, "amount": a}
+                for d, s, o, a in zip(self.date, self.status, self.overtime, self.amount)]
+
+    def __len__(self):
+        return len(self.date)
+
+    def __eq__(self, lain):
+        return isinstance(lain, RincianGaji) and self.ke_kolom() == lain.ke_kolom()
+
+    def __repr__(self):
+        return f"RincianGaji({len(self)} hari)"
+
+
+# ---------------------
+# Konversi DB <-> JSON
+# ---------------------
+def dari_json(db):
+    """ubah db["karyawan"] hasil json.load menjadi Karyawan/HariAbsen (di tempat)"""
+    karyawan = db.get("karyawan")
+    if isinstance(karyawan, dict):
+        for nama, info in karyawan.items():
+            if isinstance(info, dict):
+                karyawan[nama] = Karyawan.dari_dict(info, nama)
+    return db
+
+
+def ke_json(obj):
+    """hook default= untuk json.dump"""
+    if isinstance(obj, (Karyawan, HariAbsen)):
+        return obj.ke_dict()
+    if isinstance(obj, RincianGaji):
+        return obj.ke_kolom()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""Kueri keadaan DB pada waktu lampau ("per tanggal T").
+
+Untuk sengketa payroll: berapa calc_month_salary pada hari gaji dibayar,
+sebelum absen atau tarif diubah sesudahnya. Folder <db>_riwayat/ berisi:
+
+    perubahan.log            satu baris JSON per peristiwa ubah() (format peristiwa
+                             sinkron.py tanpa asal/stempel, ditambah "t" = epoch detik);
+                             hanya ditambah, tidak pernah dirotasi
+    <t>_<offset>.json.gz     checkpoint: isi file DB pada waktu t, offset = ukuran log saat itu
+
+penyimpanan.ubah() memanggil awal() dan catat() di bawah kunci eksklusif DB,
+jadi urutan log sama dengan urutan tulis dan offset checkpoint tepat. Checkpoint
+baru dibuat bila log sudah bertambah CHECKPOINT_BYTE atau CHECKPOINT_DETIK
+berlalu sejak checkpoint terakhir: di bawah kunci hanya menyalin file DB yang
+baru ditulis, kompresi gzip berjalan di thread latar.
+
+Keadaan pada T = checkpoint terakhir dengan t <= T, lalu peristiwa log sesudah
+offset-nya sampai T diterapkan (penyimpanan.terapkan_peristiwa). Biayanya
+O(perubahan sejak checkpoint), bukan O(seluruh riwayat). Hasilnya store baca-saja
+(penyimpanan.Penyimpanan dengan db=...), jadi agregat dashboard dan aturan gaji
+yang sama bisa dipakai apa adanya.
+
+    python riwayat.py databaseghe1.json --aturan harian-8jam --pada 2026-09-30 [--bulan 2026-09] [--nama budi]
+"""
+import argparse
+import gzip
+import json, os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as jam
+
+import aturan_gaji, pemanasan, penyimpanan, rekaman, tarif
+
+CHECKPOINT_BYTE = 8 * 2**20     # log sejak checkpoint terakhir sebelum checkpoint baru
+CHECKPOINT_DETIK = 24 * 3600
+MAKS_ARSIP = 4                  # store lampau yang disimpan di memori per proses
+
+
+def folder(path):
+    return os.path.splitext(path)[0] + "_riwayat"
+
+
+def path_log(path):
+    return os.path.join(folder(path), "perubahan.log")
+
+
+def checkpoint(path):
+    """[(t, offset, file)] urut waktu; file .json (belum dikompres) atau .json.gz"""
+    try:
+        nama = os.listdir(folder(path))
+    except FileNotFoundError:
+        return []
+    hasil = {}
+    for n in nama:
+        dasar = n[:-3] if n.endswith(".gz") else n
+        if not dasar.endswith(".json") or n.startswith("."):
+            continue
+        t, _, off = dasar[:-5].partition("_")
+        try:
+            kunci = (float(t), int(off))
+        except ValueError:
+            continue
+        if n.endswith(".gz") or kunci not in hasil:
+            hasil[kunci] = os.path.join(folder(path), n)
+    return [(t, off, f) for (t, off), f in sorted(hasil.items())]
+
+
+def _ukuran_log(path):
+    try:
+        return os.path.getsize(path_log(path))
+    except FileNotFoundError:
+        return 0
+
+
+# ---------------------
+# Penulisan (dipanggil penyimpanan.ubah di bawah kunci eksklusif)
+# ---------------------
+_terakhir = {}  # path -> (t, offset) checkpoint terakhir yang diketahui proses ini
+
+
+def _checkpoint_terakhir(path):
+    if path not in _terakhir:
+        daftar = checkpoint(path)
+        _terakhir[path] = daftar[-1][:2] if daftar else None
+    return _terakhir[path]
+
+
+def awal(path):
+    """checkpoint dasar dari file DB saat ini bila riwayat belum punya checkpoint"""
+    if os.path.exists(path) and _checkpoint_terakhir(path) is None:
+        _checkpoint(path, time.time(), _ukuran_log(path))
+
+
+def catat(path, peristiwa):
+    """tambahkan peristiwa simpan ke log (sekali tulis), lalu checkpoint bila sudah waktunya"""
+    t = time.time()
+    data = "".join(json.dumps({"t": t, **{k: v for k, v in p.items() if k not in ("asal", "stempel")}},
+                              separators=(",", ":"), default=rekaman.ke_json) + "\n"
+                   for p in peristiwa).encode()
+    os.makedirs(folder(path), exist_ok=True)
+    fd = os.open(path_log(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data)
+        ukuran = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    terakhir = _checkpoint_terakhir(path)
+    if terakhir is None or ukuran - terakhir[1] >= CHECKPOINT_BYTE or t - terakhir[0] >= CHECKPOINT_DETIK:
+        _checkpoint(path, t, ukuran)
+
+
+def _checkpoint(path, t, offset):
+    os.makedirs(folder(path), exist_ok=True)
+    tujuan = os.path.join(folder(path), f"{t:.6f}_{offset}.json")
+    sementara = os.path.join(folder(path), "." + os.path.basename(tujuan))
+    shutil.copyfile(path, sementara)
+    os.replace(sementara, tujuan)
+    _terakhir[path] = (t, offset)
+    threading.Thread(target=_kompres, args=(tujuan,), name="riwayat-gzip", daemon=True).start()
+
+
+def _kompres(file):
+    sementara = os.path.join(os.path.dirname(file), "." + os.path.basename(file) + ".gz")
+    with open(file, "rb") as f, gzip.open(sementara, "wb", compresslevel=6) as g:
+        shutil.copyfileobj(f, g, 2**20)
+    os.replace(sementara, file + ".gz")
+    os.remove(file)
+
+
+# ---------------------
+# Pembacaan keadaan lampau
+# ---------------------
+def epoch(waktu):
+    """epoch detik dari datetime, date (= akhir hari itu, mis. 'per tanggal gaji dibayar') atau angka"""
+    if isinstance(waktu, datetime):
+        return waktu.timestamp()
+    if isinstance(waktu, date):
+        return datetime.combine(waktu, jam.max).timestamp()
+    return float(waktu)
+
+
+def _muat_checkpoint(file):
+    # kompresi latar bisa saja baru mengganti .json dengan .json.gz
+    for f in ((file,) if file.endswith(".gz") else (file, file + ".gz")):
+        try:
+            with (gzip.open(f, "rt") if f.endswith(".gz") else open(f)) as isi:
+                return rekaman.dari_json(json.load(isi))
+        except FileNotFoundError:
+            continue
+    raise FileNotFoundError(file)
+
+
+def bangun(path, waktu):
+    """(db pada epoch waktu, jumlah peristiwa yang diterapkan); ValueError bila riwayat belum mencakupnya"""
+    daftar = [c for c in checkpoint(path) if c[0] <= waktu]
+    if not daftar:
+        semua = checkpoint(path)
+        if not semua:
+            raise ValueError(f"belum ada riwayat untuk {path}")
+        raise ValueError(f"riwayat {path} baru tersedia sejak "
+                         f"{datetime.fromtimestamp(semua[0][0]).isoformat(timespec='seconds')}")
+    _, offset, file = daftar[-1]
+    db = _muat_checkpoint(file)
+    tarif.pastikan_riwayat(db)  # sama seperti saat dimuat penyimpanan
+    n = 0
+    with open(path_log(path), "rb") as f:
+        f.seek(offset)
+        for baris in f:
+            if not baris.endswith(b"\n"):
+                break  # baris yang sedang ditulis
+            p = json.loads(baris)
+            if p["t"] > waktu:
+                break
+            penyimpanan.terapkan_peristiwa(db, p)
+            n += 1
+    return db, n
+
+
+_arsip = OrderedDict()  # (path, waktu) -> Penyimpanan baca-saja
+_arsip_lock = threading.Lock()
+
+
+def pada(path, waktu):
+    """store baca-saja berisi keadaan DB path pada waktu (lihat epoch())"""
+    waktu = epoch(waktu)
+    kunci = (path, waktu)
+    with _arsip_lock:
+        if kunci in _arsip:
+            _arsip.move_to_end(kunci)
+            return _arsip[kunci]
+    sekarang = time.time()
+    store = penyimpanan.Penyimpanan(path, db=bangun(path, waktu)[0])
+    if waktu < sekarang:  # waktu yang masih berjalan bisa mendapat peristiwa baru: jangan di-cache
+        with _arsip_lock:
+            _arsip[kunci] = store
+            while len(_arsip) > MAKS_ARSIP:
+                _arsip.popitem(last=False)
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keadaan DB dan gaji pada waktu lampau")
+    parser.add_argument("db", help="file database JSON (format sistemgaji3/sistemgaji4)")
+    parser.add_argument("--pada", required=True, help="YYYY-MM-DD (akhir hari) atau YYYY-MM-DDTHH:MM[:SS]")
+    parser.add_argument("--bulan", help="YYYY-MM: tampilkan gaji bulan ini per karyawan")
+    parser.add_argument("--nama", nargs="+")
+    aturan_gaji.argumen_cli(parser)
+    args = parser.parse_args()
+
+    waktu = date.fromisoformat(args.pada) if len(args.pada) == 10 else datetime.fromisoformat(args.pada)
+    t0 = time.perf_counter()
+    db, n = bangun(args.db, epoch(waktu))
+    print(f"{len(db['karyawan'])} karyawan, {n} peristiwa diterapkan sejak checkpoint, "
+          f"{time.perf_counter() - t0:.2f} detik")
+    if args.bulan:
+        store = penyimpanan.Penyimpanan(args.db, db=db)
+        names = args.nama or sorted(db["karyawan"])
+        for nama, (total, _) in pemanasan.gaji_banyak(store, aturan_gaji.kompilasi(args.aturan), names, args.bulan).items():
+            print(f"{nama}\t{total}")
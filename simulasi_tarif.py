@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Simulasi tarif (what-if) untuk menu "Edit Tarif Gaji per Posisi".
+
+Jam kerja dijumlahkan SEKALI per (posisi, bulan), lalu ratusan tabel tarif
+kandidat dievaluasi sekaligus lewat satu perkalian matriks:
+
+    payroll[k, m] = sum_p normal[k, p] * jam_normal[p, m]
+                  + sum_p lembur[k, p] * jam_lembur[p, m]
+"""
+import numpy as np
+
+
+# ---------------------
+# Agregasi jam per (posisi, bulan)
+# ---------------------
+def agregasi_jam(db, jam_normal):
+    """
+    kumpulkan jam dari db["karyawan"][*].absen dengan aturan yang sama
+    seperti calc_month_salary:
+    hadir        = jam_normal jam normal
+    hadir+lembur = jam_normal jam normal + overtime jam lembur
+    izin/sakit/cuti = 0
+    return dict {posisi, bulan, normal (P x M), lembur (P x M), pemasukan (M)}
+    """
+    posisi = list(db.get("rates", {}).get("normal", {}).keys())
+    idx_pos = {p: i for i, p in enumerate(posisi)}
+    sel = {}  # (posisi, 'YYYY-MM') -> [jam normal, jam lembur]
+    for info in db.get("karyawan", {}).values():
+        pos = info.posisi
+        if pos not in idx_pos:
+            idx_pos[pos] = len(posisi)
+            posisi.append(pos)
+        for dstr, v in info.absen.items():
+            status = v.status
+            if status == "hadir":
+                lembur = 0
+            elif status == "hadir+lembur":
+                lembur = v.overtime
+            else:
+                continue
+            jam = sel.setdefault((pos, dstr[:7]), [0, 0])
+            jam[0] += jam_normal
+            jam[1] += lembur
+
+    bulan = sorted({ym for _, ym in sel} | set(db.get("pemasukan", {}).keys()))
+    idx_bulan = {ym: j for j, ym in enumerate(bulan)}
+    normal = np.zeros((len(posisi), len(bulan)), dtype=np.int64)
+    lembur = np.zeros((len(posisi), len(bulan)), dtype=np.int64)
+    for (pos, ym), (n, o) in sel.items():
+        normal[idx_pos[pos], idx_bulan[ym]] = n
+        lembur[idx_pos[pos], idx_bulan[ym]] = o
+    pemasukan = np.array([int(db.get("pemasukan", {}).get(ym, 0)) for ym in bulan], dtype=np.int64)
+    return {"posisi": posisi, "bulan": bulan, "normal": normal, "lembur": lembur, "pemasukan": pemasukan}
+
+
+# ---------------------
+# Tabel tarif kandidat
+# ---------------------
+def kandidat_skala(rates, posisi, skala_normal, skala_lembur):
+    """
+    buat grid kandidat dari tarif saat ini: setiap kombinasi
+    (skala_normal[i], skala_lembur[j]) menjadi satu tabel tarif.
+    posisi tanpa tarif (tidak ada di rates) tetap 0, sama seperti .get(pos, 0).
+    return skala (K x 2), normal (K x P), lembur (K x P)
+    """
+    base_n = np.array([rates["normal"].get(p, 0) for p in posisi], dtype=np.float64)
+    base_o = np.array([rates["overtime"].get(p, 0) for p in posisi], dtype=np.float64)
+    sn, so = np.meshgrid(np.asarray(skala_normal, dtype=np.float64),
+                         np.asarray(skala_lembur, dtype=np.float64), indexing="ij")
+    skala = np.column_stack([sn.ravel(), so.ravel()])
+    normal = np.rint(skala[:, :1] * base_n).astype(np.int64)
+    lembur = np.rint(skala[:, 1:] * base_o).astype(np.int64)
+    return skala, normal, lembur
+
+
+# ---------------------
+# Evaluasi semua kandidat
+# ---------------------
+def simulasikan(agregat, normal, lembur):
+    """
+    normal, lembur: K x P (satu baris per tabel tarif kandidat)
+    return dict {bulanan (K x M), tahun (list 'YYYY'), tahunan (K x Y),
+                 pemasukan_tahunan (Y)}
+    """
+    bulanan = normal @ agregat["normal"] + lembur @ agregat["lembur"]
+    tahun = sorted({ym[:4] for ym in agregat["bulan"]})
+    kolom = np.array([tahun.index(ym[:4]) for ym in agregat["bulan"]], dtype=np.int64)
+    # matriks indikator bulan -> tahun, jadi total tahunan juga satu perkalian
+    ke_tahun = np.zeros((len(agregat["bulan"]), len(tahun)), dtype=np.int64)
+    ke_tahun[np.arange(len(kolom)), kolom] = 1
+    return {
+        "bulanan": bulanan,
+        "tahun": tahun,
+        "tahunan": bulanan @ ke_tahun,
+        "pemasukan_tahunan": agregat["pemasukan"] @ ke_tahun,
+    }
+
+
+# ---------------------
+# Proyeksi untuk satu bulan & tahunnya
+# ---------------------
+def proyeksi(agregat, hasil, ym):  # ym = 'YYYY-MM'
+    """
+    ambil kolom bulan ym dan tahun ym[:4] dari hasil simulasikan.
+    bulan/tahun tanpa data -> payroll 0 untuk semua kandidat.
+    """
+    k = hasil["bulanan"].shape[0]
+    if ym in agregat["bulan"]:
+        j = agregat["bulan"].index(ym)
+        payroll_bulan, pemasukan_bulan = hasil["bulanan"][:, j], int(agregat["pemasukan"][j])
+    else:
+        payroll_bulan, pemasukan_bulan = np.zeros(k, dtype=np.int64), 0
+    if ym[:4] in hasil["tahun"]:
+        y = hasil["tahun"].index(ym[:4])
+        payroll_tahun, pemasukan_tahun = hasil["tahunan"][:, y], int(hasil["pemasukan_tahunan"][y])
+    else:
+        payroll_tahun, pemasukan_tahun = np.zeros(k, dtype=np.int64), 0
+    return {
+        "payroll_bulan": payroll_bulan,
+        "pemasukan_bulan": pemasukan_bulan,
+        "payroll_tahun": payroll_tahun,
+        "pemasukan_tahun": pemasukan_tahun,
+    }
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Saluran invalidasi antar proses untuk beberapa worker Streamlit di satu host.
+
+Setiap ubah() menulis file DB lalu menambahkan peristiwanya (satu baris
+JSON per karyawan / bagian yang disimpan) ke <db>_perubahan.log, keduanya di
+bawah kunci eksklusif <db>.lock:
+
+    {"asal": ..., "nama": ..., "ym": ..., "sejak": ..., "stempel": [mtime_ns, size],
+     "karyawan": {...}        # nama (+ ym): data karyawan itu (absen hanya bulan ym)
+     "lain": {...}}           # tanpa nama: semua bagian DB selain "karyawan" (kecil)
+
+Worker lain membaca baris baru sejak posisi terakhirnya (cukup dua os.stat
+bila tidak ada perubahan), menerapkannya ke db di memori dan membuang cache
+yang terdampak saja. File DB dibaca ulang utuh hanya bila log tidak bisa
+diikuti (dirotasi, hilang) atau file diubah tanpa lewat log.
+
+Tanpa fcntl (Windows) kunci tidak dipakai; peristiwa tetap ditulis dan dibaca.
+"""
+import json, os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - bukan POSIX
+    fcntl = None
+
+MAKS_LOG = 8 * 2**20  # log dirotasi (.1) setelah sebesar ini; worker yang tertinggal memuat ulang DB
+
+
+def path_log(path):
+    return os.path.splitext(path)[0] + "_perubahan.log"
+
+
+@contextmanager
+def kunci(path, bersama=False):
+    """kunci antar proses untuk file DB (bersama = pembaca, eksklusif = penulis)"""
+    if fcntl is None or not os.path.isdir(os.path.dirname(path) or "."):
+        yield
+        return
+    with open(path + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_SH if bersama else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def posisi(path):
+    """(inode, ukuran) log saat ini, None bila belum ada log"""
+    try:
+        st = os.stat(path_log(path))
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size)
+
+
+def baca(path, sejak):
+    """
+    peristiwa sesudah posisi sejak; return (daftar peristiwa, posisi baru),
+    atau None bila log sudah dirotasi/terpotong sejak posisi itu
+    """
+    sekarang = posisi(path)
+    if sekarang is None:
+        return ([], None) if sejak is None else None
+    if sejak is None:
+        sejak = (sekarang[0], 0)  # log dibuat sesudah DB dimuat: semua isinya baru
+    if sejak[0] != sekarang[0] or sekarang[1] < sejak[1]:
+        return None
+    if sekarang[1] == sejak[1]:
+        return [], sejak
+    with open(path_log(path), "rb") as f:
+        f.seek(sejak[1])
+        data = f.read(sekarang[1] - sejak[1])
+    utuh = data[:data.rfind(b"\n") + 1]  # baris yang belum selesai ditulis dibaca lain kali
+    return [json.loads(b) for b in utuh.splitlines() if b.strip()], (sejak[0], sejak[1] + len(utuh))
+
+
+def kirim(path, peristiwa, default=None):
+    """tambahkan daftar peristiwa dari satu ubah() (di dalam kunci eksklusif); return posisi log sesudahnya"""
+    log = path_log(path)
+    if os.path.exists(log) and os.path.getsize(log) > MAKS_LOG:
+        os.replace(log, log + ".1")
+    with open(log, "a") as f:
+        f.write("".join(json.dumps(p, default=default) + "\n" for p in peristiwa))
+    return posisi(path)
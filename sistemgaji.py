@@ -7,8 +7,14 @@ Original file is located at
     https://colab.research.google.com/drive/1bd8IgNc1snHzJEV9C8Hf67yzJjmWo5nO
 """
 
+import argparse
+import csv
 import json
 import os
+import sys
+from multiprocessing import Pool
+
+import aturan_gaji, tarif
 
 # ==========================
 # FILE DATABASE
@@ -34,38 +40,37 @@ def save_database(database):
 # ==========================
 # RATE GAJI NORMAL & LEMBUR
 # ==========================
+# Tarif per jam per posisi, format sama dengan db["rates"] di sistemgaji3.py.
+# Bisa diganti/ditambah posisi lewat file TARIF_FILE.
+TARIF_FILE = "tarif_sistemgaji.json"
+RATES_DEFAULT = {
+    "normal": {"intern": 50000, "staff": 100000, "spv": 150000, "manager": 250000},
+    "overtime": {"intern": 20000, "staff": 35000, "spv": 50000, "manager": 100000},
+}
+TABEL_TARIF = tarif.muat_tabel(TARIF_FILE, RATES_DEFAULT)
+ATURAN_GAJI = aturan_gaji.kompilasi("mingguan-8jam")  # hari masuk x 8 jam + jam lembur
+
+
 def gaji_normal(posisi):
-    if posisi == "intern":
-        return 50000
-    elif posisi == "staff":
-        return 100000
-    elif posisi == "spv":
-        return 150000
-    elif posisi == "manager":
-        return 250000
-    else:
-        return 0
+    return TABEL_TARIF.normal[TABEL_TARIF.kode_posisi(posisi)]
 
 
 def gaji_lembur(posisi):
-    if posisi == "intern":
-        return 20000
-    elif posisi == "staff":
-        return 35000
-    elif posisi == "spv":
-        return 50000
-    elif posisi == "manager":
-        return 100000
-    else:
-        return 0
+    return TABEL_TARIF.lembur[TABEL_TARIF.kode_posisi(posisi)]
 
 
 # ==========================
 # HITUNG GAJI PER BULAN
 # ==========================
+def hitung_gaji_dari_minggu(posisi, minggu):
+    # minggu = list of (hari masuk, jam lembur) untuk 4 minggu
+    return aturan_gaji.gaji_mingguan(ATURAN_GAJI, TABEL_TARIF, posisi,
+                                     [{"days": h, "overtime": o} for h, o in minggu])
+
+
 def hitung_gaji_bulanan(posisi):
 
-    total_gaji = 0
+    data_minggu = []
     for minggu in range(1, 5):
         print(f"\n--- Minggu {minggu} ---")
         hari = int(input("Masuk berapa hari minggu ini? (0–7): "))
@@ -75,10 +80,94 @@ def hitung_gaji_bulanan(posisi):
         if lembur == "y":
             lembur_jam = int(input("Berapa jam lembur minggu ini? "))
 
-        gaji_mingguan = (hari * 8 * gaji_normal(posisi)) + (lembur_jam * gaji_lembur(posisi))
-        total_gaji += gaji_mingguan
+        data_minggu.append((hari, lembur_jam))
 
-    return total_gaji
+    return hitung_gaji_dari_minggu(posisi, data_minggu)
+
+
+# ==========================
+# MODE BATCH (NON-INTERAKTIF)
+# ==========================
+# File CSV dengan header:
+# nama,posisi,hari_1,lembur_1,hari_2,lembur_2,hari_3,lembur_3,hari_4,lembur_4
+# kolom lembur boleh kosong (= 0)
+def baca_baris(baris):
+    """return (nama, posisi, weeks x4 {"days", "overtime"}); ValueError bila tidak valid"""
+    try:
+        nama = baris["nama"].strip().lower()
+        posisi = baris["posisi"].strip().lower()
+        if not nama:
+            raise ValueError("nama kosong")
+        weeks = []
+        for i in range(1, 5):
+            h = int(baris[f"hari_{i}"])
+            if not 0 <= h <= 7:
+                raise ValueError(f"hari_{i} harus 0–7")
+            jam = int(baris.get(f"lembur_{i}") or 0)
+            if jam < 0:
+                raise ValueError(f"lembur_{i} tidak boleh negatif")
+            weeks.append({"days": h, "overtime": jam})
+        return nama, posisi, weeks
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"kolom {e} tidak valid")
+
+
+def hitung_potongan(potongan):
+    """
+    potongan = list of (nomor baris, dict CSV); semua baris valid dihitung sekaligus
+    return list of (nomor, nama, posisi, gaji) dan list pesan error
+    """
+    valid, gagal = [], []
+    for nomor, baris in potongan:
+        try:
+            valid.append((nomor,) + baca_baris(baris))
+        except ValueError as e:
+            gagal.append(f"baris {nomor} ({baris.get('nama', '?')}): {e}")
+    gaji = aturan_gaji.hitung_mingguan(ATURAN_GAJI, TABEL_TARIF, [v[2] for v in valid], [v[3] for v in valid])
+    return [(v[0], v[1], v[2], g) for v, g in zip(valid, gaji)], gagal
+
+
+def potong(baris, ukuran):
+    potongan = []
+    for nomor, b in enumerate(baris, start=2):  # baris 1 = header
+        potongan.append((nomor, b))
+        if len(potongan) == ukuran:
+            yield potongan
+            potongan = []
+    if potongan:
+        yield potongan
+
+
+def proses_batch(path, database, proses=1, laporan_tiap=1000):
+    """hitung semua baris file path, tulis database SEKALI di akhir"""
+    berhasil, gagal = 0, []
+    with open(path, newline="", encoding="utf-8") as f:
+        potongan = potong(csv.DictReader(f), laporan_tiap)
+        if proses > 1:
+            pool = Pool(proses)
+            hasil = pool.imap(hitung_potongan, potongan)
+        else:
+            pool = None
+            hasil = map(hitung_potongan, potongan)
+        try:
+            diproses = 0
+            for rows, salah in hasil:
+                for _, nama, posisi, total_gaji in rows:
+                    database[nama] = {"posisi": posisi, "gaji": total_gaji}
+                berhasil += len(rows)
+                gagal.extend(salah)
+                diproses += len(rows) + len(salah)
+                print(f"{diproses} baris diproses...", flush=True)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    save_database(database)
+    print(f"Selesai: {berhasil} karyawan disimpan, {len(gagal)} baris gagal.")
+    for pesan in gagal:
+        print("  -", pesan)
+    return berhasil, gagal
 
 
 # ==========================
@@ -254,4 +343,15 @@ def menu_utama():
 
 
 # Jalankan program
-menu_utama()
\ No newline at end of file
+# python sistemgaji.py                      -> menu interaktif
+# python sistemgaji.py batch data.csv [-p N] -> hitung gaji dari file
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        parser = argparse.ArgumentParser(prog="sistemgaji.py batch")
+        parser.add_argument("file", help="CSV: nama,posisi,hari_1,lembur_1,...,hari_4,lembur_4")
+        parser.add_argument("-p", "--proses", type=int, default=1,
+                            help="jumlah proses paralel (untuk file sangat besar)")
+        args = parser.parse_args(sys.argv[2:])
+        proses_batch(args.file, load_database(), proses=args.proses)
+    else:
+        menu_utama()
@@ -4,6 +4,8 @@ import json
 import os
 import pandas as pd
 
+import aturan_gaji, tarif
+
 # ---------------------------
 # Konfigurasi file database
 # ---------------------------
@@ -21,36 +23,34 @@ def save_data(data):
 
 # ---------------------------
 # Tarif gaji normal & lembur
+# (format sama dengan db["rates"] di sistemgaji3.py; bisa diganti lewat TARIF_FILE)
 # ---------------------------
+TARIF_FILE = "tarif_sistemgaji2.json"
+RATES_DEFAULT = {
+    "normal": {"intern": 35000, "staff": 50000, "spv": 100000, "manager": 200000},
+    "overtime": {"intern": 20000, "staff": 40000, "spv": 55000, "manager": 65000},
+}
+TABEL_TARIF = tarif.muat_tabel(TARIF_FILE, RATES_DEFAULT)
+POSISI = TABEL_TARIF.daftar_posisi
+ATURAN_GAJI = aturan_gaji.kompilasi("mingguan-8jam")  # hari masuk x 8 jam + jam lembur
+
 def gaji_normal(posisi):
-    p = posisi.lower()
-    if p == "intern": return 35000
-    if p == "staff": return 50000
-    if p == "spv": return 100000
-    if p == "manager": return 200000
-    return 0
+    return TABEL_TARIF.normal[TABEL_TARIF.kode_posisi(posisi)]
 
 def gaji_lembur(posisi):
-    p = posisi.lower()
-    if p == "intern": return 20000
-    if p == "staff": return 40000
-    if p == "spv": return 55000
-    if p == "manager": return 65000
-    return 0
+    return TABEL_TARIF.lembur[TABEL_TARIF.kode_posisi(posisi)]
 
 # ---------------------------
 # Hitung gaji bulanan dari data 4 minggu
 # weeks = list of dicts: [{"days":int,"overtime":int}, ...]
 # ---------------------------
 def calculate_monthly(posisi, weeks):
-    total = 0
-    for w in weeks:
-        days = int(w.get("days", 0))
-        overtime = int(w.get("overtime", 0))
-        jam_normal = days * 8
-        gaji_minggu = (jam_normal * gaji_normal(posisi)) + (overtime * gaji_lembur(posisi))
-        total += gaji_minggu
-    return total
+    return aturan_gaji.gaji_mingguan(ATURAN_GAJI, TABEL_TARIF, posisi, weeks)
+
+# versi massal: banyak karyawan sekaligus, satu panggilan evaluator
+# posisi_list = [posisi, ...], weeks_list = [weeks, ...] (sama panjang)
+def calculate_monthly_batch(posisi_list, weeks_list):
+    return aturan_gaji.hitung_mingguan(ATURAN_GAJI, TABEL_TARIF, posisi_list, weeks_list)
 
 # ---------------------------
 # Utility formatting
@@ -118,14 +118,14 @@ elif menu == "Bendahara":
 
     # Setelah login
     st.info(f"Login sebagai: {st.session_state.bendahara_email}")
-    action = st.selectbox("Aksi Bendahara", ["Input Data Karyawan", "Lihat Database", "Edit Data Karyawan", "Hapus Data Karyawan", "Logout"])
+    action = st.selectbox("Aksi Bendahara", ["Input Data Karyawan", "Lihat Database", "Edit Data Karyawan", "Hapus Data Karyawan", "Hitung Ulang Semua Gaji", "Logout"])
 
     # ---------- Input Data ----------
     if action == "Input Data Karyawan":
         st.subheader("➕ Input Data Karyawan (4 minggu)")
         with st.form("input_karyawan", clear_on_submit=False):
             nama = st.text_input("Nama karyawan").strip().lower()
-            posisi = st.selectbox("Posisi", ["intern", "staff", "spv", "manager"])
+            posisi = st.selectbox("Posisi", POSISI)
             st.markdown("**Masukkan data per minggu (hari masuk & jam lembur)**")
             weeks = []
             cols = st.columns(4)
@@ -192,7 +192,7 @@ elif menu == "Bendahara":
                 st.markdown("**Ubah data**")
                 with st.form("edit_form"):
                     nama_baru = st.text_input("Nama baru (biarkan kosong jika tidak ingin ubah)", value=pilihan).strip().lower()
-                    posisi_baru = st.selectbox("Posisi baru", ["intern","staff","spv","manager"], index=["intern","staff","spv","manager"].index(item['posisi']))
+                    posisi_baru = st.selectbox("Posisi baru", POSISI, index=POSISI.index(item['posisi']) if item['posisi'] in POSISI else 0)
                     # allow recalc weeks
                     st.write("Ubah minggu (opsional, kosongkan untuk pakai data lama)")
                     new_weeks = []
@@ -232,6 +232,19 @@ elif menu == "Bendahara":
                     st.success(f"Data {pilih} telah dihapus.")
                     st.experimental_rerun()
 
+    # ---------- Hitung Ulang Semua Gaji ----------
+    elif action == "Hitung Ulang Semua Gaji":
+        st.subheader("🔄 Hitung Ulang Semua Gaji")
+        st.write("Hitung ulang gaji semua karyawan dari data mingguan dengan tarif saat ini:")
+        st.table(pd.DataFrame({"Normal": TABEL_TARIF.normal[1:], "Lembur": TABEL_TARIF.lembur[1:]}, index=POSISI))
+        if st.button("Hitung Ulang"):
+            names = [n for n in db if "weeks" in db[n]]
+            totals = calculate_monthly_batch([db[n]["posisi"] for n in names], [db[n]["weeks"] for n in names])
+            for n, total in zip(names, totals):
+                db[n]["gaji"] = total
+            save_data(db)
+            st.success(f"Gaji {len(names)} karyawan dihitung ulang.")
+
     # ---------- Logout ----------
     elif action == "Logout":
         st.session_state.bendahara_logged = False
@@ -9,75 +9,107 @@ Original file is located at
 
 # app.py
 import streamlit as st
-import json, os
+import json, os, time
 import pandas as pd
 from datetime import date, datetime
 import altair as alt
 from calendar import monthrange
+import absensi, audit, aturan_gaji, grafik, jendela, kalender, pemanasan, pemindai, penyimpanan, perusahaan, peringkat, rekaman, riwayat, simulasi_tarif, slip_gaji, tarif, tutup_buku
 
 # ---------------------
 # Config / DB filename
 # ---------------------
-DB_FILE = "databaseghe1.json"
+DB_NAMA = "databaseghe1.json"
+# banyak perusahaan: satu folder per perusahaan di perusahaan/<kode>/ (lihat perusahaan.py),
+# dipilih sebelum login dan terkunci selama sesi login; tanpa folder itu pakai DB_NAMA saja
+PERUSAHAAN = perusahaan.daftar()
+if PERUSAHAAN:
+    sudah_login = bool(st.session_state.get("karyawan") or st.session_state.get("bendahara"))
+    kode_perusahaan = st.sidebar.selectbox("Perusahaan", PERUSAHAAN, key="perusahaan", disabled=sudah_login)
+    DB_FILE = perusahaan.path_db(kode_perusahaan, DB_NAMA)
+else:
+    DB_FILE = DB_NAMA
+ATURAN_GAJI = aturan_gaji.kompilasi("harian-8jam")  # set aturan gaji (lihat aturan_gaji.py)
+JAM_NORMAL = ATURAN_GAJI.jam_per("hadir")  # jam kerja normal per hari "hadir"
+PEMANASAN = pemanasan.BAGIAN  # cache yang disiapkan saat proses mulai (lihat pemanasan.py)
+PEMANASAN_BULAN = 2           # bulan berjalan + bulan lalu
 
 # ---------------------
 # Utility: load/save DB
 # ---------------------
-def load_db():
-    if not os.path.exists(DB_FILE):
-        # default structure
-        return {
-            "karyawan": {},    # name -> {password, posisi, weeks? (optional), absen: { 'YYYY-MM-DD': {status, overtime}}}
-            "pemasukan": {},   # 'YYYY-MM' -> int
-            "rates": {         # default rates
-                "normal": {"intern":35000,"staff":50000,"spv":100000,"manager":200000},
-                "overtime": {"intern":20000,"staff":40000,"spv":55000,"manager":65000}
-            }
-        }
-    with open(DB_FILE, "r") as f:
-        return json.load(f)
-
-def save_db(db):
-    with open(DB_FILE, "w") as f:
-        json.dump(db, f, indent=4)
-
-db = load_db()
+# satu objek Penyimpanan per file, dipakai ulang antar rerun & sesi (LRU, lihat penyimpanan.py);
+# sesudah restart DB dimuat & dipanaskan di thread latar, run ini hanya menunggu sebentar lalu diulang
+pemanasan.mulai(DB_FILE, ATURAN_GAJI, PEMANASAN, PEMANASAN_BULAN)
+if not pemanasan.tunggu_dimuat(DB_FILE, timeout=2):
+    st.info("Memuat database…")
+    st.rerun()
+store = penyimpanan.buka(DB_FILE)
+
+def save_db(ubah, nama=None, ym=None, sejak=None):
+    # ubah(db) dijalankan di bawah kunci store lalu disimpan (lihat Penyimpanan.ubah), jadi sesi
+    # lain tidak bisa mengubah db selagi ditulis; nama/ym/sejak: bagian cache gaji yang terdampak
+    return store.ubah(ubah, nama=nama, ym=ym, sejak=sejak)
+
+def tambah_karyawan(d, nama, pw, posisi):
+    if nama in d["karyawan"]:
+        return False  # didaftarkan sesi lain lebih dulu
+    d["karyawan"][nama] = rekaman.Karyawan(pw, posisi)
+
+db = store.db
+
+# bulan yang sudah berakhir ditutup otomatis oleh thread latar (lihat tutup_buku.py)
+tutup_buku.mulai_penjadwal(store, ATURAN_GAJI)
 
 # ---------------------
 # Salary calculation
 # ---------------------
 def calc_month_salary(name, ym):  # ym = 'YYYY-MM'
+    if tutup_buku.tertutup(db, ym):  # bulan sudah ditutup: hanya dari snapshot
+        return tutup_buku.gaji(store, ym, [name])[name]
+    return store.gaji_bulan(name, ym, hitung_month_salary)
+
+def hitung_month_salary(name, ym):
     """
-    iterate attendance entries for that month and compute:
+    iterate attendance entries for that month (via aturan_gaji) and compute:
     hadir = 8h * normal_rate
     hadir+lembur = 8h*normal + overtime_hours*overtime_rate
     izin/sakit/cuti = 0
-    return total_amount, detail_rows(list of tuples)
+    return total_amount, detail_rows (rekaman.RincianGaji)
     """
-    if name not in db["karyawan"]:
-        return 0, []
-    pos = db["karyawan"][name]["posisi"]
-    normal_rate = db["rates"]["normal"].get(pos, 0)
-    ot_rate = db["rates"]["overtime"].get(pos, 0)
-    total = 0
-    rows = []
-    # iterate absen keys
-    absen = db["karyawan"][name].get("absen", {})
-    for dstr, info in absen.items():
-        if dstr.startswith(ym):
-            status = info.get("status","")
-            overtime = int(info.get("overtime",0))
-            if status == "hadir":
-                amt = 8 * normal_rate
-                total += amt
-                rows.append({"date": dstr, "status": status, "overtime": 0, "amount": amt})
-            elif status == "hadir+lembur":
-                amt = 8 * normal_rate + overtime * ot_rate
-                total += amt
-                rows.append({"date": dstr, "status": status, "overtime": overtime, "amount": amt})
-            else: # izin/sakit/cuti
-                rows.append({"date": dstr, "status": status, "overtime": 0, "amount": 0})
-    return int(total), rows
+    return aturan_gaji.hitung_bulan(store, ATURAN_GAJI, [name], ym)[name]
+
+def calc_month_salaries(names, ym):
+    # banyak karyawan sekaligus: yang belum ada di cache dihitung dalam satu panggilan evaluator
+    return pemanasan.gaji_banyak(store, ATURAN_GAJI, names, ym)
+
+def pilih_per_tanggal(key):
+    """opsi 'per tanggal' (riwayat.py): store baca-saja keadaan akhir tanggal itu, None = data saat ini"""
+    if not st.checkbox("Lihat keadaan data per tanggal tertentu", key=f"{key}_aktif"):
+        return None
+    pada = st.date_input("Keadaan data per akhir tanggal", value=date.today(), key=f"{key}_tanggal")
+    try:
+        return riwayat.pada(DB_FILE, pada)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+
+def tunggu_pemanasan():
+    """selama cache bulan ini & lalu disiapkan, tampilkan progres lalu jalankan ulang (bukan menghitung sendiri)"""
+    info = pemanasan.status(DB_FILE)
+    if not info or info.get("siap") or "error" in info:
+        return
+    st.info(f"Menyiapkan data bulan ini & bulan lalu… ({info['langkah']}/{info['total'] or '?'})")
+    time.sleep(1)
+    st.rerun()
+
+# ---------------------
+# Simulasi tarif (what-if)
+# ---------------------
+@st.cache_data(show_spinner=False)
+def agregat_jam(_db, path, stempel, versi):
+    # stempel file + versi store jadi kunci cache: versi naik setiap perubahan (juga dari
+    # worker lain lewat log sinkron), mtime saja bisa sama untuk dua tulis yang berdekatan
+    return simulasi_tarif.agregasi_jam(_db, JAM_NORMAL)
 
 # ---------------------
 # Helper: format Rupiah
@@ -88,6 +120,135 @@ def rp(x):
     except:
         return f"Rp {x}"
 
+# ---------------------
+# Dashboard Evaluasi Bulanan: bagian per fragment
+# ---------------------
+# setiap bagian dihitung hanya bila dipilih; widget di dalamnya menjalankan ulang
+# bagian itu saja (st.fragment, lihat tampilkan_bagian), dan hasil hitung di-cache lewat
+# store.memo(..., bulan=...): hanya dihitung ulang bila feed perubahan menyentuh bulan itu.
+# Agregat utama ada di pemanasan.py supaya pemanasan saat start mengisi cache yang sama.
+def papan_peringkat(bagian):
+    """widget k + urutan milik satu bagian; return (k, terbawah, label urutan)"""
+    # papan peringkat: hanya k baris yang dipilih (heap), bukan sort semua karyawan
+    col1, col2 = st.columns(2)
+    with col1:
+        k = int(st.number_input("Jumlah karyawan per papan peringkat (k)", min_value=1, max_value=100, value=10,
+                                key=f"k_{bagian}"))
+    with col2:
+        urutan = st.radio("Urutan", ["Teratas", "Terbawah"], horizontal=True, key=f"urutan_{bagian}")
+    return k, urutan == "Terbawah", urutan
+
+def bagian_gaji(ym_str):
+    k, terbawah, urutan = papan_peringkat("gaji")
+    # total pengeluaran gaji per bulan: sum of calc_month_salary
+    rows = pemanasan.gaji(store, ATURAN_GAJI, ym_str)
+    if not rows:
+        st.info("Belum ada data gaji untuk bulan ini.")
+        return
+    df = pd.DataFrame(peringkat.teratas(rows, "gaji", k, terbawah))
+    df["gaji_fmt"] = df["gaji"].map(lambda x: f"{int(x):,}")
+    st.markdown(f"**Tabel Gaji Karyawan (bulan) — {urutan} {k}**")
+    st.dataframe(df[["nama","posisi","gaji_fmt"]].rename(columns={"nama":"Nama","posisi":"Posisi","gaji_fmt":"Gaji (Rp)"}), use_container_width=True)
+
+    total_pengeluaran = sum(r["gaji"] for r in rows)
+    st.metric("Total Pengeluaran Gaji (bulan)", rp(total_pengeluaran))
+    # pemasukan bulan
+    pemasukan_val = tutup_buku.dari_snapshot(store, ym_str, "pemasukan", lambda: db.get("pemasukan", {}).get(ym_str, 0))
+    st.metric("Pemasukan (bulan)", rp(pemasukan_val))
+
+def bagian_tahunan(ym_str):
+    # pengeluaran per tahun (sum months for that year), sekaligus seri grafik per bulan
+    year = ym_str[:4]
+    bulan_tahun = [f"{year}-{m:02d}" for m in range(1,13)]
+    seri = pemanasan.seri_payroll(store, ATURAN_GAJI, year)
+    total_pengeluaran_year = sum(r["payroll"] for r in seri)
+    st.metric("Total Pengeluaran (tahun)", rp(total_pengeluaran_year))
+    st.markdown("**Payroll vs Pemasukan per Bulan**")
+    st.altair_chart(store.memo(("grafik_payroll", year), lambda: grafik.grafik_payroll(seri), bulan=bulan_tahun), use_container_width=True)
+
+def bagian_kinerja(ym_str):
+    k, terbawah, urutan = papan_peringkat("kinerja")
+    # attendance performance: compute % hadir (hadir + hadir+lembur considered hadir) over total working days recorded
+    perf_rows = pemanasan.kinerja(store, ATURAN_GAJI, ym_str)
+    perf_top = peringkat.teratas(perf_rows, "attendance_rate", k, terbawah)
+    if not perf_top:
+        st.info("Belum ada data karyawan.")
+        return
+    perf_df = pd.DataFrame(perf_top)
+    st.markdown(f"**Kinerja Kehadiran Karyawan (%) — {urutan} {k}**")
+    st.table(perf_df[["nama","hadir","recorded_days","attendance_rate"]].rename(columns={"nama":"Nama","hadir":"Hadir","recorded_days":"Hari Tercatat","attendance_rate":"% Kehadiran"}))
+    tanpa_absen = sum(1 for r in perf_rows if r["attendance_rate"] is None)
+    if tanpa_absen:
+        st.caption(f"{tanpa_absen} karyawan belum punya catatan absen bulan ini.")
+    # chart: top/bottom k attendance + histogram (jumlah titik tidak tergantung jumlah karyawan)
+    ringkas = store.memo(("ringkas_kehadiran", ym_str, k), lambda: grafik.ringkas_kehadiran(perf_rows, k), bulan=ym_str)
+    if ringkas["teratas"]:
+        chart_peringkat, chart_sebaran = store.memo(("grafik_kehadiran", ym_str, k), lambda: grafik.grafik_kehadiran(ringkas), bulan=ym_str)
+        st.altair_chart(chart_peringkat, use_container_width=True)
+        st.altair_chart(chart_sebaran, use_container_width=True)
+
+def bagian_kalender(ym_str):
+    k, terbawah, _ = papan_peringkat("kalender")
+    # kehadiran terhadap hari kerja kalender (hari tanpa absen ikut terhitung; bulan berjalan: sampai hari ini)
+    rekap = pemanasan.rekap_kalender(store, ATURAN_GAJI, ym_str)
+    st.markdown("**Kehadiran vs Hari Kerja (kalender)**")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Hari kerja", rekap["hari_kerja"])
+    col2.metric("Hari kerja tanpa absen (semua karyawan)", rekap["total_tidak_tercatat"])
+    col3.metric("Payroll harapan (hadir penuh)", rp(rekap["total_harapan"]))
+    kal_top = peringkat.teratas(rekap["rows"], "tidak_tercatat", k, terbawah)
+    if kal_top:
+        st.table(pd.DataFrame(kal_top)[["nama","hadir","hari_kerja","tidak_tercatat","attendance_rate"]].rename(columns={"nama":"Nama","hadir":"Hadir (hari kerja)","hari_kerja":"Hari Kerja","tidak_tercatat":"Tanpa Absen","attendance_rate":"% Kehadiran"}))
+
+def bagian_lembur(ym_str):
+    k, terbawah, urutan = papan_peringkat("lembur")
+    # ringkasan lembur
+    st.markdown(f"**Ringkasan Lembur (total jam per karyawan bulan ini) — {urutan} {k}**")
+    ot_rows = pemanasan.lembur(store, ATURAN_GAJI, ym_str)
+    if ot_rows:
+        ot_df = pd.DataFrame(peringkat.teratas(ot_rows, "total_overtime", k, terbawah))
+        st.table(ot_df.rename(columns={"nama":"Nama","total_overtime":"Jam Lembur"}))
+    else:
+        st.info("Belum ada data lembur untuk bulan ini.")
+
+def bagian_papan(ym_str):
+    # selalu hari ini; diperbarui per karyawan yang berubah (absensi.PapanHarian), bukan dihitung ulang
+    hari_ini = date.today().strftime("%Y-%m-%d")
+    papan = store.papan_harian(hari_ini)
+    st.markdown(f"**Papan Absen {hari_ini}** — versi data {store.versi}")
+    rekap = papan.rekap(len(db["karyawan"]))
+    for col, (status, n) in zip(st.columns(len(rekap)), rekap.items()):
+        col.metric(status.title(), n)
+    terbaru = papan.terbaru[-10:][::-1]
+    if terbaru:
+        st.table(pd.DataFrame([{"Nama": n.title(), "Status": papan.status[n].status, "Lembur (jam)": papan.status[n].overtime}
+                               for n in terbaru if n in papan.status]))
+
+BAGIAN_DASHBOARD = {
+    "Gaji Karyawan": bagian_gaji,
+    "Pengeluaran Tahunan": bagian_tahunan,
+    "Kinerja Kehadiran": bagian_kinerja,
+    "Kehadiran vs Hari Kerja": bagian_kalender,
+    "Ringkasan Lembur": bagian_lembur,
+    "Papan Absen Hari Ini": bagian_papan,
+}
+
+def tampilkan_bagian(bagian, ym_str, interval=None, arsip=None):
+    """
+    satu bagian sebagai fragment; dengan interval (detik) fragment dijalankan ulang sendiri;
+    arsip = store keadaan lampau (riwayat.pada) menggantikan store untuk bagian ini
+    """
+    def jalankan():
+        global db, store
+        if arsip is None:
+            store = penyimpanan.buka(DB_FILE)
+            store.segarkan()  # perubahan dari proses lain; perubahan di proses ini sudah ada di feed
+        else:
+            store = arsip
+        db = store.db
+        BAGIAN_DASHBOARD[bagian](ym_str)
+    st.fragment(jalankan, run_every=interval)()
+
 # ---------------------
 # Auth (karyawan & bendahara)
 # ---------------------
@@ -119,11 +280,10 @@ def karyawan_register():
             st.warning("Isi nama dan password.")
         else:
             key = nama.strip().lower()
-            if key in db["karyawan"]:
+            if save_db(lambda d: tambah_karyawan(d, key, pw, posisi), nama=key) is False:
                 st.error("Nama sudah terdaftar, gunakan nama lain atau login.")
             else:
-                db["karyawan"][key] = {"password": pw, "posisi": posisi, "absen": {}}
-                save_db(db)
+                audit.catat(DB_FILE, key, [audit.entri("tambah_karyawan", f"karyawan/{key}", baru={"posisi": posisi}, nama=key)])
                 st.success("Pendaftaran berhasil. Silakan login di panel Karyawan.")
 
 def karyawan_login():
@@ -132,7 +292,7 @@ def karyawan_login():
     pw = st.text_input("Password", type="password", key="login_pw")
     if st.button("Login Karyawan"):
         key = nama.strip().lower()
-        if key in db["karyawan"] and db["karyawan"][key].get("password") == pw:
+        if key in db["karyawan"] and db["karyawan"][key].password == pw:
             st.session_state["karyawan"] = key
             st.success(f"Login berhasil: {key.title()}")
             st.experimental_rerun()
@@ -149,12 +309,20 @@ menu = st.sidebar.selectbox("Menu Utama", ["Beranda","Bendahara","Karyawan","Kel
 st.sidebar.markdown("---")
 # quick info
 st.sidebar.write(f"Total karyawan: {len(db['karyawan'])}")
+hangat = pemanasan.status(DB_FILE)
+if hangat.get("siap"):
+    st.sidebar.caption(f"Cache siap ({hangat['detik']} detik sejak {hangat['mulai']})")
+elif "error" in hangat:
+    st.sidebar.warning(f"Pemanasan cache gagal: {hangat['error']}")
+elif hangat:
+    st.sidebar.caption(f"Menyiapkan cache… {hangat['langkah']}/{hangat['total'] or '?'}")
 
 # ---------------------
 # BERANDA
 # ---------------------
 if menu == "Beranda":
     st.header("Ringkasan Singkat")
+    tunggu_pemanasan()
     total_k = len(db["karyawan"])
 
     # bulan & tahun saat ini
@@ -162,7 +330,7 @@ if menu == "Beranda":
     cur_ym = today.strftime("%Y-%m")
 
     # total payroll bulan ini
-    total_payroll = sum(calc_month_salary(name, cur_ym)[0] for name in db["karyawan"].keys())
+    total_payroll = sum(total for total, _ in calc_month_salaries(list(db["karyawan"]), cur_ym).values())
 
     # pemasukan bulan ini
     total_pemasukan = db.get("pemasukan", {}).get(cur_ym, 0)
@@ -190,12 +358,19 @@ elif menu == "Bendahara":
     st.success("Akses Bendahara aktif.")
     action = st.selectbox("Pilih Aksi", [
         "Dashboard Evaluasi Bulanan",
+        "Metrik Bergulir (N hari)",
         "Input Data Karyawan",
         "Lihat Database",
         "Edit Karyawan",
         "Hapus Karyawan",
         "Input Pemasukan Bulanan",
         "Edit Tarif Gaji per Posisi",
+        "Atur Kalender Kerja",
+        "Tutup Buku Bulanan",
+        "Pemindaian Anomali",
+        "Slip Gaji Massal",
+        "Log Audit",
+        "Statistik Perusahaan",
         "Logout Bendahara"
     ])
 
@@ -206,67 +381,51 @@ elif menu == "Bendahara":
         ym = st.date_input("Pilih bulan (pilih tanggal dalam bulan yang diinginkan):", value=date.today())
         ym_str = ym.strftime("%Y-%m")
         st.write(f"Menampilkan data untuk: **{ym_str}**")
-        # total pengeluaran gaji per bulan: sum of calc_month_salary
-        rows = []
-        for name in db["karyawan"].keys():
-            total, details = calc_month_salary(name, ym_str)
-            rows.append({"nama": name.title(), "posisi": db["karyawan"][name]["posisi"], "gaji": total})
-        df = pd.DataFrame(rows)
-        if df.empty:
-            st.info("Belum ada data gaji untuk bulan ini.")
+        arsip = pilih_per_tanggal("dash_pada")
+        if arsip is None:
+            tunggu_pemanasan()
+        # hanya bagian yang dipilih yang dihitung (lihat BAGIAN_DASHBOARD)
+        pilihan = st.multiselect("Bagian yang ditampilkan", list(BAGIAN_DASHBOARD),
+                                 default=["Gaji Karyawan"], key="bagian_dashboard")
+        col1, col2 = st.columns(2)
+        with col1:
+            otomatis = st.toggle("Segarkan otomatis", key="dash_otomatis")
+        with col2:
+            detik = st.number_input("Interval (detik)", min_value=2, max_value=600, value=5, key="dash_interval",
+                                    disabled=not otomatis)
+        if not pilihan:
+            st.info("Pilih bagian dashboard yang ingin ditampilkan.")
+        for bagian in pilihan:
+            st.markdown("---")
+            tampilkan_bagian(bagian, ym_str, int(detik) if otomatis else None, arsip)
+
+    # ----------------- Metrik Bergulir -----------------
+    elif action == "Metrik Bergulir (N hari)":
+        st.subheader("📈 Metrik Bergulir")
+        st.caption("Kehadiran, lembur dan payroll untuk N hari terakhir (bukan per bulan kalender).")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            hari = st.number_input("Jumlah hari", min_value=1, max_value=3660, value=30, step=1)
+        with col2:
+            sampai = st.date_input("Sampai tanggal", value=date.today(), key="jendela_sampai").strftime("%Y-%m-%d")
+        with col3:
+            per = st.radio("Kelompok", ["Posisi", "Karyawan"], horizontal=True)
+        m = jendela.metrik(store, ATURAN_GAJI)
+        if per == "Posisi":
+            rows = m.per_posisi(int(hari), sampai)
         else:
-            df = df.sort_values("gaji", ascending=False)
-            df["gaji_fmt"] = df["gaji"].map(lambda x: f"{int(x):,}")
-            st.markdown("**Tabel Gaji Karyawan (bulan)**")
-            st.dataframe(df[["nama","posisi","gaji_fmt"]].rename(columns={"nama":"Nama","posisi":"Posisi","gaji_fmt":"Gaji (Rp)"}), use_container_width=True)
-
-            total_pengeluaran = int(df["gaji"].sum())
-            st.metric("Total Pengeluaran Gaji (bulan)", rp(total_pengeluaran))
-            # pemasukan bulan
-            pemasukan_val = db.get("pemasukan", {}).get(ym_str, 0)
-            st.metric("Pemasukan (bulan)", rp(pemasukan_val))
-            # pengeluaran per tahun (sum months for that year)
-            year = ym.strftime("%Y")
-            total_pengeluaran_year = 0
-            for m in range(1,13):
-                ym2 = f"{year}-{m:02d}"
-                total_pengeluaran_year += sum(calc_month_salary(name, ym2)[0] for name in db["karyawan"].keys())
-            st.metric("Total Pengeluaran (tahun)", rp(total_pengeluaran_year))
-
-            # attendance performance: compute % hadir (hadir + hadir+lembur considered hadir) over total working days recorded
-            perf_rows = []
-            for name in db["karyawan"].keys():
-                absen = db["karyawan"][name].get("absen", {})
-                total_days = sum(1 for d in absen.keys() if d.startswith(ym_str))
-                hadir_days = sum(1 for d,v in absen.items() if d.startswith(ym_str) and v.get("status") in ["hadir","hadir+lembur"])
-                perf_rows.append({"nama": name.title(), "hadir": hadir_days, "recorded_days": total_days, "attendance_rate": (hadir_days/total_days*100) if total_days>0 else None})
-            perf_df = pd.DataFrame(perf_rows)
-            if not perf_df.empty:
-                perf_df = perf_df.sort_values("attendance_rate", na_position="last", ascending=False)
-                st.markdown("**Kinerja Kehadiran Karyawan (%)**")
-                st.table(perf_df[["nama","hadir","recorded_days","attendance_rate"]].rename(columns={"nama":"Nama","hadir":"Hadir","recorded_days":"Hari Tercatat","attendance_rate":"% Kehadiran"}).fillna("-"))
-                # chart: top 10 attendance
-                chart_df = perf_df.dropna(subset=["attendance_rate"])
-                if not chart_df.empty:
-                    chart = alt.Chart(chart_df.reset_index()).mark_bar().encode(
-                        x=alt.X("attendance_rate:Q", title="% Kehadiran"),
-                        y=alt.Y("nama:N", sort='-x', title="Karyawan")
-                    )
-                    st.altair_chart(chart, use_container_width=True)
-
-            # ringkasan lembur
-            st.markdown("**Ringkasan Lembur (total jam per karyawan bulan ini)**")
-            ot_rows = []
-            for name in db["karyawan"].keys():
-                absen = db["karyawan"][name].get("absen", {})
-                total_ot = sum(int(v.get("overtime",0)) for d,v in absen.items() if d.startswith(ym_str))
-                if total_ot>0:
-                    ot_rows.append({"nama":name.title(),"total_overtime": total_ot})
-            ot_df = pd.DataFrame(ot_rows)
-            if not ot_df.empty:
-                st.table(ot_df.sort_values("total_overtime", ascending=False).rename(columns={"nama":"Nama","total_overtime":"Jam Lembur"}))
-            else:
-                st.info("Belum ada data lembur untuk bulan ini.")
+            rows = m.per_karyawan(int(hari), sampai)
+        if not rows:
+            st.info("Belum ada data karyawan.")
+        else:
+            df = pd.DataFrame(rows)
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Total payroll", rp(int(df["payroll"].sum())))
+            c2.metric("Total jam lembur", int(df["overtime"].sum()))
+            tercatat = int(df["recorded_days"].sum())
+            c3.metric("Rata-rata kehadiran", f"{df['hadir'].sum() / tercatat * 100:.1f}%" if tercatat else "-")
+            df["payroll"] = df["payroll"].apply(rp)
+            st.dataframe(df, use_container_width=True)
 
     # ----------------- Input Data Karyawan -----------------
     elif action == "Input Data Karyawan":
@@ -279,19 +438,20 @@ elif menu == "Bendahara":
             if submitted:
                 if not nama or not pw:
                     st.warning("Nama & password harus diisi.")
-                elif nama in db["karyawan"]:
+                elif save_db(lambda d: tambah_karyawan(d, nama, pw, posisi), nama=nama) is False:
                     st.error("Nama sudah ada.")
                 else:
-                    db["karyawan"][nama] = {"password": pw, "posisi": posisi, "absen": {}}
-                    save_db(db)
+                    audit.catat(DB_FILE, BEND_EMAIL, [audit.entri("tambah_karyawan", f"karyawan/{nama}",
+                                                                  baru={"posisi": posisi}, nama=nama)])
                     st.success("Karyawan tersimpan.")
 
     # ----------------- Lihat Database -----------------
     elif action == "Lihat Database":
         st.subheader("📋 Lihat Database Karyawan")
+        gaji = calc_month_salaries(list(db["karyawan"]), date.today().strftime("%Y-%m"))
         rows = []
         for name, info in db["karyawan"].items():
-            rows.append({"Nama": name.title(), "Posisi": info.get("posisi",""), "Gaji (est.)": calc_month_salary(name, date.today().strftime("%Y-%m"))[0]})
+            rows.append({"Nama": name.title(), "Posisi": info.posisi, "Gaji (est.)": gaji[name][0]})
         df = pd.DataFrame(rows)
         if df.empty:
             st.info("Database kosong.")
@@ -309,13 +469,21 @@ elif menu == "Bendahara":
             pilih = st.selectbox("Pilih karyawan", all_names)
             info = db["karyawan"][pilih]
 
-            new_pw = st.text_input("Password baru (opsional)", value=info["password"])
-            new_pos = st.selectbox("Posisi", ["intern","staff","spv","manager"], index=["intern","staff","spv","manager"].index(info["posisi"]))
+            new_pw = st.text_input("Password baru (opsional)", value=info.password)
+            new_pos = st.selectbox("Posisi", ["intern","staff","spv","manager"], index=["intern","staff","spv","manager"].index(info.posisi))
 
             if st.button("Simpan Perubahan"):
-                db["karyawan"][pilih]["password"] = new_pw
-                db["karyawan"][pilih]["posisi"] = new_pos
-                save_db(db)
+                # password tidak ditulis ke log, hanya fakta bahwa ia diganti
+                perubahan = []
+                if new_pos != info.posisi:
+                    perubahan.append(audit.entri("ubah_posisi", f"karyawan/{pilih}/posisi", info.posisi, new_pos, nama=pilih))
+                if new_pw != info.password:
+                    perubahan.append(audit.entri("ubah_password", f"karyawan/{pilih}/password", nama=pilih))
+                def ubah_karyawan(d):
+                    d["karyawan"][pilih].password = new_pw
+                    d["karyawan"][pilih].posisi = new_pos
+                save_db(ubah_karyawan, nama=pilih)
+                audit.catat(DB_FILE, BEND_EMAIL, perubahan)
                 st.success("Data karyawan berhasil diperbarui.")
 
     # ----------------- Hapus Karyawan -----------------
@@ -327,8 +495,10 @@ elif menu == "Bendahara":
         else:
             pilih = st.selectbox("Pilih karyawan", names)
             if st.button("Hapus"):
-                del db["karyawan"][pilih]
-                save_db(db)
+                info = db["karyawan"][pilih]
+                lama = {"posisi": info.posisi, "hari_absen": len(info.absen)}
+                save_db(lambda d: d["karyawan"].pop(pilih, None), nama=pilih)
+                audit.catat(DB_FILE, BEND_EMAIL, [audit.entri("hapus_karyawan", f"karyawan/{pilih}", lama, nama=pilih)])
                 st.success(f"Karyawan '{pilih}' berhasil dihapus.")
 
     # ----------------- Input Pemasukan Bulanan -----------------
@@ -338,8 +508,17 @@ elif menu == "Bendahara":
         ym_str = bulan.strftime("%Y-%m")
         val = st.number_input("Jumlah pemasukan bulan ini", min_value=0, step=10000)
         if st.button("Simpan Pemasukan"):
-            db["pemasukan"][ym_str] = int(val)
-            save_db(db)
+            if tutup_buku.tertutup(db, ym_str):
+                st.error(f"Bulan {ym_str} sudah ditutup. Buka kembali di 'Tutup Buku Bulanan' untuk mengubahnya.")
+                st.stop()
+            def ubah_pemasukan(d):
+                lama = d["pemasukan"].get(ym_str)
+                d["pemasukan"][ym_str] = int(val)
+                return lama
+            lama = save_db(ubah_pemasukan, ym=ym_str)
+            if lama != int(val):
+                audit.catat(DB_FILE, BEND_EMAIL, [audit.entri("ubah_pemasukan", f"pemasukan/{ym_str}", lama, int(val),
+                                                              bulan=ym_str)])
             st.success(f"Pemasukan untuk {ym_str} tersimpan.")
 
     # ----------------- Edit Tarif Gaji per Posisi -----------------
@@ -348,16 +527,266 @@ elif menu == "Bendahara":
         st.write("Tarif saat ini:", db["rates"])
 
         posisi = st.selectbox("Posisi", ["intern","staff","spv","manager"])
+        berlaku = st.date_input("Berlaku mulai", value=date.today()).strftime("%Y-%m-%d")
+        # nilai awal = tarif yang berlaku pada tanggal tersebut
+        cur_normal, cur_ot = store.tarif.tarif(berlaku, posisi)
         normal = st.number_input("Tarif Normal (per jam)", min_value=0, step=5000,
-                                  value=db["rates"]["normal"][posisi])
+                                  value=cur_normal)
         overtime = st.number_input("Tarif Lembur (per jam)", min_value=0, step=5000,
-                                   value=db["rates"]["overtime"][posisi])
+                                   value=cur_ot)
 
         if st.button("Simpan Tarif"):
-            db["rates"]["normal"][posisi] = int(normal)
-            db["rates"]["overtime"][posisi] = int(overtime)
-            save_db(db)
-            st.success("Tarif berhasil diperbarui.")
+            ditutup = tutup_buku.tertutup_sejak(db, berlaku)
+            if ditutup:
+                st.error(f"Bulan {', '.join(ditutup)} sudah ditutup. Buka kembali di 'Tutup Buku Bulanan' atau pilih tanggal berlaku sesudahnya.")
+                st.stop()
+            # bulan sebelum tanggal berlaku tidak ikut berubah (dan cache-nya tetap valid)
+            save_db(lambda d: tarif.ubah_tarif(d, berlaku, posisi, normal, overtime), sejak=berlaku)
+            audit.catat(DB_FILE, BEND_EMAIL, [audit.entri(
+                "ubah_tarif", f"rates/{posisi}", {"normal": cur_normal, "overtime": cur_ot},
+                {"normal": int(normal), "overtime": int(overtime)}, sejak=berlaku)])
+            st.success(f"Tarif berhasil diperbarui, berlaku mulai {berlaku}.")
+
+        st.markdown("**Riwayat Tarif**")
+        st.dataframe(pd.DataFrame([
+            {"Berlaku": r["berlaku"], "Posisi": p, "Normal": r["normal"][p], "Lembur": r["overtime"].get(p, 0)}
+            for r in db["rates_history"] for p in r["normal"]
+        ]), use_container_width=True)
+
+        # ---- Simulasi tarif (what-if) ----
+        st.markdown("---")
+        st.markdown("**🧪 Simulasi Tarif (what-if)**")
+        st.caption("Bandingkan dampak banyak tabel tarif kandidat terhadap payroll sebelum menyimpan tarif baru.")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            skala_n = st.slider("Skala tarif normal (%)", 50, 200, (80, 120), step=5, key="sim_skala_n")
+        with col2:
+            skala_o = st.slider("Skala tarif lembur (%)", 50, 200, (80, 120), step=5, key="sim_skala_o")
+        with col3:
+            langkah = st.number_input("Langkah skala (%)", min_value=1, max_value=50, value=2, key="sim_langkah")
+        sim_bulan = st.date_input("Bulan acuan", value=date.today(), key="sim_bulan")
+        sim_ym = sim_bulan.strftime("%Y-%m")
+
+        agregat = agregat_jam(db, DB_FILE, store.stempel, store.versi)
+        skala, normal_k, lembur_k = simulasi_tarif.kandidat_skala(
+            db["rates"], agregat["posisi"],
+            [x / 100 for x in range(skala_n[0], skala_n[1] + 1, int(langkah))],
+            [x / 100 for x in range(skala_o[0], skala_o[1] + 1, int(langkah))])
+        hasil = simulasi_tarif.simulasikan(agregat, normal_k, lembur_k)
+        proy = simulasi_tarif.proyeksi(agregat, hasil, sim_ym)
+
+        sim_df = pd.DataFrame({
+            "Normal (%)": (skala[:, 0] * 100).round().astype(int),
+            "Lembur (%)": (skala[:, 1] * 100).round().astype(int),
+            "Payroll (bulan)": proy["payroll_bulan"],
+            "Selisih vs Pemasukan (bulan)": proy["pemasukan_bulan"] - proy["payroll_bulan"],
+            "Payroll (tahun)": proy["payroll_tahun"],
+            "Selisih vs Pemasukan (tahun)": proy["pemasukan_tahun"] - proy["payroll_tahun"],
+        })
+        st.write(f"{len(sim_df)} tabel tarif kandidat dievaluasi untuk **{sim_ym}** "
+                 f"(pemasukan bulan: {rp(proy['pemasukan_bulan'])}, tahun: {rp(proy['pemasukan_tahun'])}).")
+        st.dataframe(sim_df, use_container_width=True)
+
+    # ----------------- Atur Kalender Kerja -----------------
+    elif action == "Atur Kalender Kerja":
+        st.subheader("🗓️ Atur Kalender Kerja")
+        kal = db.get("kalender", {})
+        kal_db = lambda d: d.setdefault("kalender", {"akhir_pekan": list(kalender.AKHIR_PEKAN), "libur": {}})
+        akhir_pekan = st.multiselect("Hari akhir pekan", kalender.NAMA_HARI,
+                                     default=[kalender.NAMA_HARI[i] for i in kal.get("akhir_pekan", kalender.AKHIR_PEKAN)])
+        if st.button("Simpan Akhir Pekan"):
+            save_db(lambda d: kal_db(d).update(akhir_pekan=[kalender.NAMA_HARI.index(h) for h in akhir_pekan]))
+            st.success("Akhir pekan tersimpan.")
+
+        st.markdown("**Hari Libur**")
+        col1, col2 = st.columns(2)
+        with col1:
+            tgl_libur = st.date_input("Tanggal libur", value=date.today()).strftime("%Y-%m-%d")
+        with col2:
+            ket = st.text_input("Keterangan")
+        if st.button("Tambah Libur"):
+            if tutup_buku.tertutup(db, tgl_libur[:7]):
+                st.error(f"Bulan {tgl_libur[:7]} sudah ditutup.")
+                st.stop()
+            save_db(lambda d: kal_db(d).setdefault("libur", {}).update({tgl_libur: ket}), ym=tgl_libur[:7])
+            st.success(f"Libur {tgl_libur} tersimpan.")
+        libur = kal.get("libur", {})
+        if libur:
+            st.table(pd.DataFrame([{"Tanggal": d, "Keterangan": libur[d]} for d in sorted(libur)]))
+            hapus = st.selectbox("Hapus libur", sorted(libur))
+            if st.button("Hapus Libur"):
+                if tutup_buku.tertutup(db, hapus[:7]):
+                    st.error(f"Bulan {hapus[:7]} sudah ditutup.")
+                    st.stop()
+                save_db(lambda d: kal_db(d).get("libur", {}).pop(hapus, None), ym=hapus[:7])
+                st.success(f"Libur {hapus} dihapus.")
+
+    # ----------------- Tutup Buku Bulanan -----------------
+    elif action == "Tutup Buku Bulanan":
+        st.subheader("📕 Tutup Buku Bulanan")
+        st.caption(f"Bulan yang sudah berakhir (+{tutup_buku.TENGGANG_HARI} hari tenggang) ditutup otomatis; "
+                   "bulan tertutup dibaca dari snapshot dan harus dibuka kembali sebelum diubah.")
+        status = tutup_buku.status_penjadwal(store)
+        if status:
+            st.write(f"Penjadwal: pemeriksaan terakhir {status.get('terakhir', '-')}, "
+                     f"baru ditutup: {', '.join(status.get('ditutup', [])) or '-'}")
+            if "error" in status:
+                st.error(status["error"])
+
+        siap = tutup_buku.bulan_siap_tutup(store, termasuk_dibuka=True, semua=True)
+        if siap:
+            st.write(f"Siap ditutup: {', '.join(siap)}")
+            dibuka = [ym for ym in siap if ym in db.get("bulan_dibuka", {})]
+            if dibuka:
+                st.caption(f"Dibuka kembali (tidak ditutup otomatis): {', '.join(dibuka)}")
+            if st.button("Tutup Sekarang"):
+                ditutup = tutup_buku.tutup_otomatis(store, ATURAN_GAJI, termasuk_dibuka=True, semua=True)
+                st.success(f"Ditutup: {', '.join(ditutup) or '-'}")
+
+        bulan_tutup = db.get("bulan_tutup", {})
+        if not bulan_tutup:
+            st.info("Belum ada bulan yang ditutup.")
+        else:
+            st.table(pd.DataFrame([
+                {"Bulan": ym, "Ditutup": t["ditutup"], "Karyawan": t["karyawan"], "Total Payroll": rp(t["total_payroll"])}
+                for ym, t in sorted(bulan_tutup.items(), reverse=True)
+            ]))
+            st.markdown("**Buka Kembali Bulan**")
+            buka = st.selectbox("Bulan", sorted(bulan_tutup, reverse=True))
+            alasan = st.text_input("Alasan membuka kembali")
+            if st.button("Buka Kembali"):
+                if not alasan.strip():
+                    st.error("Alasan wajib diisi.")
+                else:
+                    tutup_buku.buka_bulan(store, buka, alasan.strip())
+                    st.success(f"Bulan {buka} dibuka kembali. Tutup lagi dengan 'Tutup Sekarang' setelah selesai dikoreksi.")
+
+    # ----------------- Pemindaian Anomali -----------------
+    elif action == "Pemindaian Anomali":
+        st.subheader("🔎 Pemindaian Absensi & Anomali")
+        st.caption("Hari kerja tanpa absen, streak lembur ekstrem, dan klaster hari sakit. Job berjalan di latar.")
+        laporan_path = pemindai.path_laporan(DB_FILE)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            scan_dari = st.date_input("Dari", value=date.today().replace(day=1), key="scan_dari").strftime("%Y-%m-%d")
+        with col2:
+            scan_sampai = st.date_input("Sampai", value=date.today(), key="scan_sampai").strftime("%Y-%m-%d")
+        with col3:
+            proses = st.number_input("Jumlah proses", min_value=1, max_value=os.cpu_count() or 1, value=1, step=1)
+        if st.button("Mulai Pemindaian"):
+            if scan_dari > scan_sampai:
+                st.error("Tanggal 'Dari' harus sebelum 'Sampai'.")
+            elif pemindai.mulai_job(store, laporan_path, scan_dari, scan_sampai, proses=int(proses)):
+                st.success("Pemindaian dimulai.")
+            else:
+                st.warning("Pemindaian sebelumnya masih berjalan.")
+
+        job = pemindai.status_job(laporan_path)
+        if job:
+            st.write(f"Status job: **{job['status']}** (mulai {job['mulai']}, rentang {job['dari']} s/d {job['sampai']})")
+            if job["status"] == "gagal":
+                st.error(job.get("error", ""))
+        st.button("Segarkan Status")
+
+        laporan = pemindai.baca_laporan(laporan_path)
+        if laporan is None:
+            st.info("Belum ada laporan pemindaian.")
+        else:
+            st.write(f"Laporan {laporan['dibuat']}: {laporan['jumlah_karyawan']} karyawan, "
+                     f"rentang {laporan['dari']} s/d {laporan['sampai']}, {laporan['durasi_detik']} detik.")
+            temuan = laporan["temuan"]
+            jenis = st.selectbox("Jenis temuan", ["Semua", "tanpa_absen", "lembur_ekstrem", "klaster_sakit"])
+            if jenis != "Semua":
+                temuan = [t for t in temuan if t["jenis"] == jenis]
+            if temuan:
+                st.dataframe(pd.DataFrame(temuan), use_container_width=True)
+            else:
+                st.success("Tidak ada temuan.")
+
+    # ----------------- Slip Gaji Massal -----------------
+    elif action == "Slip Gaji Massal":
+        st.subheader("🧾 Slip Gaji Massal")
+        st.caption("Satu slip per karyawan (HTML/PDF) dalam satu file ZIP. Job berjalan di latar; "
+                   "bila terputus, menjalankan ulang melanjutkan bagian yang sudah selesai.")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            ym_slip = st.date_input("Bulan", value=date.today(), key="slip_bulan").strftime("%Y-%m")
+        with col2:
+            format_slip = st.multiselect("Format", list(slip_gaji.FORMAT), default=list(slip_gaji.FORMAT))
+        with col3:
+            proses = st.number_input("Jumlah proses", min_value=1, max_value=os.cpu_count() or 1,
+                                     value=1, step=1, key="slip_proses")
+        if st.button("Buat Slip Gaji"):
+            if not format_slip:
+                st.error("Pilih minimal satu format.")
+            elif slip_gaji.mulai_job(store, ATURAN_GAJI, ym_slip, format_slip, proses=int(proses)):
+                st.success(f"Pembuatan slip {ym_slip} dimulai.")
+            else:
+                st.warning("Pembuatan slip bulan ini masih berjalan.")
+
+        zip_path = slip_gaji.path_zip(DB_FILE, ym_slip)
+        job = slip_gaji.status_job(zip_path)
+        if job:
+            st.write(f"Status job: **{job['status']}** (mulai {job['mulai']}, bulan {job['bulan']})")
+            if job["total"]:
+                st.progress(job["selesai"] / job["total"], text=f"Bagian {job['selesai']}/{job['total']}")
+            if job["status"] == "selesai":
+                st.write(f"{job['slip']} slip dalam {job['bagian']} bagian "
+                         f"({job['dilanjutkan']} dilanjutkan), {job['detik']} detik.")
+            elif job["status"] == "gagal":
+                st.error(job.get("error", ""))
+        st.button("Segarkan Status", key="slip_segarkan")
+
+        if os.path.exists(zip_path) and job.get("status") != "berjalan":
+            with open(zip_path, "rb") as f:
+                st.download_button(f"Unduh {os.path.basename(zip_path)}", f.read(),
+                                   file_name=os.path.basename(zip_path), mime="application/zip")
+        elif not job:
+            st.info(f"Belum ada slip gaji untuk {ym_slip}.")
+
+    # ----------------- Log Audit -----------------
+    elif action == "Log Audit":
+        st.subheader("📜 Log Audit Perubahan Payroll")
+        st.caption("Perubahan karyawan, pemasukan, tarif, dan absen yang ditimpa. Filter bulan juga "
+                   "menampilkan perubahan tanpa bulan (posisi, hapus karyawan) dan tarif yang berlaku sampai bulan itu.")
+        pil = audit.pilihan(DB_FILE)
+        semua = "(semua)"
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            f_nama = st.selectbox("Karyawan", [semua] + pil["nama"], key="audit_nama")
+        with col2:
+            f_bulan = st.selectbox("Bulan", [semua] + sorted(set(pil["bulan"]) | set(pemanasan.bulan_terakhir(12)),
+                                                             reverse=True), key="audit_bulan")
+        with col3:
+            f_oleh = st.selectbox("Oleh", [semua] + pil["oleh"], key="audit_oleh")
+        with col4:
+            f_aksi = st.selectbox("Aksi", [semua] + pil["aksi"], key="audit_aksi")
+        t0 = time.perf_counter()
+        hasil, total = audit.cari(DB_FILE, *(None if v == semua else v for v in (f_nama, f_bulan, f_oleh, f_aksi)))
+        ms = (time.perf_counter() - t0) * 1000
+        st.caption(f"{total} perubahan cocok, ditampilkan {len(hasil)} terbaru ({ms:.1f} ms).")
+        if hasil:
+            df = pd.DataFrame(hasil).reindex(columns=["t", "oleh", "aksi", "kunci", "bulan", "sejak", "lama", "baru"])
+            for kolom in ("lama", "baru"):
+                df[kolom] = df[kolom].map(lambda v: "" if v is None or v != v else json.dumps(v, ensure_ascii=False))
+            st.dataframe(df.fillna(""), use_container_width=True)
+        else:
+            st.info("Belum ada perubahan yang cocok.")
+
+    # ----------------- Statistik Perusahaan -----------------
+    elif action == "Statistik Perusahaan":
+        st.subheader("🏢 Statistik Perusahaan (proses ini)")
+        st.caption(f"Store DB yang dimuat disimpan dalam LRU: anggaran ±{penyimpanan.ANGGARAN_BYTE // 2**20} MB "
+                   f"(perkiraan {penyimpanan.FAKTOR_MEMORI}× ukuran file), dilepas setelah "
+                   f"{penyimpanan.IDLE_DETIK // 60} menit tidak diakses dan dimuat ulang saat dibutuhkan.")
+        rows = penyimpanan.statistik()
+        for r in rows:
+            r["perusahaan"] = perusahaan.kode_dari_path(r["path"]) or "-"
+        df = pd.DataFrame(rows)
+        st.dataframe(df[["perusahaan", "path", "dimuat_sekarang", "perkiraan_mb", "karyawan", "versi", "hit",
+                         "dimuat", "detik_muat", "dilepas_idle", "dilepas_anggaran"]], use_container_width=True)
+        st.write(f"Total perkiraan memori: **{df['perkiraan_mb'].sum():.1f} MB** "
+                 f"untuk {int(df['dimuat_sekarang'].sum())} dari {len(df)} DB.")
 
     # ----------------- Logout Bendahara -----------------
     elif action == "Logout Bendahara":
@@ -400,11 +829,15 @@ elif menu == "Karyawan":
             overtime = st.number_input("Jumlah jam lembur", min_value=1, max_value=12)
 
         if st.button("Simpan Absen"):
-            db["karyawan"][nama]["absen"][today] = {
-                "status": status,
-                "overtime": overtime
-            }
-            save_db(db)
+            baru = rekaman.HariAbsen(status, overtime)
+            def absen(d):
+                lama = d["karyawan"][nama].absen.get(today)
+                store.catat_absen(nama, today, baru)
+                return lama
+            lama = save_db(absen, nama=nama, ym=today[:7])
+            if lama is not None and lama != baru:
+                audit.catat(DB_FILE, nama, [audit.entri("ubah_absen", f"karyawan/{nama}/absen/{today}", lama, baru,
+                                                        nama=nama, bulan=today[:7])])
             st.success("Absensi tersimpan.")
 
     # ------ Lihat Gaji Bulanan ------
@@ -412,33 +845,57 @@ elif menu == "Karyawan":
         st.subheader("💵 Gaji Bulanan")
         bulan = st.date_input("Pilih bulan", value=date.today())
         ym_str = bulan.strftime("%Y-%m")
-
-        total, rows = calc_month_salary(nama, ym_str)
+        # per tanggal: gaji seperti yang dihitung saat itu (sebelum absen/tarif diubah sesudahnya)
+        arsip = pilih_per_tanggal("gaji_pada")
+        if arsip is None:
+            total, rows = calc_month_salary(nama, ym_str)
+            posisi = db["karyawan"][nama].posisi
+        elif nama not in arsip.db["karyawan"]:
+            st.info("Belum terdaftar pada tanggal itu.")
+            st.stop()
+        else:
+            total, rows = pemanasan.gaji_banyak(arsip, ATURAN_GAJI, [nama], ym_str)[nama]
+            posisi = arsip.db["karyawan"][nama].posisi
         st.write(f"Total gaji bulan **{ym_str}**: {rp(total)}")
 
         if rows:
-            df = pd.DataFrame(rows)
+            df = pd.DataFrame(rows.ke_kolom())
             df["amount"] = df["amount"].map(lambda x: f"{x:,}")
             st.dataframe(df)
+            st.download_button("Unduh Slip Gaji (PDF)",
+                               slip_gaji.slip_pdf(slip_gaji.kop(DB_FILE), nama, posisi,
+                                                  ym_str, total, rows),
+                               file_name=f"slip_gaji_{slip_gaji.nama_berkas(nama)}_{ym_str}.pdf", mime="application/pdf")
         else:
             st.info("Tidak ada data absensi bulan ini.")
 
     # ------ Riwayat Absensi ------
     elif aksi == "Riwayat Absensi":
         st.subheader("📂 Riwayat Absensi")
-        absen = db["karyawan"][nama].get("absen", {})
-        if not absen:
+        idx = store.indeks_absen(nama)
+        if not len(idx):
             st.info("Belum ada data absensi.")
         else:
-            rows = []
-            for d, info in absen.items():
-                rows.append({
-                    "Tanggal": d,
-                    "Status": info.get("status"),
-                    "Lembur": info.get("overtime", 0)
-                })
-            df = pd.DataFrame(rows)
-            st.dataframe(df.sort_values("Tanggal"))
+            pertama, terakhir = date.fromisoformat(idx.tanggal[0]), date.fromisoformat(idx.tanggal[-1])
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                rentang = st.date_input("Rentang tanggal", value=(pertama, terakhir))
+            with col2:
+                status_f = st.selectbox("Status", ["Semua", "hadir", "hadir+lembur", "izin", "sakit", "cuti"])
+            with col3:
+                ukuran = st.selectbox("Baris per halaman", [10, 25, 50, 100], index=1)
+            dari = rentang[0] if rentang else pertama
+            sampai = rentang[-1] if rentang else terakhir
+            terbaru = st.checkbox("Terbaru dulu", value=True)
+            query = dict(dari=dari.strftime("%Y-%m-%d"), sampai=sampai.strftime("%Y-%m-%d"),
+                         status=None if status_f == "Semua" else status_f, ukuran=ukuran, terbaru_dulu=terbaru)
+            _, total = idx.cari(**query, halaman=0)
+            n_hal = max((total + ukuran - 1) // ukuran, 1)
+            hal = st.number_input(f"Halaman (dari {n_hal})", min_value=1, max_value=n_hal, value=1)
+            rows, _ = idx.cari(**query, halaman=int(hal) - 1)
+            st.write(f"{total} hari tercatat dalam rentang ini.")
+            if rows:
+                st.dataframe(pd.DataFrame(rows).rename(columns={"date": "Tanggal", "status": "Status", "overtime": "Lembur"}))
 
     # ------ Logout ------
     elif aksi == "Logout":
@@ -17,61 +17,74 @@ import pandas as pd
 from datetime import date, datetime
 import altair as alt
 from calendar import monthrange
+import audit, aturan_gaji, penyimpanan, perusahaan, rekaman, riwayat, simulasi_tarif, tarif
 
 # ---------------------
 # Config / DB filename
 # ---------------------
-DB_FILE = "database.json"
+DB_NAMA = "database.json"
+# banyak perusahaan: satu folder per perusahaan di perusahaan/<kode>/ (lihat perusahaan.py),
+# dipilih sebelum login dan terkunci selama sesi login; tanpa folder itu pakai DB_NAMA saja
+PERUSAHAAN = perusahaan.daftar()
+if PERUSAHAAN:
+    sudah_login = bool(st.session_state.get("karyawan") or st.session_state.get("bendahara"))
+    kode_perusahaan = st.sidebar.selectbox("Perusahaan", PERUSAHAAN, key="perusahaan", disabled=sudah_login)
+    DB_FILE = perusahaan.path_db(kode_perusahaan, DB_NAMA)
+else:
+    DB_FILE = DB_NAMA
+ATURAN_GAJI = aturan_gaji.kompilasi("harian-7jam")  # set aturan gaji (lihat aturan_gaji.py)
+JAM_NORMAL = ATURAN_GAJI.jam_per("hadir")  # jam kerja normal per hari "hadir"
 
 # ---------------------
 # Utility: load/save DB
 # ---------------------
-def load_db():
-    if not os.path.exists(DB_FILE):
-        return {
-            "karyawan": {},  # name -> {password, posisi, absen: { 'YYYY-MM-DD': {status, overtime}}}
-            "pemasukan": {},  # 'YYYY-MM' -> int
-            "rates": {        # default rates
-                "normal": {"intern":35000,"staff":50000,"spv":100000,"manager":200000},
-                "overtime": {"intern":20000,"staff":40000,"spv":55000,"manager":65000}
-            }
-        }
-    with open(DB_FILE, "r") as f:
-        return json.load(f)
-
-def save_db(db):
-    with open(DB_FILE, "w") as f:
-        json.dump(db, f, indent=4)
-
-db = load_db()
+# satu objek Penyimpanan per file, dipakai ulang antar rerun & sesi (LRU, lihat penyimpanan.py)
+store = penyimpanan.buka(DB_FILE)
+
+def save_db(ubah, nama=None, ym=None, sejak=None):
+    # ubah(db) dijalankan di bawah kunci store lalu disimpan (lihat Penyimpanan.ubah), jadi sesi
+    # lain tidak bisa mengubah db selagi ditulis; nama/ym/sejak: bagian cache gaji yang terdampak
+    return store.ubah(ubah, nama=nama, ym=ym, sejak=sejak)
+
+def tambah_karyawan(d, nama, pw, posisi):
+    if nama in d["karyawan"]:
+        return False  # didaftarkan sesi lain lebih dulu
+    d["karyawan"][nama] = rekaman.Karyawan(pw, posisi)
+
+db = store.db
 
 # ---------------------
 # Salary calculation
 # ---------------------
 def calc_month_salary(name, ym):  # ym = 'YYYY-MM'
-    if name not in db["karyawan"]:
-        return 0, []
-    pos = db["karyawan"][name]["posisi"]
-    normal_rate = db["rates"]["normal"].get(pos, 0)
-    ot_rate = db["rates"]["overtime"].get(pos, 0)
-    total = 0
-    rows = []
-    absen = db["karyawan"][name].get("absen", {})
-    for dstr, info in absen.items():
-        if dstr.startswith(ym):
-            status = info.get("status","")
-            overtime = int(info.get("overtime",0))
-            if status == "hadir":
-                amt = 7 * normal_rate
-                total += amt
-                rows.append({"date": dstr, "status": status, "overtime": 0, "amount": amt})
-            elif status == "hadir+lembur":
-                amt = 7 * normal_rate + overtime * ot_rate
-                total += amt
-                rows.append({"date": dstr, "status": status, "overtime": overtime, "amount": amt})
-            else:
-                rows.append({"date": dstr, "status": status, "overtime": 0, "amount": 0})
-    return int(total), rows
+    return store.gaji_bulan(name, ym, hitung_month_salary)
+
+def hitung_month_salary(name, ym):
+    return aturan_gaji.hitung_bulan(store, ATURAN_GAJI, [name], ym)[name]
+
+def calc_month_salaries(names, ym):
+    # banyak karyawan sekaligus: yang belum ada di cache dihitung dalam satu panggilan evaluator
+    return store.gaji_bulan_banyak(names, ym, lambda ns: aturan_gaji.hitung_bulan(store, ATURAN_GAJI, ns, ym))
+
+def pilih_per_tanggal(key):
+    """opsi 'per tanggal' (riwayat.py): store baca-saja keadaan akhir tanggal itu, None = data saat ini"""
+    if not st.checkbox("Lihat keadaan data per tanggal tertentu", key=f"{key}_aktif"):
+        return None
+    pada = st.date_input("Keadaan data per akhir tanggal", value=date.today(), key=f"{key}_tanggal")
+    try:
+        return riwayat.pada(DB_FILE, pada)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+
+# ---------------------
+# Simulasi tarif (what-if)
+# ---------------------
+@st.cache_data(show_spinner=False)
+def agregat_jam(_db, path, stempel, versi):
+    # stempel file + versi store jadi kunci cache: versi naik setiap perubahan (juga dari
+    # worker lain lewat log sinkron), mtime saja bisa sama untuk dua tulis yang berdekatan
+    return simulasi_tarif.agregasi_jam(_db, JAM_NORMAL)
 
 # ---------------------
 # Helper: format Rupiah
@@ -116,11 +129,10 @@ def karyawan_register():
         if submitted:
             if not nama or not pw:
                 st.warning("Isi nama dan password.")
-            elif nama in db["karyawan"]:
+            elif save_db(lambda d: tambah_karyawan(d, nama, pw, posisi), nama=nama) is False:
                 st.error("Nama sudah terdaftar.")
             else:
-                db["karyawan"][nama] = {"password": pw, "posisi": posisi, "absen": {}}
-                save_db(db)
+                audit.catat(DB_FILE, nama, [audit.entri("tambah_karyawan", f"karyawan/{nama}", baru={"posisi": posisi}, nama=nama)])
                 st.success("Pendaftaran berhasil. Silakan login di panel Karyawan.")
 
 def karyawan_login():
@@ -131,7 +143,7 @@ def karyawan_login():
         submitted = st.form_submit_button("Login Karyawan")
 
         if submitted:
-            if nama in db["karyawan"] and db["karyawan"][nama].get("password") == pw:
+            if nama in db["karyawan"] and db["karyawan"][nama].password == pw:
                 st.session_state["karyawan"] = nama
                 st.success(f"Login berhasil: {nama.title()}")
             else:
@@ -154,7 +166,7 @@ if menu == "Beranda":
     today = date.today()
     cur_ym = today.strftime("%Y-%m")
 
-    total_payroll = sum(calc_month_salary(name, cur_ym)[0] for name in db["karyawan"].keys())
+    total_payroll = sum(total for total, _ in calc_month_salaries(list(db["karyawan"]), cur_ym).values())
     total_pemasukan = db.get("pemasukan", {}).get(cur_ym, 0)
 
     col1, col2, col3 = st.columns(3)
@@ -189,10 +201,17 @@ elif menu == "Bendahara":
         ym = st.date_input("Pilih bulan", value=date.today())
         ym_str = ym.strftime("%Y-%m")
         st.write(f"Menampilkan data untuk: **{ym_str}**")
+        arsip = pilih_per_tanggal("dash_pada")
+        data = db if arsip is None else arsip.db
+        if arsip is None:
+            gaji = calc_month_salaries(list(data["karyawan"]), ym_str)
+        else:
+            gaji = arsip.gaji_bulan_banyak(list(data["karyawan"]), ym_str,
+                                           lambda ns: aturan_gaji.hitung_bulan(arsip, ATURAN_GAJI, ns, ym_str))
         rows = []
-        for name in db["karyawan"].keys():
-            total, _ = calc_month_salary(name, ym_str)
-            rows.append({"Nama": name.title(), "Posisi": db["karyawan"][name]["posisi"], "Gaji": total})
+        for name in data["karyawan"].keys():
+            total, _ = gaji[name]
+            rows.append({"Nama": name.title(), "Posisi": data["karyawan"][name].posisi, "Gaji": total})
         df = pd.DataFrame(rows)
         if not df.empty:
             df["Gaji"] = df["Gaji"].map(lambda x: f"{x:,}")
@@ -211,11 +230,11 @@ elif menu == "Bendahara":
             if submitted:
                 if not nama or not pw:
                     st.warning("Nama & password harus diisi.")
-                elif nama in db["karyawan"]:
+                elif save_db(lambda d: tambah_karyawan(d, nama, pw, posisi), nama=nama) is False:
                     st.error("Nama sudah ada.")
                 else:
-                    db["karyawan"][nama] = {"password": pw, "posisi": posisi, "absen": {}}
-                    save_db(db)
+                    audit.catat(DB_FILE, BEND_EMAIL, [audit.entri("tambah_karyawan", f"karyawan/{nama}",
+                                                                  baru={"posisi": posisi}, nama=nama)])
                     st.success("Karyawan tersimpan.")
 
     # ----------------- Lihat Database -----------------
@@ -223,7 +242,7 @@ elif menu == "Bendahara":
         st.subheader("📋 Lihat Database Karyawan")
         rows = []
         for name, info in db["karyawan"].items():
-            rows.append({"Nama": name.title(), "Posisi": info.get("posisi","")})
+            rows.append({"Nama": name.title(), "Posisi": info.posisi})
         df = pd.DataFrame(rows)
         st.dataframe(df)
 
@@ -237,13 +256,21 @@ elif menu == "Bendahara":
             pilih = st.selectbox("Pilih karyawan", all_names)
             info = db["karyawan"][pilih]
 
-            new_pw = st.text_input("Password baru (opsional)", value=info["password"])
-            new_pos = st.selectbox("Posisi", ["intern","staff","spv","manager"], index=["intern","staff","spv","manager"].index(info["posisi"]))
+            new_pw = st.text_input("Password baru (opsional)", value=info.password)
+            new_pos = st.selectbox("Posisi", ["intern","staff","spv","manager"], index=["intern","staff","spv","manager"].index(info.posisi))
 
             if st.button("Simpan Perubahan"):
-                db["karyawan"][pilih]["password"] = new_pw
-                db["karyawan"][pilih]["posisi"] = new_pos
-                save_db(db)
+                # password tidak ditulis ke log, hanya fakta bahwa ia diganti
+                perubahan = []
+                if new_pos != info.posisi:
+                    perubahan.append(audit.entri("ubah_posisi", f"karyawan/{pilih}/posisi", info.posisi, new_pos, nama=pilih))
+                if new_pw != info.password:
+                    perubahan.append(audit.entri("ubah_password", f"karyawan/{pilih}/password", nama=pilih))
+                def ubah_karyawan(d):
+                    d["karyawan"][pilih].password = new_pw
+                    d["karyawan"][pilih].posisi = new_pos
+                save_db(ubah_karyawan, nama=pilih)
+                audit.catat(DB_FILE, BEND_EMAIL, perubahan)
                 st.success("Data karyawan berhasil diperbarui.")
 
     # ----------------- Hapus Karyawan -----------------
@@ -255,8 +282,10 @@ elif menu == "Bendahara":
         else:
             pilih = st.selectbox("Pilih karyawan", names)
             if st.button("Hapus"):
-                del db["karyawan"][pilih]
-                save_db(db)
+                info = db["karyawan"][pilih]
+                lama = {"posisi": info.posisi, "hari_absen": len(info.absen)}
+                save_db(lambda d: d["karyawan"].pop(pilih, None), nama=pilih)
+                audit.catat(DB_FILE, BEND_EMAIL, [audit.entri("hapus_karyawan", f"karyawan/{pilih}", lama, nama=pilih)])
                 st.success(f"Karyawan '{pilih}' berhasil dihapus.")
 
     # ----------------- Input Pemasukan Bulanan -----------------
@@ -266,8 +295,14 @@ elif menu == "Bendahara":
         ym_str = bulan.strftime("%Y-%m")
         val = st.number_input("Jumlah pemasukan bulan ini", min_value=0, step=10000)
         if st.button("Simpan Pemasukan"):
-            db["pemasukan"][ym_str] = int(val)
-            save_db(db)
+            def ubah_pemasukan(d):
+                lama = d["pemasukan"].get(ym_str)
+                d["pemasukan"][ym_str] = int(val)
+                return lama
+            lama = save_db(ubah_pemasukan, ym=ym_str)
+            if lama != int(val):
+                audit.catat(DB_FILE, BEND_EMAIL, [audit.entri("ubah_pemasukan", f"pemasukan/{ym_str}", lama, int(val),
+                                                              bulan=ym_str)])
             st.success(f"Pemasukan untuk {ym_str} tersimpan.")
 
     # ----------------- Edit Tarif Gaji per Posisi -----------------
@@ -276,16 +311,61 @@ elif menu == "Bendahara":
         st.write("Tarif saat ini:", db["rates"])
 
         posisi = st.selectbox("Posisi", ["intern","staff","spv","manager"])
+        berlaku = st.date_input("Berlaku mulai", value=date.today()).strftime("%Y-%m-%d")
+        # nilai awal = tarif yang berlaku pada tanggal tersebut
+        cur_normal, cur_ot = store.tarif.tarif(berlaku, posisi)
         normal = st.number_input("Tarif Normal (per jam)", min_value=0, step=5000,
-                                  value=db["rates"]["normal"][posisi])
+                                  value=cur_normal)
         overtime = st.number_input("Tarif Lembur (per jam)", min_value=0, step=5000,
-                                   value=db["rates"]["overtime"][posisi])
+                                   value=cur_ot)
 
         if st.button("Simpan Tarif"):
-            db["rates"]["normal"][posisi] = int(normal)
-            db["rates"]["overtime"][posisi] = int(overtime)
-            save_db(db)
-            st.success("Tarif berhasil diperbarui.")
+            # bulan sebelum tanggal berlaku tidak ikut berubah (dan cache-nya tetap valid)
+            save_db(lambda d: tarif.ubah_tarif(d, berlaku, posisi, normal, overtime), sejak=berlaku)
+            audit.catat(DB_FILE, BEND_EMAIL, [audit.entri(
+                "ubah_tarif", f"rates/{posisi}", {"normal": cur_normal, "overtime": cur_ot},
+                {"normal": int(normal), "overtime": int(overtime)}, sejak=berlaku)])
+            st.success(f"Tarif berhasil diperbarui, berlaku mulai {berlaku}.")
+
+        st.markdown("**Riwayat Tarif**")
+        st.dataframe(pd.DataFrame([
+            {"Berlaku": r["berlaku"], "Posisi": p, "Normal": r["normal"][p], "Lembur": r["overtime"].get(p, 0)}
+            for r in db["rates_history"] for p in r["normal"]
+        ]), use_container_width=True)
+
+        # ---- Simulasi tarif (what-if) ----
+        st.markdown("---")
+        st.markdown("**🧪 Simulasi Tarif (what-if)**")
+        st.caption("Bandingkan dampak banyak tabel tarif kandidat terhadap payroll sebelum menyimpan tarif baru.")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            skala_n = st.slider("Skala tarif normal (%)", 50, 200, (80, 120), step=5, key="sim_skala_n")
+        with col2:
+            skala_o = st.slider("Skala tarif lembur (%)", 50, 200, (80, 120), step=5, key="sim_skala_o")
+        with col3:
+            langkah = st.number_input("Langkah skala (%)", min_value=1, max_value=50, value=2, key="sim_langkah")
+        sim_bulan = st.date_input("Bulan acuan", value=date.today(), key="sim_bulan")
+        sim_ym = sim_bulan.strftime("%Y-%m")
+
+        agregat = agregat_jam(db, DB_FILE, store.stempel, store.versi)
+        skala, normal_k, lembur_k = simulasi_tarif.kandidat_skala(
+            db["rates"], agregat["posisi"],
+            [x / 100 for x in range(skala_n[0], skala_n[1] + 1, int(langkah))],
+            [x / 100 for x in range(skala_o[0], skala_o[1] + 1, int(langkah))])
+        hasil = simulasi_tarif.simulasikan(agregat, normal_k, lembur_k)
+        proy = simulasi_tarif.proyeksi(agregat, hasil, sim_ym)
+
+        sim_df = pd.DataFrame({
+            "Normal (%)": (skala[:, 0] * 100).round().astype(int),
+            "Lembur (%)": (skala[:, 1] * 100).round().astype(int),
+            "Payroll (bulan)": proy["payroll_bulan"],
+            "Selisih vs Pemasukan (bulan)": proy["pemasukan_bulan"] - proy["payroll_bulan"],
+            "Payroll (tahun)": proy["payroll_tahun"],
+            "Selisih vs Pemasukan (tahun)": proy["pemasukan_tahun"] - proy["payroll_tahun"],
+        })
+        st.write(f"{len(sim_df)} tabel tarif kandidat dievaluasi untuk **{sim_ym}** "
+                 f"(pemasukan bulan: {rp(proy['pemasukan_bulan'])}, tahun: {rp(proy['pemasukan_tahun'])}).")
+        st.dataframe(sim_df, use_container_width=True)
 
     # ----------------- Logout Bendahara -----------------
     elif action == "Logout Bendahara":
@@ -317,10 +397,15 @@ elif menu == "Karyawan":
         if status == "hadir+lembur":
             overtime = st.number_input("Jumlah jam lembur", min_value=1, max_value=12)
         if st.button("Simpan Absen"):
-            if "absen" not in db["karyawan"][nama]:
-                db["karyawan"][nama]["absen"] = {}
-            db["karyawan"][nama]["absen"][today] = {"status": status, "overtime": overtime}
-            save_db(db)
+            baru = rekaman.HariAbsen(status, overtime)
+            def absen(d):
+                lama = d["karyawan"][nama].absen.get(today)
+                store.catat_absen(nama, today, baru)
+                return lama
+            lama = save_db(absen, nama=nama, ym=today[:7])
+            if lama is not None and lama != baru:
+                audit.catat(DB_FILE, nama, [audit.entri("ubah_absen", f"karyawan/{nama}/absen/{today}", lama, baru,
+                                                        nama=nama, bulan=today[:7])])
             st.success("Absensi tersimpan.")
 
     # Lihat Gaji Bulanan
@@ -328,10 +413,17 @@ elif menu == "Karyawan":
         st.subheader("💵 Gaji Bulanan")
         bulan = st.date_input("Pilih bulan", value=date.today())
         ym_str = bulan.strftime("%Y-%m")
-        total, rows = calc_month_salary(nama, ym_str)
+        arsip = pilih_per_tanggal("gaji_pada")
+        if arsip is None:
+            total, rows = calc_month_salary(nama, ym_str)
+        elif nama not in arsip.db["karyawan"]:
+            st.info("Belum terdaftar pada tanggal itu.")
+            st.stop()
+        else:
+            total, rows = arsip.gaji_bulan(nama, ym_str, lambda n, ym: aturan_gaji.hitung_bulan(arsip, ATURAN_GAJI, [n], ym)[n])
         st.write(f"Total gaji bulan **{ym_str}**: {rp(total)}")
         if rows:
-            df = pd.DataFrame(rows)
+            df = pd.DataFrame(rows.ke_kolom())
             df["amount"] = df["amount"].map(lambda x: f"{x:,}")
             st.dataframe(df)
         else:
@@ -340,13 +432,30 @@ elif menu == "Karyawan":
     # Riwayat Absensi
     elif aksi == "Riwayat Absensi":
         st.subheader("📂 Riwayat Absensi")
-        absen = db["karyawan"][nama].get("absen", {})
-        if not absen:
+        idx = store.indeks_absen(nama)
+        if not len(idx):
             st.info("Belum ada data absensi.")
         else:
-            rows = [{"Tanggal": d, "Status": v["status"], "Lembur": v.get("overtime",0)} for d,v in absen.items()]
-            df = pd.DataFrame(rows).sort_values("Tanggal")
-            st.dataframe(df)
+            pertama, terakhir = date.fromisoformat(idx.tanggal[0]), date.fromisoformat(idx.tanggal[-1])
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                rentang = st.date_input("Rentang tanggal", value=(pertama, terakhir))
+            with col2:
+                status_f = st.selectbox("Status", ["Semua", "hadir", "hadir+lembur", "izin", "sakit", "cuti"])
+            with col3:
+                ukuran = st.selectbox("Baris per halaman", [10, 25, 50, 100], index=1)
+            dari = rentang[0] if rentang else pertama
+            sampai = rentang[-1] if rentang else terakhir
+            terbaru = st.checkbox("Terbaru dulu", value=True)
+            query = dict(dari=dari.strftime("%Y-%m-%d"), sampai=sampai.strftime("%Y-%m-%d"),
+                         status=None if status_f == "Semua" else status_f, ukuran=ukuran, terbaru_dulu=terbaru)
+            _, total = idx.cari(**query, halaman=0)
+            n_hal = max((total + ukuran - 1) // ukuran, 1)
+            hal = st.number_input(f"Halaman (dari {n_hal})", min_value=1, max_value=n_hal, value=1)
+            rows, _ = idx.cari(**query, halaman=int(hal) - 1)
+            st.write(f"{total} hari tercatat dalam rentang ini.")
+            if rows:
+                st.dataframe(pd.DataFrame(rows).rename(columns={"date": "Tanggal", "status": "Status", "overtime": "Lembur"}))
 
     # Logout
     elif aksi == "Logout":
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""Slip gaji massal: satu dokumen HTML dan/atau PDF per karyawan per bulan.
+
+Gaji + rincian semua karyawan dihitung sekali dengan evaluator massal
+(pemanasan.gaji_banyak, atau snapshot untuk bulan tertutup), lalu dirender
+per potongan POTONGAN karyawan di process pool. Pool memakai forkserver/spawn,
+bukan fork: job berjalan di thread latar proses Streamlit yang multithread, dan
+fork di sana bisa mewarisi lock yang sedang dipegang thread lain. Tugas membawa
+data potongannya sendiri. Setiap potongan ditulis langsung oleh prosesnya ke
+zip bagian (.partNNNNN.zip, diganti nama setelah lengkap), lalu semua bagian
+dialirkan ke satu zip akhir. Nama entri zip dibuat dari nama karyawan yang
+dibersihkan (nama_berkas), jadi tidak bisa keluar dari folder bulannya.
+
+Melanjutkan: manifest mencatat sidik seluruh isi slip (nama, posisi, total dan
+rincian per hari); run berikutnya dengan data yang sama melewati bagian yang
+sudah ada. PDF ditulis
+oleh penulis PDF kecil di modul ini (font standar Helvetica, tanpa dependensi).
+
+    python slip_gaji.py databaseghe1.json 2025-10 --aturan harian-8jam [--format html pdf] [--proses 4]
+"""
+import argparse
+import hashlib
+import html
+import json, os
+import multiprocessing
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import aturan_gaji, pemanasan, penyimpanan, perusahaan
+
+FORMAT = ("html", "pdf")
+POTONGAN = 250  # slip per zip bagian / tugas process pool
+
+
+def folder_slip(path):
+    return os.path.splitext(path)[0] + "_slip_gaji"
+
+
+def path_zip(db_file, ym):
+    return os.path.join(folder_slip(db_file), f"slip_gaji_{ym}.zip")
+
+
+def kop(path):
+    """kop slip: kode perusahaan (mode banyak perusahaan) atau nama sistem"""
+    return (perusahaan.kode_dari_path(path) or "Sistem Gaji").replace("_", " ").upper()
+
+
+def nama_berkas(nama):
+    """nama karyawan sebagai nama file aman (tanpa '/', '..', karakter kontrol)"""
+    bersih = re.sub(r"[^\w.-]+", "_", nama).strip("._")
+    return bersih or "karyawan"
+
+
+def _berkas_unik(names):
+    # nama berbeda bisa sama setelah dibersihkan ('a/b', 'a_b'): tambahkan nomor
+    hasil, dipakai = [], set()
+    for n in names:
+        dasar = b = nama_berkas(n)
+        ke = 1
+        while b.lower() in dipakai:
+            ke += 1
+            b = f"{dasar}_{ke}"
+        dipakai.add(b.lower())
+        hasil.append(b)
+    return hasil
+
+
+def _rp(x):
+    return f"Rp {int(x):,}"
+
+
+# ---------------------
+# Render satu slip
+# ---------------------
+def slip_html(judul, nama, posisi, ym, total, rows):
+    baris = "".join(
+        f"<tr><td>{d}</td><td>{html.escape(s)}</td><td class='r'>{o}</td><td class='r'>{_rp(a)}</td></tr>"
+        for d, s, o, a in zip(rows.date, rows.status, rows.overtime, rows.amount))
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Slip Gaji {html.escape(nama.title())} {ym}</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse;width:100%}}
+td,th{{border:1px solid #999;padding:4px}}.r{{text-align:right}}</style></head><body>
+<h2>{html.escape(judul)}</h2>
+<h3>Slip Gaji — {ym}</h3>
+<p>Nama: <b>{html.escape(nama.title())}</b><br>Posisi: {html.escape(posisi)}<br>
+Hari tercatat: {len(rows)} &middot; Jam lembur: {sum(rows.overtime)}</p>
+<table><tr><th>Tanggal</th><th>Status</th><th>Lembur (jam)</th><th>Jumlah</th></tr>{baris}
+<tr><th colspan="3" class="r">Total</th><th class="r">{_rp(total)}</th></tr></table>
+</body></html>
+"""
+
+
+def slip_pdf(judul, nama, posisi, ym, total, rows):
+    teks = [(50, "B", 14, judul), (50, "B", 12, f"Slip Gaji - {ym}"), None,
+            (50, "", 10, f"Nama   : {nama.title()}"), (50, "", 10, f"Posisi : {posisi}"),
+            (50, "", 10, f"Hari tercatat: {len(rows)}    Jam lembur: {sum(rows.overtime)}"), None,
+            [(50, "B", 10, "Tanggal"), (150, "B", 10, "Status"), (280, "B", 10, "Lembur (jam)"), (400, "B", 10, "Jumlah")]]
+    for d, s, o, a in zip(rows.date, rows.status, rows.overtime, rows.amount):
+        teks.append([(50, "", 10, d), (150, "", 10, s), (280, "", 10, str(o)), (400, "", 10, _rp(a))])
+    teks += [None, [(280, "B", 11, "Total"), (400, "B", 11, _rp(total))]]
+    return pdf(teks)
+
+
+# ---------------------
+# Penulis PDF minimal (PDF 1.4, Helvetica/Helvetica-Bold, WinAnsi)
+# ---------------------
+def _esc(s):
+    return str(s).encode("cp1252", "replace").replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def pdf(baris, tinggi_baris=15, atas=800, bawah=50):
+    """baris: list of None (baris kosong), (x, gaya, ukuran, teks) atau list-nya (kolom); A4, halaman otomatis"""
+    halaman, isi, y = [], [], atas
+    for b in baris:
+        if y < bawah:
+            halaman.append(b"".join(isi))
+            isi, y = [], atas
+        for x, gaya, ukuran, t in ([] if b is None else [b] if isinstance(b, tuple) else b):
+            isi.append(b"BT /F%d %d Tf %d %d Td (%s) Tj ET\n" % (2 if gaya == "B" else 1, ukuran, x, y, _esc(t)))
+        y -= tinggi_baris
+    halaman.append(b"".join(isi))
+
+    n = len(halaman)
+    objek = [b"<< /Type /Catalog /Pages 2 0 R >>",
+             b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % (5 + 2 * i) for i in range(n)), n),
+             b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+             b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"]
+    for i, konten in enumerate(halaman):
+        objek.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources "
+                     b"<< /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>" % (6 + 2 * i))
+        objek.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(konten), konten))
+    keluar, posisi = [b"%PDF-1.4\n"], []
+    panjang = len(keluar[0])
+    for i, o in enumerate(objek, 1):
+        posisi.append(panjang)
+        bagian = b"%d 0 obj\n%s\nendobj\n" % (i, o)
+        keluar.append(bagian)
+        panjang += len(bagian)
+    keluar.append(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objek) + 1))
+    keluar.extend(b"%010d 00000 n \n" % p for p in posisi)
+    keluar.append(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objek) + 1, panjang))
+    return b"".join(keluar)
+
+
+RENDER = {"html": lambda *a: slip_html(*a).encode("utf-8"), "pdf": slip_pdf}
+
+
+# ---------------------
+# Bagian (satu potongan karyawan -> satu zip bagian, bisa di proses lain)
+# ---------------------
+def tulis_bagian(data, path_bagian, judul, ym, format_):
+    """data = [(nama, berkas, posisi, total, RincianGaji)]; zip ditulis ke .tmp lalu diganti nama (atomik)"""
+    with zipfile.ZipFile(path_bagian + ".tmp", "w", zipfile.ZIP_STORED) as z:
+        for nama, berkas, posisi, total, rows in data:
+            for f in format_:
+                z.writestr(f"{ym}/{berkas}.{f}", RENDER[f](judul, nama, posisi, ym, total, rows))
+    os.replace(path_bagian + ".tmp", path_bagian)
+    return len(data)
+
+
+def _tulis_potongan(args):
+    return tulis_bagian(*args)
+
+
+def _sidik(data, judul, format_):
+    # rincian ikut di-hash: perubahan tarif/absen dengan total yang sama tetap mengubah isi slip
+    h = hashlib.sha1(repr((judul, list(format_))).encode())
+    for nama, berkas, posisi, total, rows in data:
+        h.update(repr((nama, berkas, posisi, total, rows.date, rows.status, rows.overtime, rows.amount)).encode())
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def buat(store, aturan, ym, format_=FORMAT, proses=1, progres=None):
+    """
+    tulis slip semua karyawan bulan ym ke path_zip(store.path, ym); lanjutkan
+    bagian yang sudah ada bila data sama. progres(selesai, total) dipanggil per bagian.
+    return ringkasan {zip, slip, bagian, dilanjutkan, detik}
+    """
+    t0 = time.perf_counter()
+    format_ = tuple(f for f in FORMAT if f in format_)
+    names = list(store.db["karyawan"])
+    gaji = pemanasan.gaji_banyak(store, aturan, names, ym)
+    data = [(n, b, store.db["karyawan"][n].posisi, gaji[n][0], gaji[n][1]) for n, b in zip(names, _berkas_unik(names))]
+    judul = kop(store.path)
+
+    akhir = path_zip(store.path, ym)
+    os.makedirs(os.path.dirname(akhir), exist_ok=True)
+    manifest_path = akhir[:-4] + ".manifest.json"
+    sidik = _sidik(data, judul, format_)
+    tugas = [(i, min(i + POTONGAN, len(data)), f"{akhir[:-4]}.part{i // POTONGAN:05d}.zip", judul, ym, format_)
+             for i in range(0, len(data), POTONGAN)]
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    if manifest is None or manifest.get("sidik") != sidik:  # data/format berubah: mulai dari awal
+        for t in tugas:
+            if os.path.exists(t[2]):
+                os.remove(t[2])
+        with open(manifest_path, "w") as f:
+            json.dump({"bulan": ym, "sidik": sidik, "karyawan": len(data), "format": format_,
+                       "dibuat": datetime.now().isoformat(timespec="seconds")}, f)
+    sisa = [t for t in tugas if not os.path.exists(t[2])]
+    dilanjutkan = len(tugas) - len(sisa)
+    selesai = dilanjutkan
+    if progres:
+        progres(selesai, len(tugas))
+
+    if proses > 1 and len(sisa) > 1:
+        metode = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with ProcessPoolExecutor(min(proses, len(sisa)), mp_context=multiprocessing.get_context(metode)) as pool:
+            for _ in pool.map(_tulis_potongan, [(data[i0:i1], path_bagian, judul, ym, format_)
+                                                for i0, i1, path_bagian, *_ in sisa]):
+                selesai += 1
+                if progres:
+                    progres(selesai, len(tugas))
+    else:
+        for i0, i1, path_bagian, *_ in sisa:
+            tulis_bagian(data[i0:i1], path_bagian, judul, ym, format_)
+            selesai += 1
+            if progres:
+                progres(selesai, len(tugas))
+
+    # alirkan semua bagian ke satu zip akhir (entri per entri, tanpa memuat semuanya)
+    with zipfile.ZipFile(akhir + ".tmp", "w", zipfile.ZIP_DEFLATED) as keluar:
+        for t in tugas:
+            with zipfile.ZipFile(t[2]) as bagian:
+                for info in bagian.infolist():
+                    with bagian.open(info) as src, keluar.open(info.filename, "w") as dst:
+                        while blok := src.read(1 << 20):
+                            dst.write(blok)
+    os.replace(akhir + ".tmp", akhir)
+    for t in tugas:
+        os.remove(t[2])
+    os.remove(manifest_path)
+    return {"zip": akhir, "slip": len(data) * len(format_), "bagian": len(tugas),
+            "dilanjutkan": dilanjutkan, "detik": round(time.perf_counter() - t0, 2)}
+
+
+# ---------------------
+# Job latar (UI tidak diblok)
+# ---------------------
+_job = {}  # path zip -> {"status", "mulai", "bulan", "selesai", "total", ...}
+_job_lock = threading.Lock()
+
+
+def status_job(path):
+    return dict(_job.get(path, {}))
+
+
+def mulai_job(store, aturan, ym, format_=FORMAT, proses=1):
+    """jalankan buat() di thread latar; False bila job bulan itu masih berjalan"""
+    path = path_zip(store.path, ym)
+    with _job_lock:
+        if _job.get(path, {}).get("status") == "berjalan":
+            return False
+        _job[path] = {"status": "berjalan", "mulai": datetime.now().isoformat(timespec="seconds"), "bulan": ym,
+                      "selesai": 0, "total": None}
+
+    def progres(selesai, total):
+        _job[path].update(selesai=selesai, total=total)
+
+    def kerja():
+        try:
+            _job[path].update(status="selesai", **buat(store, aturan, ym, format_, proses, progres))
+        except Exception as e:
+            _job[path].update(status="gagal", error=str(e))
+
+    threading.Thread(target=kerja, name="slip-gaji", daemon=True).start()
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Slip gaji massal (zip HTML/PDF)")
+    parser.add_argument("db", help="file database JSON (format sistemgaji3/sistemgaji4)")
+    parser.add_argument("bulan", help="YYYY-MM")
+    parser.add_argument("--format", nargs="+", choices=FORMAT, default=list(FORMAT))
+    parser.add_argument("--proses", type=int, default=os.cpu_count() or 1)
+    aturan_gaji.argumen_cli(parser)
+    args = parser.parse_args()
+
+    store = penyimpanan.buka(args.db)
+    print(json.dumps(buat(store, aturan_gaji.kompilasi(args.aturan), args.bulan, args.format, args.proses,
+                          lambda s, t: print(f"bagian {s}/{t}", flush=True)), indent=4))
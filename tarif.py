@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Riwayat tarif gaji per posisi dengan tanggal berlaku.
+
+db["rates_history"] = [
+    {"berlaku": "YYYY-MM-DD", "normal": {posisi: int}, "overtime": {posisi: int}},
+    ...
+]
+Setiap entri adalah tabel tarif lengkap yang berlaku mulai tanggal "berlaku"
+sampai entri berikutnya. db["rates"] tetap disimpan sebagai salinan entri
+terakhir (tarif saat ini) agar tampilan lama tetap jalan.
+
+TabelTarif adalah bentuk tabel dari satu set tarif (format db["rates"]) untuk
+sistemgaji.py / sistemgaji2.py: posisi di-intern menjadi kode int kecil,
+sehingga lookup tarif cukup indeks list (atau indeks array di aturan_gaji).
+"""
+import json, os
+from bisect import bisect_right, insort
+
+import numpy as np
+
+AWAL = "0000-01-01"  # tanggal berlaku tarif awal (sebelum ada riwayat)
+
+
+def pastikan_riwayat(db):
+    """buat rates_history dari db["rates"] bila DB belum punya riwayat"""
+    if not db.get("rates_history"):
+        db["rates_history"] = [{
+            "berlaku": AWAL,
+            "normal": dict(db["rates"]["normal"]),
+            "overtime": dict(db["rates"]["overtime"]),
+        }]
+    db["rates_history"].sort(key=lambda r: r["berlaku"])
+    return db["rates_history"]
+
+
+class RiwayatTarif:
+    """interval tarif terurut; lookup as-of dengan bisect, O(log jumlah perubahan)"""
+
+    def __init__(self, riwayat):
+        self.entri = sorted(riwayat, key=lambda r: r["berlaku"])
+        self.tanggal = [r["berlaku"] for r in self.entri]
+
+    def pada(self, dstr):  # dstr = 'YYYY-MM-DD' (atau 'YYYY-MM' untuk awal bulan)
+        """tabel tarif yang berlaku pada tanggal dstr"""
+        i = bisect_right(self.tanggal, dstr) - 1
+        return self.entri[max(i, 0)]
+
+    def tetap(self, dari, sampai):
+        """tabel tarif bila tidak ada perubahan tarif dalam [dari, sampai], else None"""
+        i = max(bisect_right(self.tanggal, dari) - 1, 0)
+        if i + 1 < len(self.tanggal) and self.tanggal[i + 1] <= sampai:
+            return None
+        return self.entri[i]
+
+    def tarif(self, dstr, posisi):
+        """return (tarif normal, tarif lembur) posisi pada tanggal dstr"""
+        r = self.pada(dstr)
+        return r["normal"].get(posisi, 0), r["overtime"].get(posisi, 0)
+
+
+def ubah_tarif(db, berlaku, posisi, normal, overtime):
+    """
+    catat perubahan tarif satu posisi mulai tanggal berlaku ('YYYY-MM-DD').
+    entri baru = salinan tarif yang berlaku pada tanggal itu + perubahan;
+    entri dengan tanggal yang sama ditimpa. Entri sesudahnya yang masih memakai
+    tarif lama posisi ini ikut diubah (perubahan mundur tidak "hilang" lagi).
+    db["rates"] disamakan dengan entri terakhir.
+    return tanggal berlaku (batas invalidasi cache)
+    """
+    riwayat = pastikan_riwayat(db)
+    lama = RiwayatTarif(riwayat).pada(berlaku)
+    lama_n, lama_o = lama["normal"].get(posisi, 0), lama["overtime"].get(posisi, 0)
+    if lama["berlaku"] != berlaku:
+        insort(riwayat, {"berlaku": berlaku, "normal": dict(lama["normal"]),
+                         "overtime": dict(lama["overtime"])}, key=lambda r: r["berlaku"])
+    for r in riwayat:
+        if r["berlaku"] == berlaku:
+            r["normal"][posisi], r["overtime"][posisi] = int(normal), int(overtime)
+        elif r["berlaku"] > berlaku:
+            if r["normal"].get(posisi, 0) == lama_n:
+                r["normal"][posisi] = int(normal)
+            if r["overtime"].get(posisi, 0) == lama_o:
+                r["overtime"][posisi] = int(overtime)
+    terakhir = riwayat[-1]
+    db["rates"] = {"normal": dict(terakhir["normal"]), "overtime": dict(terakhir["overtime"])}
+    return berlaku
+
+
+class TabelTarif:
+    """posisi -> kode int (0 = posisi tidak dikenal, tarif 0) -> tarif normal/lembur"""
+
+    def __init__(self, rates):
+        self.posisi = [""]
+        self.kode = {}
+        self.normal = [0]
+        self.lembur = [0]
+        normal = {p.strip().lower(): v for p, v in rates["normal"].items()}
+        lembur = {p.strip().lower(): v for p, v in rates["overtime"].items()}
+        for p in list(normal) + [p for p in lembur if p not in normal]:
+            self.kode[p] = len(self.posisi)
+            self.posisi.append(p)
+            self.normal.append(int(normal.get(p, 0)))
+            self.lembur.append(int(lembur.get(p, 0)))
+        # versi array untuk evaluator massal (aturan_gaji)
+        self.tarif_normal = np.array(self.normal, dtype=np.int64)
+        self.tarif_lembur = np.array(self.lembur, dtype=np.int64)
+
+    @property
+    def daftar_posisi(self):
+        return self.posisi[1:]
+
+    def kode_posisi(self, posisi):
+        # hanya lower() seperti gaji_normal/gaji_lembur asli: posisi berspasi tetap tidak dikenal (tarif 0)
+        return self.kode.get(posisi.lower(), 0)
+
+
+def muat_tabel(path, rates_default):
+    """TabelTarif dari file JSON {"normal": {...}, "overtime": {...}}, atau default bila belum ada"""
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return TabelTarif(json.load(f))
+    return TabelTarif(rates_default)
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""Tutup buku bulanan: snapshot permanen untuk bulan yang sudah berakhir.
+
+Setelah sebuah bulan berakhir (plus TENGGANG_HARI), semua agregat bulan itu
+dihitung sekali (gaji + rincian per karyawan, kinerja kehadiran, lembur,
+rekap kalender, pemasukan) dan ditulis ke
+<db>_tutup_buku/<YYYY-MM>.<waktu tutup>.json. Bulan ditandai di
+db["bulan_tutup"] (termasuk nama file snapshot-nya); sejak itu bacaan bulan
+tersebut hanya dari snapshot dan perubahan yang menyentuhnya harus didahului
+buka_bulan(). Snapshot tidak pernah dipindah, ditimpa, atau dihapus: membuka
+kembali hanya menghapus tanda, menutup lagi menulis file baru. Dengan begitu
+keadaan DB lampau (riwayat.pada) tetap membaca snapshot yang berlaku saat itu.
+Bulan yang dibuka kembali tidak ditutup otomatis lagi sampai Bendahara
+menutupnya sendiri.
+
+Penjadwal berjalan sebagai thread latar di proses Streamlit
+(mulai_penjadwal) atau sebagai worker terpisah. Setiap worker boleh
+menjalankannya: penutupan lewat store.ubah() di bawah kunci file DB dan
+memeriksa ulang tanda tutup terhadap data terbaru, jadi satu bulan hanya
+ditutup sekali. Penjadwal hanya menutup MAKS_BULAN_MUNDUR bulan terakhir;
+DB lama dengan bertahun-tahun bulan terbuka tidak ditutup massal diam-diam,
+bulan yang lebih lama ditutup dengan --semua atau tombol di UI:
+
+    python tutup_buku.py databaseghe1.json --aturan harian-8jam [--sekali] [--semua] [--interval 3600]
+"""
+import argparse
+import json, os
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import absensi, aturan_gaji, kalender, penyimpanan, peringkat, rekaman
+
+TENGGANG_HARI = 3      # bulan ditutup otomatis sekian hari setelah berakhir (waktu untuk koreksi)
+INTERVAL = 3600        # detik antar pemeriksaan penjadwal
+MAKS_BULAN_MUNDUR = 3  # penjadwal hanya menutup sekian bulan terakhir; bulan lebih lama lewat --semua / UI
+
+
+def folder_snapshot(path):
+    return os.path.splitext(path)[0] + "_tutup_buku"
+
+
+def _path(store, ym, tanda):
+    # tanda dari sebelum snapshot diberi waktu tutup tidak punya "file"
+    return os.path.join(folder_snapshot(store.path), tanda.get("file", ym + ".json"))
+
+
+def _waktu():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def tertutup(db, ym):
+    return ym in db.get("bulan_tutup", {})
+
+
+def tertutup_sejak(db, dstr):
+    """bulan tertutup yang terdampak perubahan berlaku mulai dstr ('YYYY-MM-DD')"""
+    return sorted(ym for ym in db.get("bulan_tutup", {}) if ym >= dstr[:7])
+
+
+# ---------------------
+# Baca snapshot (file tidak berubah selama bulan tertutup -> cache per waktu tutup)
+# ---------------------
+_snapshot = {}  # (path snapshot, waktu tutup) -> dict
+_snapshot_lock = threading.Lock()
+
+
+def snapshot(store, ym):
+    """isi snapshot bulan ym, atau None bila bulan belum ditutup"""
+    tanda = store.db.get("bulan_tutup", {}).get(ym)
+    if tanda is None:
+        return None
+    kunci = (_path(store, ym, tanda), tanda["ditutup"])
+    with _snapshot_lock:
+        if kunci not in _snapshot:
+            with open(kunci[0], "r") as f:
+                snap = json.load(f)
+            for info in snap["karyawan"].values():
+                info["rows"] = rekaman.RincianGaji.dari_kolom(info["rows"])
+            _snapshot[kunci] = snap
+        return _snapshot[kunci]
+
+
+def dari_snapshot(store, ym, bagian, hitung):
+    """bagian snapshot untuk bulan tertutup, hitung() untuk bulan terbuka"""
+    snap = snapshot(store, ym)
+    return hitung() if snap is None else snap[bagian]
+
+
+def gaji(store, ym, names):
+    """{nama: (total, RincianGaji)} dari snapshot; karyawan yang tidak ada di snapshot = 0"""
+    per_karyawan = snapshot(store, ym)["karyawan"]
+    return {n: (per_karyawan[n]["total"], per_karyawan[n]["rows"]) if n in per_karyawan else (0, rekaman.RincianGaji())
+            for n in names}
+
+
+# ---------------------
+# Tutup / buka
+# ---------------------
+def hitung_snapshot(store, aturan, ym):
+    names = list(store.db["karyawan"])
+    hasil = aturan_gaji.hitung_bulan(store, aturan, names, ym)
+    return {
+        "bulan": ym,
+        "aturan": aturan.nama,
+        "karyawan": {n: {"posisi": store.db["karyawan"][n].posisi, "total": hasil[n][0], "rows": hasil[n][1]}
+                     for n in names},
+        "gaji": [{"nama": n.title(), "posisi": store.db["karyawan"][n].posisi, "gaji": hasil[n][0]} for n in names],
+        "total_payroll": sum(total for total, _ in hasil.values()),
+        "pemasukan": store.db.get("pemasukan", {}).get(ym, 0),
+        "kinerja": absensi.kinerja_bulan(store, ym),
+        "lembur": peringkat.lembur_bulan(store, ym),
+        "kalender": kalender.rekap_bulan(store, ym, aturan.jam_per("hadir")),
+    }
+
+
+def _tulis_snapshot(store, ym, snap):
+    """tulis snapshot ke file baru (tidak pernah menimpa); return nama file"""
+    folder = folder_snapshot(store.path)
+    os.makedirs(folder, exist_ok=True)
+    dasar = f"{ym}.{snap['ditutup'].replace('-', '').replace(':', '')}"
+    for ke in range(100):
+        nama = dasar + (f"-{ke}" if ke else "") + ".json"
+        try:
+            with open(os.path.join(folder, nama), "x") as f:
+                json.dump(snap, f, default=rekaman.ke_json)
+            return nama
+        except FileExistsError:  # sisa penutupan gagal / tutup-buka-tutup dalam detik yang sama
+            continue
+    raise FileExistsError(os.path.join(folder, dasar + ".json"))
+
+
+def tutup_bulan(store, aturan, ym):
+    """hitung & tulis snapshot bulan ym lalu tandai tertutup; False bila sudah tertutup"""
+    def tutup(db):
+        # di dalam ubah(): kunci file DB dipegang dan perubahan worker lain sudah diterapkan,
+        # jadi dua worker/penjadwal tidak bisa menutup bulan yang sama dua kali
+        if tertutup(db, ym):
+            return False
+        snap = hitung_snapshot(store, aturan, ym)
+        snap["ditutup"] = _waktu()
+        nama = _tulis_snapshot(store, ym, snap)
+        db.setdefault("bulan_tutup", {})[ym] = {
+            "ditutup": snap["ditutup"], "file": nama, "aturan": aturan.nama,
+            "total_payroll": snap["total_payroll"], "karyawan": len(snap["karyawan"]),
+        }
+        db.get("bulan_dibuka", {}).pop(ym, None)
+        db.setdefault("riwayat_tutup_buku", []).append({"bulan": ym, "aksi": "tutup", "waktu": snap["ditutup"]})
+        return True
+    return store.ubah(tutup, ym=ym)
+
+
+def buka_bulan(store, ym, alasan):
+    """buka kembali bulan tertutup (file snapshot tetap ada untuk riwayat); menutupnya lagi harus manual"""
+    def buka(db):
+        if not tertutup(db, ym):
+            return False
+        tanda = db["bulan_tutup"].pop(ym)
+        with _snapshot_lock:
+            _snapshot.pop((_path(store, ym, tanda), tanda["ditutup"]), None)
+        db.setdefault("bulan_dibuka", {})[ym] = alasan  # tidak ditutup otomatis lagi
+        db.setdefault("riwayat_tutup_buku", []).append({"bulan": ym, "aksi": "buka", "waktu": _waktu(), "alasan": alasan})
+        return True
+    return store.ubah(buka, ym=ym)
+
+
+def _batas(hari_ini):
+    return (hari_ini - timedelta(days=TENGGANG_HARI)).replace(day=1).strftime("%Y-%m")
+
+
+def _mundur(ym, n):
+    y, m = int(ym[:4]), int(ym[5:7]) - 1 - n
+    return f"{y + m // 12}-{m % 12 + 1:02d}"
+
+
+def bulan_siap_tutup(store, hari_ini=None, termasuk_dibuka=False, semua=False):
+    """
+    bulan yang sudah berakhir (lewat tenggang), punya data, dan belum ditutup;
+    tanpa semua hanya MAKS_BULAN_MUNDUR bulan terakhir
+    """
+    batas = _batas(hari_ini or date.today())  # bulan < batas sudah selesai
+    awal = [store.indeks_absen(n).tanggal[0][:7] for n in list(store.db["karyawan"]) if len(store.indeks_absen(n))]
+    awal += list(store.db.get("pemasukan", {}))
+    if not awal:
+        return []
+    bulan, hasil = min(awal), []
+    if not semua:
+        bulan = max(bulan, _mundur(batas, MAKS_BULAN_MUNDUR))
+    while bulan < batas:
+        if not tertutup(store.db, bulan) and (termasuk_dibuka or bulan not in store.db.get("bulan_dibuka", {})):
+            hasil.append(bulan)
+        y, m = int(bulan[:4]), int(bulan[5:7])
+        bulan = f"{y + m // 12}-{m % 12 + 1:02d}"
+    return hasil
+
+
+def tutup_otomatis(store, aturan, hari_ini=None, termasuk_dibuka=False, semua=False):
+    """tutup semua bulan yang siap; return daftar bulan yang baru ditutup"""
+    store.segarkan()
+    return [ym for ym in bulan_siap_tutup(store, hari_ini, termasuk_dibuka, semua) if tutup_bulan(store, aturan, ym)]
+
+
+# ---------------------
+# Penjadwal latar
+# ---------------------
+_penjadwal = {}  # path DB -> {"thread", "batas", "terakhir", "ditutup", "error"}
+_penjadwal_lock = threading.Lock()
+
+
+def status_penjadwal(store):
+    info = _penjadwal.get(store.path, {})
+    return {k: v for k, v in info.items() if k != "thread"}
+
+
+def _putaran(path, aturan, interval, sekali=False, semua=False):
+    # store diambil lewat penyimpanan.buka (bisa sudah dilepas dari LRU) dan hanya
+    # bila sejak pemeriksaan terakhir ada bulan yang baru berakhir
+    info = _penjadwal.setdefault(path, {})
+    while True:
+        batas = _batas(date.today())
+        if info.get("batas") != batas:
+            try:
+                info["ditutup"] = tutup_otomatis(penyimpanan.buka(path), aturan, semua=semua)
+                info["batas"] = batas
+                info.pop("error", None)
+            except Exception as e:
+                info["error"] = str(e)
+            info["terakhir"] = _waktu()
+        if sekali:
+            return info
+        time.sleep(interval)
+
+
+def mulai_penjadwal(store, aturan, interval=INTERVAL):
+    """jalankan penjadwal di thread latar (sekali per file DB per proses)"""
+    with _penjadwal_lock:
+        info = _penjadwal.setdefault(store.path, {})
+        if info.get("thread") is None or not info["thread"].is_alive():
+            info["thread"] = threading.Thread(target=_putaran, args=(store.path, aturan, interval),
+                                              name="tutup-buku", daemon=True)
+            info["thread"].start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker tutup buku bulanan")
+    parser.add_argument("db", help="file database JSON (format sistemgaji3/sistemgaji4)")
+    aturan_gaji.argumen_cli(parser)
+    parser.add_argument("--interval", type=int, default=INTERVAL, help="detik antar pemeriksaan")
+    parser.add_argument("--sekali", action="store_true", help="periksa sekali lalu keluar")
+    parser.add_argument("--semua", action="store_true",
+                        help=f"tutup juga bulan lebih lama dari {MAKS_BULAN_MUNDUR} bulan terakhir")
+    args = parser.parse_args()
+
+    aturan = aturan_gaji.kompilasi(args.aturan)
+    if args.sekali:
+        info = _putaran(args.db, aturan, args.interval, sekali=True, semua=args.semua)
+        print(f"Ditutup: {', '.join(info.get('ditutup', [])) or '-'}" + (f" (error: {info['error']})" if "error" in info else ""))
+    else:
+        _putaran(args.db, aturan, args.interval, semua=args.semua)
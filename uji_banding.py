@@ -0,0 +1,440 @@
+# -*- coding: utf-8 -*-
+"""Uji banding: mesin gaji yang dioptimalkan vs perhitungan referensi.
+
+Referensi (oracle) adalah perhitungan asli sebelum dioptimalkan, disalin apa
+adanya di bawah (script Streamlit tidak bisa di-import tanpa menjalankan UI):
+
+- harian  : calc_month_salary sistemgaji3.py (8 jam) / sistemgaji4.py (7 jam),
+            loop per hari absen dengan db["rates"]
+- mingguan: calculate_monthly sistemgaji2.py (if/elif tarif per posisi)
+
+Setiap mesin alternatif dijalankan pada DB acak dan DB kasus tepi: bulan
+kosong, posisi tidak dikenal / huruf besar / berspasi, overtime berupa string,
+karyawan tanpa "absen", status di luar daftar, lembur pada status non-lembur,
+field status/overtime hilang, urutan tanggal acak. Hasil per karyawan harus
+identik byte-per-byte (json.dumps dari total dan rows). Satu-satunya
+normalisasi: rows referensi diurutkan per tanggal. Mesin membaca indeks
+absensi yang terurut, jadi rincian gaji di app sekarang urut tanggal, bukan
+urut sisip absen seperti perhitungan asli (dicatat juga di laporan).
+
+Laporan per mesin: kasus, selisih (dengan contoh), dan waktu semua karyawan
+satu bulan pada DB dengan --riwayat bulan absen (terbaik dari --ulang) untuk
+referensi vs mesin, dipisah:
+
+- dingin: dari dict JSON mentah, termasuk memuat store / membangun indeks
+          (biaya sekali per proses atau per perubahan struktur)
+- hangat: store/indeks sudah siap dan pernah dipakai, cache hasil bulan itu
+          dibuang dulu (keadaan app yang berjalan sesudah ada perubahan data)
+
+Mesin DITOLAK bila ada selisih, atau bila percepatan hangat di bawah
+MIN_PERCEPATAN (mesin yang lebih lambat dari referensi tidak ada gunanya
+dipakai); percepatan dingin hanya dilaporkan. Exit code 1 bila ada mesin yang
+ditolak, dengan alasan di laporan.
+
+    python uji_banding.py [--kasus 20] [--karyawan 300] [--riwayat 24] [--ulang 3] [--seed 1] [--out laporan.json]
+"""
+import argparse
+import calendar
+import gc
+import json, os, sys
+import random
+import shutil
+import tempfile
+import time
+from datetime import date
+
+import aturan_gaji, jendela, migrasi, pemanasan, penyimpanan, rekaman, tarif, tutup_buku
+
+POSISI = ["intern", "staff", "spv", "manager"]
+POSISI_TEPI = ["Staff", "MANAGER", " staff", "direktur", ""]
+STATUS = ["hadir", "hadir+lembur", "izin", "sakit", "cuti"]
+STATUS_TEPI = ["", "HADIR", "libur"]
+RATES = {
+    "normal": {"intern": 35000, "staff": 50000, "spv": 100000, "manager": 200000},
+    "overtime": {"intern": 20000, "staff": 40000, "spv": 55000, "manager": 65000},
+}
+BULAN = "2026-09"        # bulan yang diuji; data juga ada di bulan sebelum & sesudahnya
+BULAN_KOSONG = "2025-02"  # tidak ada absen sama sekali
+CONTOH = 10
+UKUR_MIN = 0.05       # detik minimum per pengukuran waktu
+MIN_PERCEPATAN = 1.0  # percepatan hangat minimum agar mesin LULUS (selain hasil identik)
+
+
+# ---------------------
+# Referensi (salinan perhitungan asli)
+# ---------------------
+def calc_month_salary(db, name, ym, jam):
+    """calc_month_salary asli; jam = 8 (sistemgaji3.py) atau 7 (sistemgaji4.py)"""
+    if name not in db["karyawan"]:
+        return 0, []
+    pos = db["karyawan"][name]["posisi"]
+    normal_rate = db["rates"]["normal"].get(pos, 0)
+    ot_rate = db["rates"]["overtime"].get(pos, 0)
+    total = 0
+    rows = []
+    absen = db["karyawan"][name].get("absen", {})
+    for dstr, info in absen.items():
+        if dstr.startswith(ym):
+            status = info.get("status","")
+            overtime = int(info.get("overtime",0))
+            if status == "hadir":
+                amt = jam * normal_rate
+                total += amt
+                rows.append({"date": dstr, "status": status, "overtime": 0, "amount": amt})
+            elif status == "hadir+lembur":
+                amt = jam * normal_rate + overtime * ot_rate
+                total += amt
+                rows.append({"date": dstr, "status": status, "overtime": overtime, "amount": amt})
+            else:
+                rows.append({"date": dstr, "status": status, "overtime": 0, "amount": 0})
+    return int(total), rows
+
+
+def gaji_normal(posisi):
+    p = posisi.lower()
+    if p == "intern": return 35000
+    if p == "staff": return 50000
+    if p == "spv": return 100000
+    if p == "manager": return 200000
+    return 0
+
+
+def gaji_lembur(posisi):
+    p = posisi.lower()
+    if p == "intern": return 20000
+    if p == "staff": return 40000
+    if p == "spv": return 55000
+    if p == "manager": return 65000
+    return 0
+
+
+def calculate_monthly(posisi, weeks):
+    """calculate_monthly asli sistemgaji2.py"""
+    total = 0
+    for w in weeks:
+        days = int(w.get("days", 0))
+        overtime = int(w.get("overtime", 0))
+        jam_normal = days * 8
+        gaji_minggu = (jam_normal * gaji_normal(posisi)) + (overtime * gaji_lembur(posisi))
+        total += gaji_minggu
+    return total
+
+
+# ---------------------
+# Mesin alternatif: (siapkan(db, aturan, ym, folder) -> data,
+#                    hitung(data, aturan, names, ym) -> {nama: (total, rows|None)},
+#                    buang(data, ym) | None: buang cache hasil bulan ym, struktur/indeks tetap)
+# rows None = mesin hanya menghasilkan total. siapkan() = memuat store, membangun indeks dsb.;
+# db yang diterima siapkan() adalah salinan milik mesin itu (boleh diubah di tempat).
+# ---------------------
+def _salin(db):
+    return json.loads(json.dumps(db))
+
+
+def _store(db, aturan, ym, folder):
+    return penyimpanan.Penyimpanan(":memori:", db=rekaman.dari_json(db))
+
+
+def _buang_gaji(store, ym):
+    store.invalidasi(ym=ym)
+
+
+def _indeks(store, aturan, names, ym):
+    # jalur calc_month_salary di app: per karyawan lewat cache gaji store
+    hitung = lambda nama, b: aturan_gaji.hitung_bulan(store, aturan, [nama], b)[nama]
+    return {n: store.gaji_bulan(n, ym, hitung) for n in names}
+
+
+def _massal(store, aturan, names, ym):
+    # dashboard / slip / kiosk: semua karyawan dalam satu panggilan evaluator
+    return pemanasan.gaji_banyak(store, aturan, names, ym)
+
+
+def _siap_jendela(db, aturan, ym, folder):
+    return jendela.MetrikBergulir(_store(db, aturan, ym, folder), aturan)
+
+
+def _jendela(m, aturan, names, ym):
+    # metrik bergulir (prefix sum) dengan jendela = satu bulan kalender
+    th, bl = map(int, ym.split("-"))
+    hari = calendar.monthrange(th, bl)[1]
+    gaji = m.jendela(hari, f"{ym}-{hari:02d}")["gaji"].tolist()
+    return {n: (gaji[g], None) for g, n in enumerate(m.names) if n in names}
+
+
+def _siap_migrasi(db, aturan, ym, folder):
+    # bagian baca migrasi.py: record JSON mentah per karyawan (absen bulan ym saja) + riwayat tarif
+    riwayat = tarif.RiwayatTarif(tarif.pastikan_riwayat(db))
+    return riwayat, {n: {"posisi": k["posisi"], "absen": {d: v for d, v in k.get("absen", {}).items() if d.startswith(ym)}}
+                     for n, k in db["karyawan"].items()}
+
+
+def _migrasi(data, aturan, names, ym):
+    # evaluator massal migrasi.py untuk satu potongan berisi names
+    riwayat, record = data
+    potongan = [(n, record[n]) for n in names]
+    return {n: (total, None) for n, total in zip(names, migrasi._gaji_harian(aturan, riwayat, potongan))}
+
+
+def _siap_tutup_buku(db, aturan, ym, folder):
+    path = os.path.join(folder, f"tutup_{len(os.listdir(folder))}.json")
+    with open(path, "w") as f:
+        json.dump(db, f)
+    store = penyimpanan.Penyimpanan(path)
+    tutup_buku.tutup_bulan(store, aturan, ym)
+    return store
+
+
+def _tutup_buku(store, aturan, names, ym):
+    # bulan tertutup: dibaca dari snapshot JSON (termasuk rows per kolom)
+    return tutup_buku.gaji(store, ym, names)
+
+
+MESIN_HARIAN = {
+    "indeks": (_store, _indeks, _buang_gaji),
+    "massal": (_store, _massal, _buang_gaji),
+    "jendela": (_siap_jendela, _jendela, None),
+    "migrasi": (_siap_migrasi, _migrasi, None),
+    "tutup_buku": (_siap_tutup_buku, _tutup_buku, None),
+}
+
+
+def _tabel(db, aturan, ym, folder):
+    return tarif.TabelTarif(RATES), db
+
+
+def _mingguan_massal(data, aturan, names, ym):
+    # calculate_monthly_batch sistemgaji2.py
+    tabel, db = data
+    rec = [db[n] for n in names]
+    totals = aturan_gaji.hitung_mingguan(aturan, tabel, [r["posisi"] for r in rec], [r["weeks"] for r in rec])
+    return {n: (t, None) for n, t in zip(names, totals)}
+
+
+def _mingguan_satu(data, aturan, names, ym):
+    # calculate_monthly sistemgaji2.py (jalur skalar satu karyawan)
+    tabel, db = data
+    return {n: (aturan_gaji.gaji_mingguan(aturan, tabel, r["posisi"], r["weeks"]), None)
+            for n, r in zip(names, map(db.get, names))}
+
+
+MESIN_MINGGUAN = {
+    "massal": (_tabel, _mingguan_massal, None),
+    "satu": (_tabel, _mingguan_satu, None),
+}
+
+
+# ---------------------
+# DB acak & kasus tepi
+# ---------------------
+def db_harian(rnd, n_karyawan, tepi, riwayat=3):
+    """absen selama `riwayat` bulan yang berakhir sebulan sesudah BULAN"""
+    karyawan = {}
+    th, bl = map(int, BULAN.split("-"))
+    akhir = th * 12 + bl  # bulan sesudah BULAN (indeks bulan 0-based + 1)
+    bulan = [divmod(i, 12) for i in range(akhir - riwayat + 1, akhir + 1)]
+    bulan = [(y, m + 1) for y, m in bulan]
+    for i in range(n_karyawan):
+        posisi = rnd.choice(POSISI + (POSISI_TEPI if tepi else []))
+        rec = {"password": "pw", "posisi": posisi}
+        if tepi and rnd.random() < 0.1:
+            karyawan[f"k{i}"] = rec  # tanpa "absen"
+            continue
+        absen = {}
+        for y, m in bulan:
+            if tepi and rnd.random() < 0.2:
+                continue  # bulan kosong untuk karyawan ini
+            for d in range(1, calendar.monthrange(y, m)[1] + 1):
+                if rnd.random() < 0.3:
+                    continue
+                status = rnd.choice(STATUS + (STATUS_TEPI if tepi else []))
+                lembur = rnd.randint(1, 4) if status == "hadir+lembur" else 0
+                if tepi and rnd.random() < 0.2:
+                    lembur = rnd.randint(0, 5)  # lembur pada status apa pun
+                hari = {"status": status, "overtime": str(lembur) if tepi and rnd.random() < 0.3 else lembur}
+                if tepi and rnd.random() < 0.05:
+                    del hari[rnd.choice(["status", "overtime"])]
+                absen[f"{y}-{m:02d}-{d:02d}"] = hari
+        if tepi and rnd.random() < 0.5:
+            absen = dict(rnd.sample(list(absen.items()), len(absen)))  # urutan kunci acak
+        rec["absen"] = absen
+        karyawan[f"k{i}"] = rec
+    rates = json.loads(json.dumps(RATES))
+    if tepi:
+        rates["normal"]["direktur"] = 300000  # posisi dengan tarif normal tanpa tarif lembur
+        del rates["overtime"][rnd.choice(POSISI)]
+    return {"karyawan": karyawan, "pemasukan": {}, "rates": rates}
+
+
+def db_mingguan(rnd, n_karyawan, tepi, riwayat=None):
+    db = {}
+    for i in range(n_karyawan):
+        weeks = []
+        for _ in range(rnd.choice([0, 4, 4, 5]) if tepi else 4):
+            w = {"days": rnd.randint(0, 6), "overtime": rnd.randint(0, 10)}
+            if tepi and rnd.random() < 0.3:
+                w = {k: str(v) for k, v in w.items()}
+            if tepi and rnd.random() < 0.1:
+                del w[rnd.choice(["days", "overtime"])]
+            weeks.append(w)
+        db[f"k{i}"] = {"posisi": rnd.choice(POSISI + (POSISI_TEPI if tepi else [])), "gaji": 0, "weeks": weeks}
+    return db
+
+
+# ---------------------
+# Pembandingan
+# ---------------------
+def _bentuk(nilai):
+    try:
+        return json.dumps(nilai)
+    except TypeError:  # mis. numpy int: tidak identik dengan int Python
+        return repr(nilai)
+
+
+def bandingkan(referensi, hasil):
+    """[(nama, referensi, mesin)] untuk karyawan yang hasilnya tidak identik byte-per-byte"""
+    beda = []
+    for n, (total, rows) in referensi.items():
+        if n not in hasil:
+            beda.append((n, [total, rows], "tidak ada hasil"))
+            continue
+        t, r = hasil[n]
+        if r is None:  # mesin yang hanya menghasilkan total
+            a, b = _bentuk(total), _bentuk(t)
+        else:
+            a = _bentuk([total, sorted(rows, key=lambda x: x["date"])])
+            b = _bentuk([t, r if isinstance(r, list) else r.ke_dicts()])
+        if a != b:
+            beda.append((n, a, b))
+    return beda
+
+
+def _ukur(fungsi, ulang, sebelum=None):
+    """
+    waktu panggilan fungsi() tercepat; return (detik, hasil). Tiap pengukuran
+    memanggil fungsi() berulang sampai total minimal UKUR_MIN detik, sehingga
+    panggilan di bawah 1 ms punya cukup sampel (gangguan hanya menambah waktu).
+    sebelum() dijalankan sebelum setiap panggilan, di luar pengukuran.
+    Seperti timeit, garbage collector dimatikan selama pengukuran.
+    """
+    terbaik, hasil = None, None
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(ulang):
+            total = 0.0
+            while total < UKUR_MIN:
+                if sebelum:
+                    sebelum()
+                t0 = time.perf_counter()
+                hasil = fungsi()
+                detik = time.perf_counter() - t0
+                total += detik
+                terbaik = detik if terbaik is None else min(terbaik, detik)
+    finally:
+        gc.enable()
+    return terbaik, hasil
+
+
+def uji(jenis, n_kasus, n_karyawan, riwayat, ulang, seed, folder):
+    """laporan per mesin untuk satu jenis referensi ('harian-8jam', 'harian-7jam', 'mingguan-8jam')"""
+    rnd = random.Random(seed)
+    aturan = aturan_gaji.kompilasi(jenis)
+    mingguan = jenis.startswith("mingguan")
+    mesin = MESIN_MINGGUAN if mingguan else MESIN_HARIAN
+    if mingguan:
+        referensi = lambda db, ym: {n: (calculate_monthly(r["posisi"], r["weeks"]), None) for n, r in db.items()}
+        buat, bulan = db_mingguan, [None]
+    else:
+        jam = aturan.jam_per("hadir")
+        referensi = lambda db, ym: {n: calc_month_salary(db, n, ym, jam) for n in db["karyawan"]}
+        buat, bulan = db_harian, [BULAN, BULAN_KOSONG]
+
+    laporan = {m: {"kasus": 0, "selisih": 0, "contoh_selisih": []} for m in mesin}
+    for k in range(n_kasus):
+        tepi = k % 2 == 1
+        db = buat(rnd, rnd.randint(1, 40), tepi)
+        for ym in bulan:
+            ref = referensi(db, ym)
+            names = list(ref)
+            for m, (siapkan, hitung, _) in mesin.items():
+                beda = bandingkan(ref, hitung(siapkan(_salin(db), aturan, ym, folder), aturan, names, ym))
+                laporan[m]["kasus"] += 1
+                laporan[m]["selisih"] += len(beda)
+                for n, a, b in beda[:CONTOH - len(laporan[m]["contoh_selisih"])]:
+                    laporan[m]["contoh_selisih"].append({"kasus": k, "tepi": tepi, "bulan": ym, "nama": n,
+                                                         "referensi": a, "mesin": b})
+
+    # waktu: semua karyawan satu bulan pada DB acak besar
+    db = buat(rnd, n_karyawan, False, riwayat)
+    ym = bulan[0]
+    ref = referensi(db, ym)
+    names = list(ref)
+    for m, (siapkan, hitung, buang) in mesin.items():
+        # dingin: dari dict JSON mentah (seperti referensi) sampai hasil, termasuk siapkan();
+        # menyalin dict untuk mesin tidak ikut diukur (referensi juga menerima dict yang sudah ada)
+        salinan = []
+        dingin = lambda: hitung(siapkan(salinan.pop(), aturan, ym, folder), aturan, names, ym)
+        # hangat: data sudah disiapkan & pernah dipakai; cache hasil bulan ini dibuang (seperti sesudah ada perubahan)
+        data = siapkan(_salin(db), aturan, ym, folder)
+        hitung(data, aturan, names, ym)
+        hangat = lambda: hitung(data, aturan, names, ym)
+        # referensi diukur lagi di setiap putaran, bergantian dengan mesin: gangguan dari proses lain
+        # (mesin CI bersama) mengenai keduanya, bukan hanya salah satu
+        t_ref = t_dingin = t_hangat = float("inf")
+        for _ in range(ulang):
+            t_ref = min(t_ref, _ukur(lambda: referensi(db, ym), 1)[0])
+            t, hasil_dingin = _ukur(dingin, 1, sebelum=lambda: salinan.append(_salin(db)))
+            t_dingin = min(t_dingin, t)
+            t, hasil = _ukur(hangat, 1, sebelum=(lambda: buang(data, ym)) if buang else None)
+            t_hangat = min(t_hangat, t)
+        laporan[m]["selisih"] += len(bandingkan(ref, hasil_dingin)) + len(bandingkan(ref, hasil))
+        laporan[m].update({
+            "ms_referensi": round(t_ref * 1000, 2),
+            "ms_dingin": round(t_dingin * 1000, 2), "percepatan_dingin": round(t_ref / t_dingin, 2),
+            "ms_hangat": round(t_hangat * 1000, 2), "percepatan_hangat": round(t_ref / t_hangat, 2),
+        })
+        alasan = []
+        if laporan[m]["selisih"]:
+            alasan.append(f"{laporan[m]['selisih']} hasil tidak identik")
+        if t_ref / t_hangat < MIN_PERCEPATAN:
+            alasan.append(f"hangat lebih lambat dari referensi (percepatan < {MIN_PERCEPATAN})")
+        laporan[m]["status"] = "DITOLAK" if alasan else "LULUS"
+        if alasan:
+            laporan[m]["alasan"] = alasan
+    return laporan
+
+
+def jalankan(n_kasus=20, n_karyawan=300, riwayat=24, ulang=3, seed=1):
+    folder = tempfile.mkdtemp(prefix="uji_banding_")
+    try:
+        return {"karyawan_waktu": n_karyawan, "bulan_riwayat_waktu": riwayat,
+                "normalisasi": "rows referensi diurutkan per tanggal sebelum dibandingkan: mesin membaca indeks "
+                               "absensi (urut tanggal), referensi asli mengikuti urutan sisip absen di DB",
+                **{jenis: uji(jenis, n_kasus, n_karyawan, riwayat, ulang, seed, folder)
+                   for jenis in ("harian-8jam", "harian-7jam", "mingguan-8jam")}}
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Uji banding mesin gaji vs perhitungan referensi")
+    parser.add_argument("--kasus", type=int, default=20, help="DB acak per jenis (separuh kasus tepi)")
+    parser.add_argument("--karyawan", type=int, default=300, help="jumlah karyawan DB untuk pengukuran waktu")
+    parser.add_argument("--riwayat", type=int, default=24, help="bulan absen di DB untuk pengukuran waktu")
+    parser.add_argument("--ulang", type=int, default=3, help="pengukuran waktu diambil yang terbaik dari sekian kali")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None, help="tulis laporan JSON ke file ini")
+    args = parser.parse_args()
+
+    laporan = jalankan(args.kasus, args.karyawan, args.riwayat, args.ulang, args.seed)
+    teks = json.dumps(laporan, indent=4)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(teks)
+    print(teks)
+    ditolak = [f"{jenis}/{m} ({'; '.join(r['alasan'])})" for jenis, per_mesin in laporan.items()
+               if isinstance(per_mesin, dict) for m, r in per_mesin.items() if r["status"] != "LULUS"]
+    if ditolak:
+        print("\n  ".join(["DITOLAK:"] + ditolak), file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""Uji beban: simulasi banyak sesi Streamlit bersamaan (jam absen pagi).
+
+Memakai streamlit.testing.v1.AppTest di beberapa proses atas file DB yang
+sama, seperti beberapa worker Streamlit; di tiap proses banyak sesi (thread)
+berbagi modul & Penyimpanan. AppTest tidak aman dijalankan dari banyak thread
+(kompilasi script, id widget), jadi di dalam satu proses run script
+diserialkan dengan kunci sendiri; sesi tetap bergantian di antara run dan
+proses berjalan bersamaan. Database sintetis ditulis ke folder sementara, lalu:
+
+- sesi karyawan  : buka app -> menu Karyawan -> login -> "Absen Hari Ini" -> "Simpan Absen"
+- sesi bendahara : buka app -> menu Bendahara -> "Dashboard Evaluasi Bulanan"
+
+Laporan: persentil latensi per aksi, throughput, error per aksi, absen yang
+hilang (app menampilkan "Absensi tersimpan." tapi tidak ada di file DB akhir)
+dan pertumbuhan ukuran file DB. Sampel ukuran diambil tanpa lock; DB ditulis
+atomik (file sementara + os.replace), jadi setiap sampel adalah ukuran file utuh.
+
+    python uji_beban.py [--app sistemgaji3.py] [--karyawan 200] [--bendahara 5] [--proses 4] [--thread 16]
+"""
+import argparse
+import json, os, sys
+import random
+import shutil
+import tempfile
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+
+from streamlit.testing.v1 import AppTest
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+DB_FILE = {"sistemgaji3.py": "databaseghe1.json", "sistemgaji4.py": "database.json"}
+POSISI = ["intern", "staff", "spv", "manager"]
+STATUS = ["hadir", "hadir+lembur", "izin", "sakit", "cuti"]
+
+
+# ---------------------
+# Database sintetis
+# ---------------------
+def db_sintetis(n_karyawan, hari, seed=1):
+    """n_karyawan dengan absen hari kerja selama `hari` hari terakhir (hari ini belum absen)"""
+    rnd = random.Random(seed)
+    mulai = date.today() - timedelta(days=hari)
+    karyawan = {}
+    for i in range(n_karyawan):
+        absen = {}
+        for d in range(hari):
+            tgl = mulai + timedelta(days=d)
+            if tgl.weekday() >= 5:
+                continue
+            status = rnd.choice(["hadir"] * 6 + STATUS[1:])
+            absen[tgl.isoformat()] = {"status": status, "overtime": rnd.randint(1, 4) if status == "hadir+lembur" else 0}
+        karyawan[f"karyawan{i}"] = {"password": f"pw{i}", "posisi": rnd.choice(POSISI), "absen": absen}
+    return {
+        "karyawan": karyawan,
+        "pemasukan": {date.today().strftime("%Y-%m"): 100000000 * n_karyawan // 100},
+        "rates": {
+            "normal": {"intern": 35000, "staff": 50000, "spv": 100000, "manager": 200000},
+            "overtime": {"intern": 20000, "staff": 40000, "spv": 55000, "manager": 65000},
+        },
+    }
+
+
+# ---------------------
+# Langkah sesi
+# ---------------------
+class Catatan:
+    """latensi per aksi + error, aman dipakai banyak thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latensi = {}  # aksi -> [detik]
+        self.error = {}    # aksi -> {pesan: jumlah}
+
+    def ukur(self, aksi, fungsi):
+        t0 = time.perf_counter()
+        try:
+            at = fungsi()
+        except Exception as e:  # kegagalan harness/AppTest, bukan exception di script
+            at, pesan = None, f"{type(e).__name__}: {e}"
+        else:
+            pesan = at.exception[0].value if len(at.exception) else None
+        with self.lock:
+            self.latensi.setdefault(aksi, []).append(time.perf_counter() - t0)
+        if pesan:
+            self.catat_error(aksi, pesan)
+        return at
+
+    def catat_error(self, aksi, pesan):
+        with self.lock:
+            per_aksi = self.error.setdefault(aksi, {})
+            per_aksi[pesan[:120]] = per_aksi.get(pesan[:120], 0) + 1
+
+
+_run_lock = threading.Lock()  # satu run AppTest sekaligus per proses
+
+
+def _run(at):
+    with _run_lock:
+        return at.run()
+
+
+def _menu(at, pilihan):
+    for w in list(at.sidebar.selectbox) + list(at.radio):
+        if w.label.startswith("Menu Utama"):
+            w.set_value(pilihan)
+            return _run(at)
+    raise LookupError("widget Menu Utama tidak ditemukan")
+
+
+def _widget(daftar, label):
+    for w in daftar:
+        if w.label == label:
+            return w
+    raise LookupError(f"widget '{label}' tidak ditemukan")
+
+
+def sesi_karyawan(app, nama, pw, status, catatan, timeout):
+    at = catatan.ukur("buka", lambda: _run(AppTest.from_file(os.path.join(REPO, app), default_timeout=timeout)))
+    if at is None:
+        return
+    catatan.ukur("menu_karyawan", lambda: _menu(at, "Karyawan"))
+
+    def login():
+        _widget(at.text_input, "Nama").set_value(nama)
+        _widget(at.text_input, "Password").set_value(pw)
+        _widget(at.button, "Login Karyawan").click()
+        _run(at)
+        for e in at.exception:
+            catatan.catat_error("login", e.value)
+        if not any(s.label == "Pilih Aksi" for s in at.selectbox):
+            _run(at)  # panel karyawan baru tampil pada run berikutnya
+        return at
+    catatan.ukur("login", login)
+
+    def absen():
+        _widget(at.selectbox, "Status").set_value(status)
+        _widget(at.button, "Simpan Absen").click()
+        _run(at)
+        return at
+    at = catatan.ukur("simpan_absen", absen)
+    return at is not None and any(s.value == "Absensi tersimpan." for s in at.success)
+
+
+def sesi_bendahara(app, catatan, timeout):
+    at = AppTest.from_file(os.path.join(REPO, app), default_timeout=timeout)
+    at.session_state["bendahara"] = True
+    catatan.ukur("buka", lambda: _run(at))
+    catatan.ukur("dashboard", lambda: _menu(at, "Bendahara"))  # aksi default = Dashboard Evaluasi Bulanan
+
+
+# ---------------------
+# Ukuran file DB dari waktu ke waktu
+# ---------------------
+def pantau_ukuran(path, selesai, sampel, interval=0.25):
+    t0 = time.perf_counter()
+    while not selesai.is_set():
+        if os.path.exists(path):
+            sampel.append((round(time.perf_counter() - t0, 2), os.path.getsize(path)))
+        selesai.wait(interval)
+
+
+def persentil(nilai, p):
+    urut = sorted(nilai)
+    return urut[min(int(p / 100 * len(urut)), len(urut) - 1)]
+
+
+def jalankan_proses(app, folder, tugas, n_thread, timeout):
+    """
+    satu proses worker: jalankan tugas (jenis, nama, pw, status) dengan n_thread sesi
+    bersamaan; return (latensi, error, {nama: True bila absen dikonfirmasi})
+    """
+    os.chdir(folder)  # DB_FILE di app adalah path relatif
+    catatan, konfirmasi = Catatan(), {}
+    with ThreadPoolExecutor(n_thread) as pool:
+        for jenis, nama, pw, status in tugas:
+            if jenis == "karyawan":
+                konfirmasi[nama] = pool.submit(sesi_karyawan, app, nama, pw, status, catatan, timeout)
+            else:
+                pool.submit(sesi_bendahara, app, catatan, timeout)
+    return catatan.latensi, catatan.error, {n: bool(f.result()) for n, f in konfirmasi.items()}
+
+
+def jalankan(app, n_karyawan, n_bendahara, n_proses, n_thread, n_db, hari, timeout=120, seed=1):
+    folder = tempfile.mkdtemp(prefix="uji_beban_")
+    lama = os.getcwd()
+    os.chdir(folder)  # DB_FILE di app adalah path relatif
+    try:
+        path = os.path.join(folder, DB_FILE[app])
+        db = db_sintetis(max(n_db, n_karyawan), hari, seed)
+        with open(path, "w") as f:
+            json.dump(db, f, indent=4)
+        ukuran_awal = os.path.getsize(path)
+
+        rnd = random.Random(seed)
+        names = list(db["karyawan"])[:n_karyawan]
+        harapan = {n: rnd.choice(STATUS) for n in names}
+        tugas = [("karyawan", n, db["karyawan"][n]["password"], harapan[n]) for n in names]
+        tugas += [("bendahara", None, None, None)] * n_bendahara
+        rnd.shuffle(tugas)
+
+        catatan, sampel, selesai = Catatan(), [], threading.Event()
+        konfirmasi = {}  # nama -> True bila app menampilkan "Absensi tersimpan."
+        # spawn: proses baru tidak mewarisi thread pemantau / state streamlit proses ini
+        with ProcessPoolExecutor(n_proses, mp_context=multiprocessing.get_context("spawn")) as pool:
+            list(pool.map(time.sleep, [0.5] * n_proses))  # semua worker dimulai (impor streamlit) sebelum diukur
+            pemantau = threading.Thread(target=pantau_ukuran, args=(path, selesai, sampel), daemon=True)
+            pemantau.start()
+            t0 = time.perf_counter()
+            bagian = [pool.submit(jalankan_proses, app, folder, tugas[i::n_proses], n_thread, timeout)
+                      for i in range(n_proses)]
+            for f in bagian:
+                latensi, error, k = f.result()
+                for aksi, v in latensi.items():
+                    catatan.latensi.setdefault(aksi, []).extend(v)
+                for aksi, per_aksi in error.items():
+                    for pesan, n in per_aksi.items():
+                        catatan.error.setdefault(aksi, {})[pesan] = catatan.error.get(aksi, {}).get(pesan, 0) + n
+                konfirmasi.update(k)
+            durasi = time.perf_counter() - t0
+        selesai.set()
+        pemantau.join()
+
+        with open(path, "r") as f:
+            akhir = json.load(f)
+        today = date.today().isoformat()
+        dikonfirmasi = [n for n in names if konfirmasi[n]]
+        # hilang = app sudah bilang tersimpan, tapi tidak ada di file DB akhir
+        hilang = [n for n in dikonfirmasi
+                  if akhir["karyawan"].get(n, {}).get("absen", {}).get(today, {}).get("status") != harapan[n]]
+        n_aksi = sum(len(v) for v in catatan.latensi.values())
+        return {
+            "app": app,
+            "sesi_karyawan": n_karyawan, "sesi_bendahara": n_bendahara, "proses": n_proses, "thread": n_thread,
+            "durasi_detik": round(durasi, 2),
+            "throughput_aksi_per_detik": round(n_aksi / durasi, 2) if durasi else None,
+            "throughput_absen_per_detik": round(len(catatan.latensi.get("simpan_absen", [])) / durasi, 2) if durasi else None,
+            "latensi_ms": {
+                aksi: {"n": len(v), **{f"p{p}": round(persentil(v, p) * 1000, 1) for p in (50, 90, 95, 99)},
+                       "maks": round(max(v) * 1000, 1)}
+                for aksi, v in catatan.latensi.items()
+            },
+            "error": catatan.error,
+            "absen_dikonfirmasi": len(dikonfirmasi),
+            "sesi_gagal": len(names) - len(dikonfirmasi),
+            "absen_hilang": len(hilang),
+            "contoh_absen_hilang": hilang[:10],
+            "ukuran_db": {
+                "awal": ukuran_awal, "akhir": os.path.getsize(path),
+                "sampel": [f"{t}s: {n}" for t, n in sampel[::max(len(sampel) // 20, 1)]],
+            },
+        }
+    finally:
+        os.chdir(lama)
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Uji beban sesi Streamlit bersamaan (AppTest)")
+    parser.add_argument("--app", choices=sorted(DB_FILE), default="sistemgaji3.py")
+    parser.add_argument("--karyawan", type=int, default=50, help="jumlah sesi karyawan (login + absen)")
+    parser.add_argument("--bendahara", type=int, default=2, help="jumlah sesi bendahara (dashboard)")
+    parser.add_argument("--proses", type=int, default=4, help="proses worker atas file DB yang sama")
+    parser.add_argument("--thread", type=int, default=8, help="sesi bersamaan per proses")
+    parser.add_argument("--db-karyawan", type=int, default=0, help="jumlah karyawan di DB sintetis (min = --karyawan)")
+    parser.add_argument("--hari", type=int, default=90, help="panjang riwayat absen sintetis")
+    parser.add_argument("--timeout", type=int, default=120, help="timeout per run script (detik)")
+    parser.add_argument("--out", default=None, help="tulis laporan JSON ke file ini")
+    args = parser.parse_args()
+
+    laporan = jalankan(args.app, args.karyawan, args.bendahara, args.proses, args.thread, args.db_karyawan, args.hari,
+                       args.timeout)
+    teks = json.dumps(laporan, indent=4)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(teks)
+    print(teks)